@@ -1,12 +1,14 @@
 
 import sys
+import io
 import json
 import os
 import logging
 import traceback
-import hashlib
-import pickle
-from pathlib import Path
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,131 +17,490 @@ logger = logging.getLogger(__name__)
 # Add the parent directory to path so we can import the secret_ai_writer module
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Simple cache implementation
-class SimpleCache:
-    def __init__(self, cache_dir=None):
-        if cache_dir is None:
-            cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
-        
-    def _get_key(self, action, data):
-        """Generate a unique key based on action and data"""
-        key_data = json.dumps({"action": action, "data": data}, sort_keys=True).encode()
-        return hashlib.md5(key_data).hexdigest()
-    
-    def get(self, action, data):
-        """Get value from cache if it exists"""
-        key = self._get_key(action, data)
-        cache_file = self.cache_dir / f"{key}.pickle"
-        
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    logger.info(f"Cache hit for action: {action}")
-                    return pickle.load(f)
-            except Exception as e:
-                logger.error(f"Error reading from cache: {e}")
-        return None
-    
-    def set(self, action, data, result):
-        """Save value to cache"""
-        key = self._get_key(action, data)
-        cache_file = self.cache_dir / f"{key}.pickle"
-        
-        try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(result, f)
-            logger.info(f"Saved to cache: {action}")
-        except Exception as e:
-            logger.error(f"Error writing to cache: {e}")
-
-# Initialize cache
-cache = SimpleCache()
-
+# SecretAIWriter and ConfidentialWriter are imported by BridgeWriters on first
+# use, so an action only loads langchain or secret_sdk when it needs them
 try:
-    from secret_ai_writer.ai_core.ai_integration import SecretAIWriter
-    from secret_ai_writer.ai_core.secret_ai_client import ConfidentialWriter
-    logger.info("Successfully imported SecretAIWriter")
+    from secret_ai_writer.ai_core.cache import TieredCache
+    from secret_ai_writer.ai_core.metrics import metrics_snapshot, prometheus_text, stage_timer
 except ImportError as e:
-    logger.error(f"Failed to import SecretAIWriter: {str(e)}")
+    logger.error(f"Failed to import secret_ai_writer: {str(e)}")
     traceback.print_exc()
     print(json.dumps({"error": f"Import error: {str(e)}"}))
     sys.exit(1)
 
-def main():
-    try:
-        # Read command line arguments
-        action = sys.argv[1]
-        data = json.loads(sys.argv[2])
+def open_cache(cache_path=None):
+    """Open the result cache shared by every writer in this process
+    
+    Results live in an in-process LRU and a single SQLite file under
+    backend/cache (or CACHE_PATH), with size caps, TTL and compaction.
+    """
+    if cache_path is None:
+        cache_path = os.environ.get(
+            "CACHE_PATH", os.path.join(os.path.dirname(__file__), 'cache', 'bridge_cache.sqlite3')
+        )
+    return TieredCache.from_config(disk_path=cache_path)
+
+# Initialize cache
+cache = open_cache()
+
+class BridgeWriters:
+    """Writers shared by every request served from one bridge process
+
+    Building SecretAIWriter/ConfidentialWriter sets up the LLM client, the
+    LCD client and derives the wallet, so they are created on first use and
+    then reused instead of being rebuilt for every request.
+    
+    Args:
+        write_behind: Queue usage-stats writes in the background; None uses
+            USAGE_STATS_WRITE_BEHIND
+    """
+    def __init__(self, write_behind=None):
+        self._lock = threading.Lock()
+        self._write_behind = write_behind
+        self._ai_writer = None
+        self._confidential_writer = None
+    
+    def ai_writer(self):
+        """Return the shared SecretAIWriter, creating it on first use"""
+        with self._lock:
+            if self._ai_writer is None:
+                from secret_ai_writer.ai_core.ai_integration import SecretAIWriter
+                self._ai_writer = SecretAIWriter(cache=cache, write_behind=self._write_behind)
+                logger.info("Initialized SecretAIWriter")
+            return self._ai_writer
+    
+    def confidential_writer(self):
+        """Return the shared ConfidentialWriter, creating it on first use"""
+        with self._lock:
+            if self._confidential_writer is None:
+                from secret_ai_writer.ai_core.secret_ai_client import ConfidentialWriter
+                self._confidential_writer = ConfidentialWriter()
+                logger.info("Initialized ConfidentialWriter")
+            return self._confidential_writer
+    
+    def close(self):
+        """Flush background work (queued usage-stats writes) before exit"""
+        with self._lock:
+            if self._ai_writer is not None:
+                self._ai_writer.close()
+
+# Actions handle_action serves; metrics for anything else go under one "bridge.unknown" stage,
+# so clients cannot add a histogram per made-up action name
+ACTIONS = ("generate", "enhance", "enhance_multi", "generate_batch", "warm_up", "tx_status",
+           "model_stats", "backend_stats", "metrics", "store", "retrieve", "retrieve_drafts")
+
+def handle_action(action, data, writers):
+    """Run a single bridge action and return its JSON-serializable result
+    
+    Args:
+        action: One of generate, enhance, enhance_multi, generate_batch, warm_up, tx_status,
+            model_stats, backend_stats, metrics, store, retrieve or retrieve_drafts
+        data: Request payload for the action
+        writers: BridgeWriters providing the writer instances
         
-        logger.info(f"Processing action: {action}")
+    Returns:
+        Result dictionary, or a dictionary with an "error" key
+    """
+    logger.info(f"Processing action: {action}")
+    
+    # Handle different actions
+    if action == "generate":
+        prompt = data.get("prompt", "")
+        user_address = data.get("user_address", "dev_mode_address")
+        system_instruction = data.get("system_instruction")
         
-        # Check cache for generate and enhance actions
-        if action in ["generate", "enhance"]:
-            cached_result = cache.get(action, data)
-            if cached_result:
-                print(json.dumps(cached_result))
-                return
+        return writers.ai_writer().generate_content(
+            prompt, user_address, system_instruction, tenant=data.get("tenant")
+        )
         
-        # Handle different actions
-        if action == "generate":
-            # Initialize the AI writer
-            writer = SecretAIWriter()
-            logger.info(f"Initialized SecretAIWriter")
-            
-            prompt = data.get("prompt", "")
-            user_address = data.get("user_address", "dev_mode_address")
-            system_instruction = data.get("system_instruction")
-            
-            result = writer.generate_content(prompt, user_address, system_instruction)
-            
-            # Cache the result
-            cache.set(action, data, result)
-            
-            print(json.dumps(result))
-            
-        elif action == "enhance":
-            # Initialize the AI writer
-            writer = SecretAIWriter()
-            logger.info(f"Initialized SecretAIWriter")
-            
-            draft_text = data.get("draft_text", "")
-            enhancement_type = data.get("enhancement_type", "grammar")
-            user_address = data.get("user_address", "dev_mode_address")
+    elif action == "enhance":
+        draft_text = data.get("draft_text", "")
+        enhancement_type = data.get("enhancement_type", "grammar")
+        user_address = data.get("user_address", "dev_mode_address")
+        
+        return writers.ai_writer().enhance_writing(
+            draft_text, enhancement_type, user_address, tenant=data.get("tenant"),
+            incremental=data.get("incremental")
+        )
+    
+    elif action == "enhance_multi":
+        # One draft, several enhancement types, run concurrently under one metadata record
+        return writers.ai_writer().enhance_writing_multi(
+            data.get("draft_text", ""),
+            data.get("enhancement_types", []),
+            data.get("user_address", "dev_mode_address"),
+            max_concurrency=data.get("max_concurrency"),
+            tenant=data.get("tenant"),
+            incremental=data.get("incremental")
+        )
+    
+    elif action == "generate_batch":
+        return writers.ai_writer().generate_many(
+            data.get("items", []),
+            data.get("user_address", "dev_mode_address"),
+            max_concurrency=data.get("max_concurrency"),
+            tenant=data.get("tenant")
+        )
+    
+    elif action == "warm_up":
+        return writers.ai_writer().warm_up()
+    
+    elif action == "tx_status":
+        return writers.ai_writer().usage_tx_status(data.get("handle", ""))
+    
+    elif action == "model_stats":
+        from secret_ai_writer.ai_core.telemetry import model_stats
+        return model_stats()
+    
+    elif action == "backend_stats":
+        # Load, health and latency per Ollama backend, when OLLAMA_BASE_URLS configures a pool
+        pool = writers.ai_writer().backend_pool
+        return pool.stats() if pool is not None else {}
+    
+    elif action == "metrics":
+        # Stage latency histograms, as JSON or in the Prometheus text format
+        if data.get("format") == "prometheus":
+            return {"content_type": "text/plain; version=0.0.4", "body": prometheus_text()}
+        return {"stages": metrics_snapshot()}
+    
+    elif action == "store":
+        content = data.get("content", "")
+        user_address = data.get("user_address", "dev_mode_address")
+        metadata = data.get("metadata", {})
+        
+        return writers.confidential_writer().store_draft(content, metadata)
+        
+    elif action == "retrieve":
+        user_address = data.get("user_address", "dev_mode_address")
+        
+        return writers.confidential_writer().retrieve_draft(user_address)
+    
+    elif action == "retrieve_drafts":
+        records = list(writers.confidential_writer().retrieve_drafts(
+            data.get("addresses", []), max_concurrency=data.get("max_concurrency")
+        ))
+        return {"drafts": records[:-1], "summary": records[-1]}
+        
+    else:
+        logger.error(f"Unknown action: {action}")
+        return {"error": f"Unknown action: {action}"}
+
+def handle_action_stream(action, data, writers):
+    """Run a generate/enhance action, yielding NDJSON records as tokens arrive
+    
+    Args:
+        action: One of generate, enhance or enhance_multi
+        data: Request payload for the action
+        writers: BridgeWriters providing the writer instances
+        
+    Yields:
+        {"type": "token", "content": ...} records followed by one
+        {"type": "done", "content": ..., "metadata": ...} record; for
+        enhance_multi, one {"type": "variant", ...} record per enhancement type
+        as it completes, followed by one {"type": "summary", "metadata": ...} record
+    """
+    logger.info(f"Processing streaming action: {action}")
+    
+    user_address = data.get("user_address", "dev_mode_address")
+    tenant = data.get("tenant")
+    
+    if action == "generate":
+        yield from writers.ai_writer().generate_content_stream(
+            data.get("prompt", ""), user_address, data.get("system_instruction"), tenant=tenant
+        )
+    elif action == "enhance":
+        yield from writers.ai_writer().enhance_writing_stream(
+            data.get("draft_text", ""), data.get("enhancement_type", "grammar"), user_address, tenant=tenant,
+            incremental=data.get("incremental")
+        )
+    elif action == "enhance_multi":
+        yield from writers.ai_writer().enhance_writing_multi_stream(
+            data.get("draft_text", ""), data.get("enhancement_types", []), user_address,
+            max_concurrency=data.get("max_concurrency"), tenant=tenant, incremental=data.get("incremental")
+        )
+    else:
+        logger.error(f"Unknown streaming action: {action}")
+        yield {"type": "error", "error": f"Unknown streaming action: {action}"}
+
+def run_batch(options, infile, outfile, writers):
+    """Run generate_batch over JSONL items, writing JSONL records as they complete
+    
+    Args:
+        options: Batch options (user_address, max_concurrency, tenant)
+        infile: Text stream with one generate or enhance item per line
+        outfile: Text stream for item records and the final summary record
+        writers: BridgeWriters providing the writer instances
+    """
+    items = []
+    for line in infile:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid batch item: {str(e)}")
+            # Keep the position so indexes still match input lines; the writer reports it
+            items.append(None)
+    
+    logger.info(f"Processing batch of {len(items)} items")
+    
+    for record in writers.ai_writer().generate_many_stream(
+        items,
+        options.get("user_address", "dev_mode_address"),
+        max_concurrency=options.get("max_concurrency"),
+        tenant=options.get("tenant")
+    ):
+        outfile.write(json.dumps(record) + "\n")
+        outfile.flush()
+
+class BridgeDaemon:
+    """Long-lived bridge serving newline-framed JSON requests
+    
+    Each request is one JSON object per line:
+        {"id": 1, "action": "generate", "data": {...}}
+    and each response is one JSON object per line carrying the same id:
+        {"id": 1, "result": {...}} or {"id": 1, "error": "..."}
+    
+    Requests for generate/enhance may set "stream": true to receive
+    {"id": 1, "token": "..."} frames before the final result frame.
+    Streamed enhance_multi requests get one {"id": 1, "variant": {...}}
+    frame per enhancement type as it completes, then the summary as result.
+    
+    Requests are handled concurrently, so responses may arrive out of order.
+    A {"action": "shutdown"} frame stops reading from the stream.
+    """
+    def __init__(self, writers=None, max_workers=None):
+        self.writers = writers or BridgeWriters()
+        if max_workers is None:
+            max_workers = int(os.environ.get("BRIDGE_WORKERS", "8"))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._stopping = threading.Event()
+    
+    def _process(self, request, respond):
+        """Handle one decoded request frame and send its response"""
+        request_id = request.get("id")
+        action = request.get("action")
+        data = request.get("data") or {}
+        try:
+            with stage_timer(f"bridge.{action if action in ACTIONS else 'unknown'}"):
+                if request.get("stream"):
+                    for record in handle_action_stream(action, data, self.writers):
+                        if record["type"] == "token":
+                            respond({"id": request_id, "token": record["content"]})
+                        elif record["type"] == "error":
+                            respond({"id": request_id, "error": record["error"]})
+                        elif record["type"] == "variant":
+                            respond({"id": request_id, "variant": {k: v for k, v in record.items() if k != "type"}})
+                        elif record["type"] == "summary":
+                            respond({"id": request_id, "result": {"metadata": record["metadata"]}})
+                        else:
+                            respond({"id": request_id, "result": {"content": record["content"], "metadata": record["metadata"]}})
+                    return
+                
+                result = handle_action(action, data, self.writers)
+                respond({"id": request_id, "result": result})
+        except Exception as e:
+            logger.error(f"Error in AI bridge: {str(e)}")
+            traceback.print_exc()
+            respond({"id": request_id, "error": str(e)})
+    
+    def serve_stream(self, infile, outfile):
+        """Serve requests read from infile, writing responses to outfile
+        
+        Args:
+            infile: Text stream of request frames
+            outfile: Text stream for response frames
+        """
+        write_lock = threading.Lock()
+        # Only requests still running are kept, so a long-lived connection does not pile up results
+        pending = set()
+        pending_lock = threading.Lock()
+        
+        def submit(request):
+            future = self.executor.submit(self._process, request, respond)
+            with pending_lock:
+                pending.add(future)
+            future.add_done_callback(finished)
+        
+        def finished(future):
+            with pending_lock:
+                pending.discard(future)
+        
+        def respond(frame):
+            with write_lock:
+                outfile.write(json.dumps(frame) + "\n")
+                outfile.flush()
+        
+        for line in infile:
+            line = line.strip()
+            if not line:
+                continue
             
-            result = writer.enhance_writing(draft_text, enhancement_type, user_address)
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                respond({"id": None, "error": f"Invalid request frame: {str(e)}"})
+                continue
             
-            # Cache the result
-            cache.set(action, data, result)
+            if request.get("action") == "shutdown":
+                break
             
-            print(json.dumps(result))
+            submit(request)
         
-        elif action == "store":
-            # Initialize the confidential writer
-            writer = ConfidentialWriter()
-            logger.info(f"Initialized ConfidentialWriter for storage")
-            
-            content = data.get("content", "")
-            user_address = data.get("user_address", "dev_mode_address")
-            metadata = data.get("metadata", {})
+        # Let in-flight requests answer before the stream is closed
+        with pending_lock:
+            outstanding = list(pending)
+        for future in outstanding:
+            future.result()
+    
+    def serve_stdio(self):
+        """Serve requests over stdin/stdout"""
+        logger.info("AI bridge daemon listening on stdin/stdout")
+        self.serve_stream(sys.stdin, sys.stdout)
+    
+    def serve_unix(self, socket_path):
+        """Serve requests over a Unix domain socket, one stream per connection
+        
+        Args:
+            socket_path: Filesystem path for the socket
+        """
+        daemon = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                infile = io.TextIOWrapper(self.rfile, encoding="utf-8")
+                outfile = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+                daemon.serve_stream(infile, outfile)
+        
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        
+        with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+            logger.info(f"AI bridge daemon listening on {socket_path}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                logger.info("AI bridge daemon shutting down")
+            finally:
+                os.unlink(socket_path)
+    
+    def serve_metrics(self, port, host="127.0.0.1"):
+        """Serve /metrics (Prometheus text) and /metrics.json over HTTP in a background thread
+        
+        Args:
+            port: TCP port to listen on
+            host: Interface to bind, loopback by default
             
-            result = writer.store_draft(content, metadata)
-            print(json.dumps(result))
+        Returns:
+            The running ThreadingHTTPServer
+        """
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = prometheus_text(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps({"stages": metrics_snapshot()}), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                payload = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
             
-        elif action == "retrieve":
-            # Initialize the confidential writer
-            writer = ConfidentialWriter()
-            logger.info(f"Initialized ConfidentialWriter for retrieval")
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="bridge-metrics", daemon=True).start()
+        logger.info(f"AI bridge metrics listening on http://{host}:{server.server_port}/metrics")
+        return server
+    
+    def start_keep_warm(self, interval):
+        """Warm the models up now, then ping them every interval seconds from a background thread
+        
+        Each ping restarts Ollama's keep-alive timer for every model the writer
+        can route to, so they stay loaded for as long as the daemon runs, even
+        through idle periods.
+        
+        Args:
+            interval: Seconds between pings; keep it below OLLAMA_KEEP_ALIVE
             
-            user_address = data.get("user_address", "dev_mode_address")
+        Returns:
+            The keep-warm thread
+        """
+        def keep_warm():
+            while not self._stopping.is_set():
+                try:
+                    self.writers.ai_writer().warm_up()
+                except Exception as e:
+                    logger.warning(f"Keep-warm ping failed: {str(e)}")
+                self._stopping.wait(interval)
+        
+        thread = threading.Thread(target=keep_warm, name="bridge-keep-warm", daemon=True)
+        thread.start()
+        logger.info(f"AI bridge keeping the models warm every {interval}s")
+        return thread
+    
+    def close(self):
+        """Wait for in-flight requests, release the worker pool and flush queued writes"""
+        self._stopping.set()
+        self.executor.shutdown(wait=True)
+        self.writers.close()
+
+def run_daemon(args):
+    """Start the daemon from command line arguments following --daemon"""
+    daemon = BridgeDaemon()
+    if "--metrics-port" in args:
+        daemon.serve_metrics(int(args[args.index("--metrics-port") + 1]))
+    # Preload the model and keep it resident; 0 turns the pings off
+    keep_warm = os.environ.get("OLLAMA_KEEP_WARM_INTERVAL", "240")
+    if "--keep-warm" in args:
+        keep_warm = args[args.index("--keep-warm") + 1]
+    if float(keep_warm) > 0:
+        daemon.start_keep_warm(float(keep_warm))
+    try:
+        if "--socket" in args:
+            daemon.serve_unix(args[args.index("--socket") + 1])
+        else:
+            daemon.serve_stdio()
+    finally:
+        daemon.close()
+
+def main():
+    try:
+        # Long-lived mode: build the writers once and serve framed requests
+        if sys.argv[1] == "--daemon":
+            run_daemon(sys.argv[2:])
+            return
+        
+        # Read command line arguments
+        action = sys.argv[1]
+        data = json.loads(sys.argv[2])
+        
+        # One process per request flushes the queue before exiting anyway, and a
+        # tx_handle could not be resolved by a later process, so write synchronously
+        writers = BridgeWriters(write_behind=False)
+        try:
+            # Batch mode: JSONL items on stdin, JSONL records on stdout
+            if action == "generate_batch":
+                run_batch(data, sys.stdin, sys.stdout, writers)
+                return
             
-            result = writer.retrieve_draft(user_address)
-            print(json.dumps(result))
+            # NDJSON output: one record per line, flushed as each token arrives
+            if "--stream" in sys.argv[3:]:
+                for record in handle_action_stream(action, data, writers):
+                    print(json.dumps(record), flush=True)
+                return
             
-        else:
-            logger.error(f"Unknown action: {action}")
-            print(json.dumps({"error": f"Unknown action: {action}"}))
+            result = handle_action(action, data, writers)
+            print(json.dumps(result), flush=True)
+        finally:
+            # Send any pending usage batch before exit
+            writers.close()
             
     except Exception as e:
         logger.error(f"Error in AI bridge: {str(e)}")
@@ -148,4 +509,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-  
\ No newline at end of file
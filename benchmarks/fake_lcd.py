@@ -0,0 +1,144 @@
+# benchmarks/fake_lcd.py
+
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from miscreant.aes.siv import SIV
+from secret_sdk.util.encrypt_utils import hkdf_salt
+
+FAKE_CODE_HASH = "0" * 64
+
+class FakeLCDServer:
+    """Local stand-in for a Secret Network LCD serving the draft contract
+
+    Holds its own consensus key, so contract queries made by secret_sdk are
+    decrypted, answered from an in-memory draft store and encrypted back the
+    way the enclave would. Every request waits for the configured latency,
+and the most requests seen in flight at once is kept in peak_in_flight.
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            latency: Seconds added to every request
+            host: Interface to bind
+            port: Port to bind, 0 for any free port
+        """
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.drafts = {}
+        self._consensus_key = X25519PrivateKey.generate()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLCDServer":
+        threading.Thread(target=self._server.serve_forever, name="fake-lcd", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def put_draft(self, address: str, encrypted_content: str, encrypted_metadata: str = "") -> None:
+        """Store a draft as the contract's store_draft message would"""
+        with self._lock:
+            self.drafts[address] = {
+                "encrypted_content": encrypted_content,
+                "encrypted_metadata": encrypted_metadata,
+                "timestamp": int(time.time())
+            }
+
+    def _siv(self, client_pubkey: bytes, nonce: bytes) -> SIV:
+        shared = self._consensus_key.exchange(X25519PublicKey.from_public_bytes(client_pubkey))
+        key = HKDF(algorithm=hashes.SHA256(), length=32, salt=hkdf_salt, info=b"").derive(shared + nonce)
+        return SIV(key)
+
+    def _query(self, encrypted_query: bytes) -> Dict[str, Any]:
+        """Decrypt a contract query, run it and return the encrypted response"""
+        nonce, client_pubkey, ciphertext = encrypted_query[:32], encrypted_query[32:64], encrypted_query[64:]
+        siv = self._siv(client_pubkey, nonce)
+        # The plaintext is the contract code hash followed by the JSON query
+        query = json.loads(siv.open(ciphertext, [b""])[64:])
+
+        if "get_draft" in query:
+            with self._lock:
+                result = self.drafts.get(query["get_draft"]["address"])
+            if result is None:
+                return {"code": 2, "message": "Generic error: Draft not found"}
+        elif "get_config" in query:
+            result = {"owner": "secret1fakeowner", "draft_count": len(self.drafts)}
+        else:
+            return {"code": 2, "message": "Unknown query"}
+
+        encoded = base64.b64encode(json.dumps(result).encode())
+        return {"data": base64.b64encode(siv.seal(encoded, [b""])).decode()}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; Nagle would hold the body back
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    self._respond()
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _respond(self):
+                time.sleep(server.latency)
+                url = urlparse(self.path)
+
+                if url.path == "/registration/v1beta1/tx-key":
+                    key = server._consensus_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+                    self._send_json({"key": base64.b64encode(key).decode()})
+                elif url.path.startswith("/compute/v1beta1/code_hash/by_contract_address/"):
+                    self._send_json({"code_hash": FAKE_CODE_HASH})
+                elif url.path.startswith("/compute/v1beta1/query/"):
+                    query = parse_qs(url.query)["query"][0]
+                    response = server._query(base64.b64decode(query))
+                    self._send_json(response, status=200 if "data" in response else 500)
+                else:
+                    self._send_json({"code": 5, "message": "not found"}, status=404)
+
+            def _send_json(self, payload: Optional[Dict[str, Any]], status: int = 200):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
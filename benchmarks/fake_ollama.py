@@ -0,0 +1,247 @@
+# benchmarks/fake_ollama.py
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_WORDS = ("privacy", "secret", "network", "writer", "draft", "model", "token", "chain",
+          "encrypted", "story", "clear", "concise", "engaging", "careful", "text", "idea")
+
+class FakeOllamaServer:
+    """Local stand-in for the Ollama HTTP API with a simulated generation cost
+
+    Serves /api/chat, /api/generate and /api/tags. Each request sleeps for the
+    configured base latency, the model load time when the model is cold, the
+    prompt evaluation time and one decode step per token, and reports the same
+    statistics (in nanoseconds) a real Ollama server does.
+
+    Like Ollama's KV cache, each model keeps the last few prompts it evaluated;
+    a prompt sharing a prefix with one of them only pays for the rest.
+    """
+
+    def __init__(self, token_rate: float = 50.0, prompt_rate: float = 1000.0,
+                 latency: float = 0.0, load_time: float = 0.0, response_tokens: int = 64,
+                 keep_alive: float = 300.0, parallel: int = 0, prefix_cache_slots: int = 0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            token_rate: Generated tokens per second
+            prompt_rate: Prompt tokens evaluated per second
+            latency: Fixed overhead added to every request, in seconds
+            load_time: Seconds to load a cold model
+            response_tokens: Tokens generated when the request sets no num_predict
+            keep_alive: Seconds a model stays loaded after its last request
+            parallel: Requests served at once, like OLLAMA_NUM_PARALLEL; the rest
+                queue (0 serves every request at once)
+            prefix_cache_slots: Prompts whose evaluated prefix each model keeps
+                for reuse (0 evaluates every prompt in full)
+            host: Interface to bind
+            port: Port to bind, 0 for any free port
+        """
+        self.token_rate = token_rate
+        self.prompt_rate = prompt_rate
+        self.latency = latency
+        self.load_time = load_time
+        self.response_tokens = response_tokens
+        self.keep_alive = keep_alive
+        self.prefix_cache_slots = prefix_cache_slots
+        self.requests = 0
+        self._loaded = {}
+        self._prefixes = {}
+        self._slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _load_duration(self, model: str, keep_alive: Optional[Any]) -> float:
+        """Return the load time this request pays and mark the model as loaded"""
+        now = time.time()
+        with self._lock:
+            self.requests += 1
+            expires_at = self._loaded.get(model)
+            cold = expires_at is None or expires_at < now
+            if cold:
+                # Unloading the model drops its KV cache
+                self._prefixes.pop(model, None)
+            ttl = self.keep_alive if keep_alive is None else _parse_keep_alive(keep_alive)
+            self._loaded[model] = now + ttl if ttl >= 0 else float("inf")
+        return self.load_time if cold else 0.0
+
+    def _cached_prefix(self, model: str, prompt_text: str) -> int:
+        """Return how much of the prompt a cache slot already holds, and keep the prompt in a slot
+
+        As in Ollama, the longest common prefix over all slots is reused. The
+        prompt takes over that slot when it extends the slot's whole prompt;
+        otherwise the prefix is copied into the least recently used slot.
+        """
+        if not self.prefix_cache_slots or not prompt_text:
+            return 0
+        with self._lock:
+            slots = self._prefixes.setdefault(model, [])
+            best, cached = None, 0
+            for index, previous in enumerate(slots):
+                common = len(os.path.commonprefix([previous, prompt_text]))
+                if common > cached:
+                    best, cached = index, common
+            if best is not None and cached == len(slots[best]):
+                slots.pop(best)
+            elif len(slots) >= self.prefix_cache_slots:
+                slots.pop(0)
+            slots.append(prompt_text)
+        return cached
+
+    def _plan(self, body: Dict[str, Any], prompt_text: str) -> Dict[str, Any]:
+        """Work out the token counts and phase durations for one request"""
+        options = body.get("options") or {}
+        num_predict = options.get("num_predict")
+        completion_tokens = self.response_tokens if num_predict in (None, -1) else min(num_predict, self.response_tokens)
+        model = body.get("model", "")
+        load = self._load_duration(model, body.get("keep_alive"))
+        # Only the part of the prompt missing from the cache is evaluated, and reported, as Ollama does
+        evaluated = len(prompt_text) - self._cached_prefix(model, prompt_text)
+        prompt_tokens = max(1, evaluated // 4) if prompt_text else 0
+        return {
+            "load": load,
+            "prompt_tokens": prompt_tokens,
+            "prompt_eval": prompt_tokens / self.prompt_rate if self.prompt_rate else 0.0,
+            "completion_tokens": completion_tokens,
+            "token_interval": 1 / self.token_rate if self.token_rate else 0.0
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; Nagle would hold the body back
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": model, "model": model} for model in server._loaded]})
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/api/chat":
+                    prompt_text = "".join(m.get("content", "") for m in body.get("messages", []))
+                    self._serve(body, prompt_text, chat=True)
+                elif self.path == "/api/generate":
+                    self._serve(body, body.get("prompt", ""), chat=False)
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def _serve(self, body: Dict[str, Any], prompt_text: str, chat: bool):
+                if server._slots is None:
+                    self._generate(body, prompt_text, chat)
+                    return
+                with server._slots:
+                    self._generate(body, prompt_text, chat)
+
+            def _generate(self, body: Dict[str, Any], prompt_text: str, chat: bool):
+                start = time.perf_counter()
+                plan = server._plan(body, prompt_text)
+                time.sleep(server.latency + plan["load"] + plan["prompt_eval"])
+                eval_start = time.perf_counter()
+                model = body.get("model", "")
+                # A request with no prompt only loads the model, as in Ollama
+                tokens = _tokens(plan["completion_tokens"]) if prompt_text else []
+
+                def record(content: str, done: bool) -> Dict[str, Any]:
+                    frame = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+                    if chat:
+                        frame["message"] = {"role": "assistant", "content": content}
+                    else:
+                        frame["response"] = content
+                    return frame
+
+                def final() -> Dict[str, Any]:
+                    now = time.perf_counter()
+                    done = record("", True)
+                    done.update({
+                        "done_reason": "stop" if tokens else "load",
+                        "total_duration": int((now - start) * 1e9),
+                        "load_duration": int(plan["load"] * 1e9),
+                        "prompt_eval_count": plan["prompt_tokens"],
+                        "prompt_eval_duration": int(plan["prompt_eval"] * 1e9),
+                        "eval_count": len(tokens),
+                        "eval_duration": int((now - eval_start) * 1e9)
+                    })
+                    return done
+
+                if not body.get("stream", True):
+                    time.sleep(plan["token_interval"] * len(tokens))
+                    response = final()
+                    if chat:
+                        response["message"]["content"] = "".join(tokens)
+                    else:
+                        response["response"] = "".join(tokens)
+                    self._send_json(response)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in tokens:
+                    time.sleep(plan["token_interval"])
+                    self._send_chunk(record(token, False))
+                self._send_chunk(final())
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _send_chunk(self, payload: Dict[str, Any]):
+                data = (json.dumps(payload) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, payload: Dict[str, Any], status: int = 200):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def _tokens(count: int) -> List[str]:
+    return [(" " if i else "") + _WORDS[i % len(_WORDS)] for i in range(count)]
+
+def _parse_keep_alive(value: Any) -> float:
+    """Parse an Ollama keep_alive value ("5m", "30s", "1h", seconds, or -1 for forever)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for unit in ("ms", "s", "m", "h"):
+        if value.endswith(unit):
+            return float(value[:-len(unit)]) * units[unit]
+    return float(value)
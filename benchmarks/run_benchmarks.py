@@ -0,0 +1,289 @@
+# benchmarks/run_benchmarks.py
+"""Offline benchmarks for the writer, the chain client and the draft store
+
+Starts a fake Ollama server and a fake LCD, points SecretAIWriter and
+ConfidentialWriter at them, and drives generate, enhance, reenhance (an
+edit-enhance loop using incremental enhancement), store and retrieve at
+several concurrency levels. Results are written as JSON.
+
+Usage:
+    python -m benchmarks.run_benchmarks --requests 50 --concurrency 1,4,16 --output bench.json
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from .fake_lcd import FakeLCDServer
+from .fake_ollama import FakeOllamaServer
+
+OPERATIONS = ("generate", "enhance", "reenhance", "store", "retrieve")
+
+# Enhance requests rotate through these, so prompt prefixes are shared but interleaved
+ENHANCEMENT_TYPES = ("grammar", "creativity", "conciseness", "professional", "casual")
+
+BENCH_CONTRACT = "secret1benchcontractxxxxxxxxxxxxxxxxxxxxxxxxx"
+BENCH_DRAFT = "\n\n".join(
+    f"Paragraph {i}: the confidential writer keeps drafts private while the model suggests edits." for i in range(8)
+)
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+def measure(operation: Callable[[int], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Run an operation `requests` times with `concurrency` callers
+
+    Returns:
+        Dictionary with throughput, error count and latency percentiles
+    """
+    latencies = []
+    errors = 0
+
+    def timed(index: int) -> float:
+        start = time.perf_counter()
+        operation(index)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(timed, index) for index in range(requests)]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Benchmark request failed: {str(e)}")
+                errors += 1
+    elapsed = time.perf_counter() - start
+
+    latency = {}
+    if latencies:
+        latency = {
+            "p50": round(percentile(latencies, 0.50), 6),
+            "p95": round(percentile(latencies, 0.95), 6),
+            "p99": round(percentile(latencies, 0.99), 6),
+            "mean": round(sum(latencies) / len(latencies), 6),
+            "max": round(max(latencies), 6)
+        }
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed": round(elapsed, 6),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else None,
+        "latency": latency
+    }
+
+@contextlib.contextmanager
+def bench_environment(ollama_urls: List[str], lcd_url: str, use_cache: bool = False):
+    """Point the writers at the fake servers through their usual settings, restoring them afterwards"""
+    from secret_sdk.key.mnemonic import MnemonicKey
+    settings = {
+        "OLLAMA_BASE_URL": ollama_urls[0],
+        # More than one URL puts the writer's backend pool in front of them
+        "OLLAMA_BASE_URLS": ",".join(ollama_urls),
+        "OLLAMA_MODEL": "bench-model",
+        "LCD_URL": lcd_url,
+        "CHAIN_ID": "bench-1",
+        "CONTRACT_ADDRESS": BENCH_CONTRACT,
+        "MNEMONIC": MnemonicKey().mnemonic,
+        "DEV_MODE": "False",
+        # Without --cache every retrieve goes to the LCD
+        "DRAFT_CACHE_TTL": "30" if use_cache else "0"
+    }
+    saved = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def draft_address(index: int) -> str:
+    return f"secret1benchdraft{index:06d}"
+
+def seed_drafts(confidential_writer, lcd: FakeLCDServer, count: int) -> None:
+    """Put drafts on the fake LCD, compressed and encrypted by the writer as store_draft would send them"""
+    from secret_ai_writer.ai_core.draft_codec import encode_payload
+    for index in range(count):
+        lcd.put_draft(
+            draft_address(index),
+            confidential_writer._encrypt_data(encode_payload(f"{BENCH_DRAFT}\n\nDraft {index}".encode())),
+            confidential_writer._encrypt_data(encode_payload(json.dumps({"title": f"Draft {index}"}).encode()))
+        )
+
+def retrieve(confidential_writer, index: int) -> dict:
+    """Retrieve a seeded draft, failing when the writer fell back to its placeholder draft"""
+    result = confidential_writer.retrieve_draft(draft_address(index))
+    if result["metadata"].get("error_fallback"):
+        raise RuntimeError("retrieve_draft returned its error fallback")
+    return result
+
+def prompt_eval_seconds(stats: Dict[str, Dict[str, Any]]) -> float:
+    """Total prompt evaluation time Ollama reported, over every model"""
+    return sum(model["prompt_eval_seconds"] for model in stats.values())
+
+def build_operations(ai_writer, confidential_writer,
+                     user_address: str = "secret1benchuser") -> Dict[str, Callable[[int], Any]]:
+    """Return one callable per benchmarked operation, taking a request index"""
+    # Every reenhance call edits a paragraph no earlier call has seen, whatever its index
+    edits = itertools.count()
+    return {
+        "generate": lambda index: ai_writer.generate_content(f"Write about private AI, take {index}", user_address),
+        "enhance": lambda index: ai_writer.enhance_writing(
+            f"{BENCH_DRAFT}\n\nRevision {index}", ENHANCEMENT_TYPES[index % len(ENHANCEMENT_TYPES)], user_address
+        ),
+        # The same draft with only its last paragraph edited, as in an edit-enhance loop
+        "reenhance": lambda index: ai_writer.enhance_writing(
+            f"{BENCH_DRAFT}\n\nEdit {next(edits)}", "grammar", user_address, incremental=True
+        ),
+        "store": lambda index: confidential_writer.store_draft(f"{BENCH_DRAFT}\n\nDraft {index}", {"title": f"Draft {index}"}),
+        "retrieve": lambda index: retrieve(confidential_writer, index)
+    }
+
+def run(requests: int, concurrency_levels: List[int], operations: List[str],
+        token_rate: float, prompt_rate: float, llm_latency: float, load_time: float,
+        response_tokens: int, lcd_latency: float, use_cache: bool,
+        warm_up: bool = False, ollama_backends: int = 1, ollama_parallel: int = 0,
+        prefix_cache_slots: int = 0) -> Dict[str, Any]:
+    """Run the benchmark matrix and return the machine-readable results"""
+    with contextlib.ExitStack() as stack:
+        ollamas = [
+            stack.enter_context(FakeOllamaServer(token_rate=token_rate, prompt_rate=prompt_rate, latency=llm_latency,
+                                                 load_time=load_time, response_tokens=response_tokens,
+                                                 parallel=ollama_parallel, prefix_cache_slots=prefix_cache_slots))
+            for _ in range(ollama_backends)
+        ]
+        lcd = stack.enter_context(FakeLCDServer(latency=lcd_latency))
+        stack.enter_context(bench_environment([ollama.url for ollama in ollamas], lcd.url, use_cache))
+
+        from secret_ai_writer.ai_core.ai_integration import SecretAIWriter
+        from secret_ai_writer.ai_core.cache import TieredCache
+        from secret_ai_writer.ai_core.chain_clients import close_chain_clients
+        from secret_ai_writer.ai_core.draft_cache import draft_cache_stats
+        from secret_ai_writer.ai_core.metrics import metrics_snapshot, registry
+        from secret_ai_writer.ai_core.secret_ai_client import ConfidentialWriter
+        from secret_ai_writer.ai_core.telemetry import model_stats
+
+        ai_writer = SecretAIWriter(cache=TieredCache() if use_cache else None)
+        confidential_writer = ConfidentialWriter()
+        drivers = build_operations(ai_writer, confidential_writer)
+        if "retrieve" in operations:
+            seed_drafts(confidential_writer, lcd, requests)
+
+        results = []
+        warm_up_result = None
+        try:
+            registry.reset()
+            # Without a warm-up the first LLM request pays the fake model's load time
+            if warm_up:
+                warm_up_result = ai_writer.warm_up()
+            for operation in operations:
+                for concurrency in concurrency_levels:
+                    prompt_eval_before = prompt_eval_seconds(model_stats())
+                    result = measure(drivers[operation], requests, concurrency)
+                    result["prompt_eval_ms_per_request"] = round(
+                        (prompt_eval_seconds(model_stats()) - prompt_eval_before) * 1000 / requests, 3
+                    )
+                    results.append({"operation": operation, "concurrency": concurrency, **result})
+                    print(f"{operation:>8} c={concurrency:<3} {result['throughput_rps']:>9} req/s  "
+                          f"p50={result['latency'].get('p50')} p95={result['latency'].get('p95')} "
+                          f"p99={result['latency'].get('p99')} prompt_eval={result['prompt_eval_ms_per_request']}ms "
+                          f"errors={result['errors']}", file=sys.stderr)
+        finally:
+            ai_writer.close()
+            close_chain_clients()
+
+        return {
+            "timestamp": int(time.time()),
+            "config": {
+                "requests": requests,
+                "concurrency": concurrency_levels,
+                "token_rate": token_rate,
+                "prompt_rate": prompt_rate,
+                "llm_latency": llm_latency,
+                "load_time": load_time,
+                "response_tokens": response_tokens,
+                "lcd_latency": lcd_latency,
+                "cache": use_cache,
+                "warm_up": warm_up,
+                "ollama_backends": ollama_backends,
+                "ollama_parallel": ollama_parallel,
+                "prefix_cache_slots": prefix_cache_slots
+            },
+            "warm_up": warm_up_result,
+            "results": results,
+            "stages": metrics_snapshot(),
+            "models": model_stats(),
+            "draft_caches": draft_cache_stats(),
+            "backends": ai_writer.backend_pool.stats() if ai_writer.backend_pool is not None else {},
+            "single_flight": ai_writer.single_flight.stats() if ai_writer.single_flight is not None else {},
+            "fake_servers": {"ollama_requests": [ollama.requests for ollama in ollamas], "lcd_requests": lcd.requests}
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline Secret AI Writer benchmarks")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per operation and concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="Comma-separated operations to run")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Fake Ollama generated tokens per second")
+    parser.add_argument("--prompt-rate", type=float, default=2000.0, help="Fake Ollama prompt tokens per second")
+    parser.add_argument("--llm-latency", type=float, default=0.01, help="Fake Ollama fixed latency in seconds")
+    parser.add_argument("--load-time", type=float, default=0.0, help="Fake Ollama cold model load time in seconds")
+    parser.add_argument("--response-tokens", type=int, default=32, help="Tokens per fake Ollama response")
+    parser.add_argument("--lcd-latency", type=float, default=0.005, help="Fake LCD latency per request in seconds")
+    parser.add_argument("--cache", action="store_true", help="Give the writer an in-memory result cache and cache decrypted drafts")
+    parser.add_argument("--ollama-backends", type=int, default=1,
+                        help="Fake Ollama servers behind the writer's backend pool")
+    parser.add_argument("--ollama-parallel", type=int, default=0,
+                        help="Requests each fake Ollama server runs at once, 0 for unlimited")
+    parser.add_argument("--prefix-cache-slots", type=int, default=4,
+                        help="Prompts whose evaluated prefix each fake Ollama model keeps, 0 to disable")
+    parser.add_argument("--warm-up", action="store_true", help="Load the model before measuring")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    operations = [op for op in args.operations.split(",") if op]
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"Unknown operations: {', '.join(sorted(unknown))}")
+
+    # The writers log every request, and every dev-mode fallback, which would swamp the results
+    logging.basicConfig(level=logging.ERROR)
+
+    results = run(
+        requests=args.requests,
+        concurrency_levels=[int(level) for level in args.concurrency.split(",")],
+        operations=operations,
+        token_rate=args.token_rate,
+        prompt_rate=args.prompt_rate,
+        llm_latency=args.llm_latency,
+        load_time=args.load_time,
+        response_tokens=args.response_tokens,
+        lcd_latency=args.lcd_latency,
+        use_cache=args.cache,
+        warm_up=args.warm_up,
+        ollama_backends=args.ollama_backends,
+        ollama_parallel=args.ollama_parallel,
+        prefix_cache_slots=args.prefix_cache_slots
+    )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,69 @@
 # secret_ai_writer/ai_core/ai_integration.py
 import os
 import json
+import asyncio
+import contextlib
+import functools
 import logging
+import threading
 import time
-from typing import Dict, List, Optional, Any
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 from decouple import config
-from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langchain_core.output_parsers import StrOutputParser
-from .confidential_chain import PrivateMetadata
+from .cache import LRUCache, TieredCache
+from .cache_keys import CacheKeyPolicy, generation_cache_key, paragraph_cache_key, split_result
+from .usage_queue import UsageStatsQueue
+from .chunking import estimate_tokens, split_into_chunks, split_paragraphs
+from .telemetry import generation_telemetry, get_model_stats, is_cold_start
+from .metrics import stage_timer
+from .model_router import ModelRouter, Route
+from .ollama_pool import OllamaBackendPool, PooledChatModel
+from .single_flight import SingleFlight
+from .prompt_templates import enhancement_template
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SYSTEM_INSTRUCTION = """You are a helpful AI writing assistant. 
+                Provide creative, well-structured content while maintaining the user's privacy.
+                Focus on clarity, engagement, and proper grammar.
+                Be concise and aim to respond in 300-500 words unless specifically asked for more."""
+
+def keep_alive_setting(value: str) -> Union[int, str]:
+    """Convert an OLLAMA_KEEP_ALIVE value to what Ollama expects: seconds (-1 for ever) or a duration string"""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
 class SecretAIWriter:
-    def __init__(self):
-        """Initialize the Secret AI Writer with AI service and blockchain integration"""
+    def __init__(self, cache: Optional[TieredCache] = None,
+                 cache_policy: Optional[CacheKeyPolicy] = None,
+                 write_behind: Optional[bool] = None):
+        """Initialize the Secret AI Writer with AI service and blockchain integration
+        
+        Args:
+            cache: Optional TieredCache for generated results and enhanced paragraphs
+            cache_policy: Optional CacheKeyPolicy deciding whether users share
+                cached results (defaults to the CACHE_* settings)
+            write_behind: Queue usage-stats writes in the background (defaults to
+                USAGE_STATS_WRITE_BEHIND); only useful in a long-lived process
+        """
+        self.cache = cache
+        self.cache_policy = cache_policy
+        self._llm_semaphores = weakref.WeakKeyDictionary()
+        self._ollama_clients = {}
+        self.router = None
+        self.backend_pool = None
+        self.single_flight = None
+        self.paragraph_cache = None
         try:
             # Try to set up Ollama
             self.ollama_base_url = config("OLLAMA_BASE_URL", default="http://localhost:11434")
             
+            # Spread requests over several Ollama servers when OLLAMA_BASE_URLS lists more than one
+            self.backend_pool = OllamaBackendPool.from_config()
+            
             # Use a smaller, faster model
             self.ollama_model = config("OLLAMA_MODEL", default="mistral:7b-instruct")
             
@@ -28,122 +73,1307 @@ class SecretAIWriter:
             # Get max tokens setting
             self.max_tokens = config("MAX_TOKENS", default="1024", cast=int)  # Limit response length for faster generation
             
-            # Initialize Ollama with optimized settings
-            self.llm = ChatOllama(
-                base_url=self.ollama_base_url,
-                model=self.ollama_model,
-                temperature=self.temperature,
-                timeout=120,  # 2 minute timeout
-                max_tokens=self.max_tokens
+            # Keep the model resident between requests so they do not pay Ollama's load time
+            self.keep_alive = keep_alive_setting(config("OLLAMA_KEEP_ALIVE", default="30m"))
+            
+            # Cap in-flight LLM calls from the async API so one process cannot oversubscribe Ollama
+            self.max_concurrent_llm_calls = config("LLM_MAX_CONCURRENCY", default="4", cast=int)
+            
+            # Identical requests arriving while one is being generated share its LLM call
+            if config("SINGLE_FLIGHT", default="True").lower() == "true":
+                self.single_flight = SingleFlight()
+            
+            # Drafts longer than this many tokens are enhanced in parallel chunks
+            self.chunk_tokens = config("ENHANCE_CHUNK_TOKENS", default="1500", cast=int)
+            self.chunk_overlap_tokens = config("ENHANCE_CHUNK_OVERLAP_TOKENS", default="100", cast=int)
+            self.chunk_workers = config("ENHANCE_CHUNK_WORKERS", default=str(self.max_concurrent_llm_calls), cast=int)
+            
+            # Enhanced paragraphs are kept so re-enhancing an edited draft only sends the changed ones.
+            # They go in the result cache when there is one: its disk tier outlives the process, which
+            # the bridge's argv mode (one process per request) needs for any paragraph to be reused
+            self.incremental_enhance = config("ENHANCE_INCREMENTAL", default="False").lower() == "true"
+            self.paragraph_cache = cache if cache is not None else LRUCache(
+                max_entries=config("ENHANCE_PARAGRAPH_CACHE_ENTRIES", default="4096", cast=int),
+                ttl=config("ENHANCE_PARAGRAPH_CACHE_TTL", default="86400", cast=float) or None
             )
             
+            # Heavy client libraries load only when a writer is actually built
+            from .confidential_chain import PrivateMetadata
+            
+            # Initialize Ollama with optimized settings
+            self.llm = self._build_llm(self.ollama_model)
+            
+            # Route requests across models when a small or per-type model is configured
+            self.router = ModelRouter.from_config(self.ollama_model, self.llm, self._build_llm)
+            
             # Initialize blockchain connection
             self.metadata_handler = PrivateMetadata()
             
+            # Store usage stats from a background queue so responses do not wait on the chain
+            self.usage_queue = None
+            if write_behind is None:
+                write_behind = config("USAGE_STATS_WRITE_BEHIND", default="True").lower() == "true"
+            if write_behind:
+                self.usage_queue = UsageStatsQueue(self.metadata_handler)
+            
+            # Optionally load the model in the background so the first request finds it warm
+            if config("OLLAMA_WARM_UP", default="False").lower() == "true":
+                threading.Thread(target=self.warm_up, name="ollama-warm-up", daemon=True).start()
+            
             logger.info(f"SecretAIWriter initialized successfully with Ollama model: {self.ollama_model}")
             
         except Exception as e:
             logger.error(f"Failed to initialize SecretAIWriter: {str(e)}")
             raise
     
+    def _build_llm(self, model: str) -> Any:
+        """Build the chat model for an Ollama model with the writer's generation settings
+        
+        With a backend pool, the model is built once per backend and each call
+        goes to the least loaded one.
+        """
+        if self.backend_pool is not None:
+            return PooledChatModel(
+                self.backend_pool, {url: self._chat_ollama(url, model) for url in self.backend_pool.urls}
+            )
+        return self._chat_ollama(self.ollama_base_url, model)
+    
+    def _chat_ollama(self, base_url: str, model: str) -> Any:
+        from langchain_ollama import ChatOllama
+        
+        return ChatOllama(
+            base_url=base_url,
+            model=model,
+            temperature=self.temperature,
+            timeout=120,  # 2 minute timeout
+            max_tokens=self.max_tokens,
+            keep_alive=self.keep_alive
+        )
+    
+    def generation_params(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Return every generation setting that affects the model's output
+        
+        Args:
+            model: Model the request is routed to (defaults to OLLAMA_MODEL)
+        """
+        return {
+            "model": model or self.ollama_model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+    
+    def _build_messages(self, prompt: str, system_instruction: Optional[str] = None) -> List[Any]:
+        """Build the chat messages for a prompt, applying the default system instruction"""
+        from langchain_core.messages import HumanMessage, SystemMessage
+        
+        # Default system instruction if none provided
+        if not system_instruction:
+            system_instruction = DEFAULT_SYSTEM_INSTRUCTION
+        
+        return [
+            SystemMessage(content=system_instruction),
+            HumanMessage(content=prompt)
+        ]
+    
+    def _build_enhancement(self, draft_text: str, enhancement_type: str,
+                           context: str = "") -> Tuple[str, str]:
+        """Build the (prompt, system_instruction) pair for an enhancement request
+        
+        Templates are compiled once per type and keep the draft after the fixed
+        instruction, so Ollama can reuse the evaluated prefix across requests.
+        
+        Args:
+            draft_text: Text to improve
+            enhancement_type: Type of enhancement
+            context: Optional preceding text shown to the model for continuity only
+        """
+        return enhancement_template(enhancement_type).render(draft_text, context)
+    
+    def _route(self, prompt: str, task: Optional[str] = None) -> Route:
+        """Pick the model for a request; without a router every request goes to OLLAMA_MODEL"""
+        if self.router is None:
+            return Route(self.ollama_model, self.llm, self.ollama_model, "default")
+        return self.router.route(prompt, task)
+    
+    def _llm_slot(self, route: Route):
+        """Context manager counting the request as in flight on its routed model"""
+        if self.router is None:
+            return contextlib.nullcontext()
+        return self.router.slot(route.model)
+    
+    def _cache_key(self, prompt: str, system_instruction: Optional[str],
+                   user_address: str, tenant: Optional[str],
+                   route: Optional[Route] = None) -> Optional[str]:
+        """Return the cache key for a generation, or None when caching is off
+        
+        Keys use the model the routing rules chose, not an SLO fallback, so a
+        degraded answer is never stored under the preferred model's key.
+        """
+        if self.cache is None or (route is not None and route.fallback):
+            return None
+        return self._generation_key(prompt, system_instruction, user_address, tenant,
+                                    route.preferred if route is not None else None)
+    
+    def _flight_key(self, prompt: str, system_instruction: Optional[str],
+                    user_address: str, tenant: Optional[str], route: Route) -> Optional[str]:
+        """Return the key identical in-flight generations are coalesced under, or None when off
+        
+        Built like the cache key, so requests are only coalesced within the same
+        cache scope, but for the model actually serving the request.
+        """
+        if self.single_flight is None:
+            return None
+        return self._generation_key(prompt, system_instruction, user_address, tenant, route.model)
+    
+    def _generation_key(self, prompt: str, system_instruction: Optional[str],
+                        user_address: str, tenant: Optional[str], model: Optional[str]) -> str:
+        return generation_cache_key(
+            prompt,
+            system_instruction or DEFAULT_SYSTEM_INSTRUCTION,
+            self.generation_params(model),
+            self._cache_scope(user_address, tenant)
+        )
+    
+    def _cache_scope(self, user_address: str, tenant: Optional[str]) -> str:
+        """Return the scope cached entries for this user live in"""
+        if self.cache_policy is None:
+            self.cache_policy = CacheKeyPolicy()
+        return self.cache_policy.scope(user_address, tenant)
+    
+    def _mark_coalesced(self, result: Dict[str, Any], start_time: float) -> None:
+        """Give a result shared from another request's LLM call its own timing"""
+        logger.info("Coalesced with an identical in-flight generation")
+        result["metadata"].update({
+            "timestamp": int(time.time()),
+            "processing_time": round(time.time() - start_time, 2),
+            "coalesced": True
+        })
+    
+    def _lookup_cache(self, cache_key: Optional[str], start_time: float) -> Optional[Dict[str, Any]]:
+        """Return a cached result with fresh timestamp and timing, if cached"""
+        if cache_key is None:
+            return None
+        
+        with stage_timer("writer.cache_get"):
+            cached_result = self.cache.get(cache_key)
+        if cached_result is None:
+            return None
+        
+        logger.info("Cache hit for generated content")
+        cached_result["metadata"].update({
+            "timestamp": int(time.time()),
+            "processing_time": round(time.time() - start_time, 2),
+            "cache_hit": True
+        })
+        return cached_result
+    
+    def _cached_result(self, cache_key: Optional[str], user_address: str,
+                       start_time: float) -> Optional[Dict[str, Any]]:
+        """Return a cached result with fresh per-request metadata, if cached"""
+        cached_result = self._lookup_cache(cache_key, start_time)
+        if cached_result is not None:
+            self._store_metadata(user_address, cached_result["metadata"])
+        return cached_result
+    
+    def _cache_result(self, cache_key: Optional[str], result: Dict[str, Any]) -> None:
+        """Cache a result without its per-request metadata"""
+        if cache_key is None:
+            return
+        cacheable, _ = split_result(result)
+        with stage_timer("writer.cache_set"):
+            self.cache.set(cache_key, cacheable)
+    
+    def _build_metadata(self, prompt: str, generated_content: str, start_time: float,
+                        response_metadata: Optional[Dict[str, Any]] = None,
+                        route: Optional[Route] = None) -> Dict[str, Any]:
+        """Build the usage metadata for a completed generation
+        
+        Args:
+            prompt: Prompt sent to the model
+            generated_content: Text the model returned
+            start_time: When the request started
+            response_metadata: Ollama statistics from the model's response. When
+                given, the call is also recorded in the per-model running stats.
+            route: Route the request took; metadata names the model that served it
+        """
+        # Calculate metadata
+        end_time = time.time()
+        
+        metadata = {
+            "timestamp": int(time.time()),
+            "prompt_length": len(prompt),
+            "response_length": len(generated_content),
+            "processing_time": round(end_time - start_time, 2),
+            "model": route.model if route is not None else self.ollama_model,
+            "content_type": "text"
+        }
+        if route is not None and self.router is not None:
+            metadata["route"] = route.reason
+        metadata.update(generation_telemetry(response_metadata, prompt, generated_content))
+        
+        if response_metadata is not None:
+            get_model_stats(metadata["model"]).record(metadata)
+        return metadata
+    
+    def _llm_limiter(self) -> asyncio.Semaphore:
+        """Return the semaphore bounding concurrent async LLM calls on the running loop
+        
+        An asyncio.Semaphore binds to the first loop that waits on it, so each
+        event loop gets its own; they are dropped with their loop.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._llm_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._llm_semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrent_llm_calls))
+        return semaphore
+    
+    def _store_metadata(self, user_address: str, metadata: Dict[str, Any]) -> None:
+        """Store metadata on Secret Network and record the tx hash in it
+        
+        With the write-behind queue enabled the write is only queued: tx_hash
+        stays None and tx_handle can be resolved later with usage_tx_status.
+        """
+        if self.usage_queue is not None:
+            with stage_timer("writer.usage_queue"):
+                metadata["tx_handle"] = self.usage_queue.submit(user_address, metadata)
+            metadata["tx_status"] = "pending"
+            metadata["tx_hash"] = None
+            return
+        
+        # Store metadata on Secret Network (privacy-preserving)
+        try:
+            with stage_timer("writer.usage_stats"):
+                tx_result = self.metadata_handler.store_usage_stats(
+                    user_address=user_address,
+                    metadata=metadata
+                )
+            metadata["tx_hash"] = tx_result.txhash
+        except Exception as meta_err:
+            logger.warning(f"Failed to store metadata, but content generation succeeded: {str(meta_err)}")
+            metadata["tx_hash"] = None
+    
+    def usage_tx_status(self, handle: str) -> Dict[str, Any]:
+        """Resolve a tx_handle from response metadata to its transaction status
+        
+        Args:
+            handle: The tx_handle returned in generation metadata
+            
+        Returns:
+            Dictionary with status (pending, stored, failed, dropped or unknown) and tx_hash
+        """
+        if self.usage_queue is None:
+            return {"handle": handle, "status": "unknown", "tx_hash": None}
+        return self.usage_queue.status(handle)
+    
+    def close(self) -> None:
+        """Flush pending usage-stats writes and batches before shutdown"""
+        if self.usage_queue is not None:
+            self.usage_queue.close()
+        if self.backend_pool is not None:
+            self.backend_pool.close()
+        self.metadata_handler.close()
+    
+    def warm_up(self) -> Dict[str, Any]:
+        """Load the models into Ollama ahead of requests and refresh their keep-alive
+        
+        Sends Ollama a generate request with no prompt, which loads the model
+        without generating anything. Calling it again while the model is loaded
+        only restarts the keep-alive timer, so it also serves as a keep-warm ping.
+        Every model the router can choose is warmed, and with a backend pool
+        every backend, all in parallel.
+        
+        Returns:
+            Dictionary with the model, load_duration, whether the model was cold
+            and the elapsed time, or an "error" key if Ollama could not be reached.
+            With a backend pool, "backends" holds the result for each URL. With a
+            router, "models" holds the result for each model and the top-level
+            fields summarize them.
+        """
+        models = list(self.router.llms) if self.router is not None else [self.ollama_model]
+        if len(models) == 1:
+            return self._warm_up_model(models[0])
+        
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=len(models)) as pool:
+            results = dict(zip(models, pool.map(self._warm_up_model, models)))
+        return self._warm_up_summary(self.ollama_model, results, start_time, "models")
+    
+    def _warm_up_model(self, model: str) -> Dict[str, Any]:
+        """Warm one model up on the Ollama server, or on every backend of the pool"""
+        if self.backend_pool is None:
+            return self._warm_up_backend(self.ollama_base_url, model)
+        
+        start_time = time.time()
+        urls = self.backend_pool.urls
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            results = dict(zip(urls, pool.map(lambda url: self._warm_up_backend(url, model), urls)))
+        return self._warm_up_summary(model, results, start_time, "backends")
+    
+    @staticmethod
+    def _warm_up_summary(model: str, results: Dict[str, Dict[str, Any]], start_time: float,
+                         key: str) -> Dict[str, Any]:
+        warmed = [result for result in results.values() if "error" not in result]
+        return {
+            "model": model,
+            "load_duration": max((result["load_duration"] for result in warmed), default=None),
+            "cold_start": any(result["cold_start"] for result in warmed),
+            "elapsed": round(time.time() - start_time, 3),
+            key: results
+        }
+    
+    def _warm_up_backend(self, base_url: str, model: str) -> Dict[str, Any]:
+        """Warm a model up on one Ollama server"""
+        start_time = time.time()
+        try:
+            client = self._ollama_clients.get(base_url)
+            if client is None:
+                from ollama import Client
+                client = self._ollama_clients[base_url] = Client(
+                    host=base_url,
+                    timeout=config("OLLAMA_WARM_UP_TIMEOUT", default="300", cast=float)
+                )
+            
+            with stage_timer("writer.warm_up"):
+                response = client.generate(model=model, prompt="", keep_alive=self.keep_alive)
+            
+            load_duration = round((response.get("load_duration") or 0) / 1e9, 3)
+            result = {
+                "model": model,
+                "load_duration": load_duration,
+                "cold_start": is_cold_start(load_duration),
+                "elapsed": round(time.time() - start_time, 3)
+            }
+            logger.info(f"Warmed up {model} at {base_url} in {result['elapsed']}s (load {load_duration}s)")
+            return result
+            
+        except Exception as e:
+            logger.warning(f"Failed to warm up {model} at {base_url}: {str(e)}")
+            return {"model": model, "error": str(e)}
+    
     def generate_content(self, prompt: str, user_address: str, 
-                        system_instruction: Optional[str] = None) -> Dict[str, Any]:
+                        system_instruction: Optional[str] = None,
+                        tenant: Optional[str] = None,
+                        task: Optional[str] = None) -> Dict[str, Any]:
         """Generate AI content and store metadata on Secret Network
         
         Args:
             prompt: User's writing prompt
             user_address: Secret Network address for the user
             system_instruction: Optional custom system prompt
+            tenant: Optional tenant id used to scope shared cache entries
+            task: Enhancement type the prompt was built for, used to route it to a model
+            
+        Returns:
+            Dictionary with generated content and metadata
+        """
+        try:
+            result = self._generate(prompt, system_instruction, user_address, tenant, task)
+            
+            self._store_metadata(user_address, result["metadata"])
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Content generation failed: {str(e)}")
+            raise
+    
+    def _generate(self, prompt: str, system_instruction: Optional[str], user_address: str,
+                  tenant: Optional[str], task: Optional[str]) -> Dict[str, Any]:
+        """Generate content through the cache and single flight, without storing metadata"""
+        start_time = time.time()
+        
+        route = self._route(prompt, task)
+        
+        # Serve repeated requests from the cache when one is configured
+        cache_key = self._cache_key(prompt, system_instruction, user_address, tenant, route)
+        cached_result = self._lookup_cache(cache_key, start_time)
+        if cached_result is not None:
+            return cached_result
+        
+        # Identical requests already in flight share that LLM call instead of starting their own
+        flight_key = self._flight_key(prompt, system_instruction, user_address, tenant, route)
+        generate = functools.partial(self._generate_uncached, prompt, system_instruction, route, start_time, cache_key)
+        if flight_key is None:
+            return generate()
+        result, coalesced = self.single_flight.do(flight_key, generate)
+        if coalesced:
+            self._mark_coalesced(result, start_time)
+        return result
+    
+    def _generate_uncached(self, prompt: str, system_instruction: Optional[str], route: Route,
+                           start_time: float, cache_key: Optional[str]) -> Dict[str, Any]:
+        """Run the LLM call for generate_content and cache its result"""
+        # Create messages for the LLM
+        messages = self._build_messages(prompt, system_instruction)
+        
+        # Generate content
+        with self._llm_slot(route), stage_timer("writer.llm"):
+            response = route.llm.invoke(messages)
+        generated_content = response.content
+        
+        # Create metadata object
+        metadata = self._build_metadata(prompt, generated_content, start_time, response.response_metadata, route)
+        
+        result = {
+            "content": generated_content,
+            "metadata": metadata
+        }
+        self._cache_result(cache_key, result)
+        
+        return result
+    
+    async def agenerate_content(self, prompt: str, user_address: str,
+                                system_instruction: Optional[str] = None,
+                                tenant: Optional[str] = None,
+                                task: Optional[str] = None) -> Dict[str, Any]:
+        """Async version of generate_content
+        
+        The LLM call uses ChatOllama.ainvoke and is bounded by LLM_MAX_CONCURRENCY;
+        cache and Secret Network calls run on the default executor.
+        
+        Args:
+            prompt: User's writing prompt
+            user_address: Secret Network address for the user
+            system_instruction: Optional custom system prompt
+            tenant: Optional tenant id used to scope shared cache entries
+            task: Enhancement type the prompt was built for, used to route it to a model
             
         Returns:
             Dictionary with generated content and metadata
         """
         try:
             start_time = time.time()
+            loop = asyncio.get_running_loop()
             
-            # Default system instruction if none provided
-            if not system_instruction:
-                system_instruction = """You are a helpful AI writing assistant. 
-                Provide creative, well-structured content while maintaining the user's privacy.
-                Focus on clarity, engagement, and proper grammar.
-                Be concise and aim to respond in 300-500 words unless specifically asked for more."""
+            route = self._route(prompt, task)
+            
+            # Serve repeated requests from the cache when one is configured
+            cache_key = self._cache_key(prompt, system_instruction, user_address, tenant, route)
+            if cache_key is not None:
+                cached_result = await loop.run_in_executor(
+                    None, self._cached_result, cache_key, user_address, start_time
+                )
+                if cached_result is not None:
+                    return cached_result
+            
+            # Identical requests already in flight share that LLM call instead of starting their own
+            flight_key = self._flight_key(prompt, system_instruction, user_address, tenant, route)
+            generate = functools.partial(self._agenerate_uncached, prompt, system_instruction, route, start_time, cache_key)
+            if flight_key is None:
+                result = await generate()
+            else:
+                result, coalesced = await self.single_flight.ado(flight_key, generate)
+                if coalesced:
+                    self._mark_coalesced(result, start_time)
+            
+            await loop.run_in_executor(None, self._store_metadata, user_address, result["metadata"])
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Async content generation failed: {str(e)}")
+            raise
+    
+    async def _agenerate_uncached(self, prompt: str, system_instruction: Optional[str], route: Route,
+                                  start_time: float, cache_key: Optional[str]) -> Dict[str, Any]:
+        """Async version of _generate_uncached"""
+        # Create messages for the LLM
+        messages = self._build_messages(prompt, system_instruction)
+        
+        # Generate content
+        async with self._llm_limiter():
+            with self._llm_slot(route), stage_timer("writer.llm"):
+                response = await route.llm.ainvoke(messages)
+        generated_content = response.content
+        
+        # Create metadata object
+        metadata = self._build_metadata(prompt, generated_content, start_time, response.response_metadata, route)
+        
+        result = {
+            "content": generated_content,
+            "metadata": metadata
+        }
+        if cache_key is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._cache_result, cache_key, result)
+        
+        return result
+    
+    def generate_content_stream(self, prompt: str, user_address: str,
+                                system_instruction: Optional[str] = None,
+                                tenant: Optional[str] = None,
+                                task: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream AI content as it is generated, then store metadata on Secret Network
+        
+        Args:
+            prompt: User's writing prompt
+            user_address: Secret Network address for the user
+            system_instruction: Optional custom system prompt
+            tenant: Optional tenant id used to scope shared cache entries
+            task: Enhancement type the prompt was built for, used to route it to a model
+            
+        Yields:
+            {"type": "token", "content": ...} for each chunk as it arrives, then a
+            final {"type": "done", "content": ..., "metadata": ...} record.
+            A cached result is replayed as the final record alone.
+        """
+        try:
+            start_time = time.time()
+            
+            route = self._route(prompt, task)
+            
+            cache_key = self._cache_key(prompt, system_instruction, user_address, tenant, route)
+            cached_result = self._cached_result(cache_key, user_address, start_time)
+            if cached_result is not None:
+                yield {"type": "done", **cached_result}
+                return
+            
+            first_token_time = None
+            chunks = []
+            response_metadata = {}
             
             # Create messages for the LLM
-            messages = [
-                SystemMessage(content=system_instruction),
-                HumanMessage(content=prompt)
-            ]
+            messages = self._build_messages(prompt, system_instruction)
             
-            # Generate content
-            response = self.llm.invoke(messages)
-            generated_content = response.content
+            # Stream content
+            with self._llm_slot(route), stage_timer("writer.llm_stream"):
+                for chunk in route.llm.stream(messages):
+                    # Ollama attaches its token counts and durations to the final chunk
+                    response_metadata.update(chunk.response_metadata)
+                    if not chunk.content:
+                        continue
+                    if first_token_time is None:
+                        first_token_time = time.time()
+                    chunks.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
             
-            # Calculate metadata
+            generated_content = "".join(chunks)
             end_time = time.time()
-            token_estimate = len(prompt.split()) + len(generated_content.split())
-            
-            # Create metadata object
-            metadata = {
-                "timestamp": int(time.time()),
-                "prompt_length": len(prompt),
-                "response_length": len(generated_content),
-                "processing_time": round(end_time - start_time, 2),
-                "estimated_tokens": token_estimate,
-                "model": config("OLLAMA_MODEL", default="mistral:7b-instruct"),
-                "content_type": "text"
-            }
             
-            # Store metadata on Secret Network (privacy-preserving)
-            try:
-                tx_result = self.metadata_handler.store_usage_stats(
-                    user_address=user_address,
-                    metadata=metadata
-                )
-                metadata["tx_hash"] = tx_result.txhash
-            except Exception as meta_err:
-                logger.warning(f"Failed to store metadata, but content generation succeeded: {str(meta_err)}")
-                metadata["tx_hash"] = None
-            
-            return {
-                "content": generated_content,
-                "metadata": metadata
-            }
+            # Without Ollama's eval stats, tokens/sec is measured over the decode phase
+            decode_time = end_time - (first_token_time or end_time)
+            
+            # Create metadata object; time to first token is what the client actually saw
+            metadata = self._build_metadata(prompt, generated_content, start_time, response_metadata, route)
+            metadata["streamed"] = True
+            metadata["time_to_first_token"] = round(first_token_time - start_time, 3) if first_token_time else None
+            if metadata.get("tokens_per_second") is None:
+                metadata["tokens_per_second"] = round(len(chunks) / decode_time, 2) if decode_time > 0 else None
+            
+            self._store_metadata(user_address, metadata)
+            
+            result = {"content": generated_content, "metadata": metadata}
+            self._cache_result(cache_key, result)
+            
+            yield {"type": "done", **result}
             
         except Exception as e:
-            logger.error(f"Content generation failed: {str(e)}")
+            logger.error(f"Streaming content generation failed: {str(e)}")
             raise
     
     def enhance_writing(self, draft_text: str, enhancement_type: str, 
-                       user_address: str) -> Dict[str, Any]:
+                       user_address: str, tenant: Optional[str] = None,
+                       incremental: Optional[bool] = None) -> Dict[str, Any]:
         """Enhance existing writing with specific improvements
         
         Args:
             draft_text: Existing text to improve
             enhancement_type: Type of enhancement (grammar, creativity, conciseness, etc.)
             user_address: Secret Network address
+            tenant: Optional tenant id used to scope shared cache entries
+            incremental: Enhance paragraph by paragraph, reusing paragraphs enhanced
+                before (defaults to ENHANCE_INCREMENTAL)
             
         Returns:
             Enhanced content and metadata
         """
-        enhancement_prompts = {
-            "grammar": "Improve the grammar and correct any errors in this text while preserving meaning:",
-            "creativity": "Make this text more creative and engaging while preserving key points:",
-            "conciseness": "Make this text more concise without losing important information:",
-            "professional": "Make this text more professional and formal:",
-            "casual": "Make this text more casual and conversational:"
+        if self._incremental(incremental):
+            return self.enhance_writing_incremental(draft_text, enhancement_type, user_address, tenant=tenant)
+        
+        # Long drafts would overflow the model's context window in one prompt
+        if estimate_tokens(draft_text) > self.chunk_tokens:
+            return self.enhance_writing_chunked(draft_text, enhancement_type, user_address, tenant=tenant)
+        
+        prompt, system_instruction = self._build_enhancement(draft_text, enhancement_type)
+        
+        return self.generate_content(
+            prompt=prompt,
+            user_address=user_address,
+            system_instruction=system_instruction,
+            tenant=tenant,
+            task=enhancement_type
+        )
+    
+    def _incremental(self, incremental: Optional[bool]) -> bool:
+        """Resolve a request's incremental flag against the ENHANCE_INCREMENTAL default"""
+        return self.incremental_enhance if incremental is None else bool(incremental)
+    
+    def _needs_split(self, draft_text: str, incremental: Optional[bool]) -> bool:
+        """Whether a draft is enhanced in chunks or paragraphs rather than as one prompt"""
+        return self._incremental(incremental) or estimate_tokens(draft_text) > self.chunk_tokens
+    
+    def _enhance_chunk(self, index: int, chunk: Dict[str, str], enhancement_type: str,
+                       user_address: str, tenant: Optional[str]) -> Dict[str, Any]:
+        """Enhance one chunk of a long draft and time it, without storing metadata"""
+        start_time = time.time()
+        prompt, system_instruction = self._build_enhancement(chunk["text"], enhancement_type, chunk["context"])
+        
+        route = self._route(prompt, enhancement_type)
+        cache_key = self._cache_key(prompt, system_instruction, user_address, tenant, route)
+        cached_result = self._lookup_cache(cache_key, start_time)
+        if cached_result is not None:
+            content = cached_result["content"]
+            metadata = cached_result["metadata"]
+        else:
+            with self._llm_slot(route), stage_timer("writer.llm"):
+                response = route.llm.invoke(self._build_messages(prompt, system_instruction))
+            content = response.content
+            metadata = self._build_metadata(prompt, content, start_time, response.response_metadata, route)
+            self._cache_result(cache_key, {"content": content, "metadata": metadata})
+        
+        return {
+            "content": content.strip(),
+            "timing": {
+                "index": index,
+                "input_tokens": estimate_tokens(chunk["text"]),
+                "model": metadata.get("model"),
+                "prompt_tokens": metadata.get("prompt_tokens"),
+                "completion_tokens": metadata.get("completion_tokens"),
+                "processing_time": round(time.time() - start_time, 2),
+                "cache_hit": cached_result is not None
+            }
         }
+    
+    def enhance_writing_chunked(self, draft_text: str, enhancement_type: str, user_address: str,
+                                max_chunk_tokens: Optional[int] = None, max_workers: Optional[int] = None,
+                                tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Enhance a long draft by splitting it on paragraph boundaries
+        
+        Chunks are enhanced concurrently, each with the tail of the previous
+        chunk as read-only context, and stitched back together in order.
         
-        prompt = enhancement_prompts.get(
-            enhancement_type, 
-            "Improve this text while maintaining its core meaning:"
+        Args:
+            draft_text: Existing text to improve
+            enhancement_type: Type of enhancement (grammar, creativity, conciseness, etc.)
+            user_address: Secret Network address
+            max_chunk_tokens: Token budget per chunk (defaults to ENHANCE_CHUNK_TOKENS)
+            max_workers: Chunks enhanced in parallel (defaults to ENHANCE_CHUNK_WORKERS)
+            tenant: Optional tenant id used to scope shared cache entries
+            
+        Returns:
+            Enhanced content and metadata, including per-chunk timings
+        """
+        try:
+            result = self._enhance_chunked(draft_text, enhancement_type, user_address,
+                                           max_chunk_tokens, max_workers, tenant)
+            
+            self._store_metadata(user_address, result["metadata"])
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Chunked enhancement failed: {str(e)}")
+            raise
+    
+    def _enhance_chunked(self, draft_text: str, enhancement_type: str, user_address: str,
+                         max_chunk_tokens: Optional[int], max_workers: Optional[int],
+                         tenant: Optional[str]) -> Dict[str, Any]:
+        """Enhance a long draft in chunks, without storing metadata"""
+        start_time = time.time()
+        chunks = split_into_chunks(
+            draft_text, max_chunk_tokens or self.chunk_tokens, self.chunk_overlap_tokens
         )
+        logger.info(f"Enhancing draft in {len(chunks)} chunks")
         
-        system_instruction = f"""You are a writing enhancement specialist focused on {enhancement_type}.
-        Provide the improved version without explaining your changes unless asked.
-        Keep your response concise. Just return the enhanced text."""
+        with ThreadPoolExecutor(max_workers=max_workers or self.chunk_workers) as pool:
+            futures = [
+                pool.submit(self._enhance_chunk, index, chunk, enhancement_type, user_address, tenant)
+                for index, chunk in enumerate(chunks)
+            ]
+            # Results are collected in submission order, so stitching keeps document order
+            enhanced = [future.result() for future in futures]
         
-        return self.generate_content(
-            prompt=f"{prompt}\n\n{draft_text}",
+        return self._chunked_result(draft_text, len(chunks), enhanced, start_time)
+    
+    def _chunked_result(self, draft_text: str, chunk_count: int, enhanced: List[Dict[str, Any]],
+                        start_time: float) -> Dict[str, Any]:
+        """Stitch enhanced chunks, in document order, into a result with per-chunk timings"""
+        generated_content = "\n\n".join(part["content"] for part in enhanced)
+        
+        # Create metadata object
+        timings = [part["timing"] for part in enhanced]
+        prompt_tokens = sum(timing["prompt_tokens"] or 0 for timing in timings)
+        completion_tokens = sum(timing["completion_tokens"] or 0 for timing in timings)
+        
+        # Create metadata object; token counts are the sum over the chunk calls
+        metadata = self._build_metadata(draft_text, generated_content, start_time)
+        models = sorted({timing["model"] for timing in timings if timing["model"]})
+        if len(models) == 1:
+            metadata["model"] = models[0]
+        elif models:
+            metadata["models"] = models
+        metadata.update({
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_tokens": prompt_tokens + completion_tokens,
+            "chunked": True,
+            "chunk_count": chunk_count,
+            "chunks": timings
+        })
+        
+        return {
+            "content": generated_content,
+            "metadata": metadata
+        }
+    
+    def _enhance_paragraph(self, paragraph: str, enhancement_type: str,
+                           user_address: str, tenant: Optional[str]) -> Dict[str, Any]:
+        """Enhance one paragraph, or return it from the paragraph cache"""
+        start_time = time.time()
+        prompt, system_instruction = self._build_enhancement(paragraph, enhancement_type)
+        
+        # As with result cache keys, an SLO fallback's output is not stored under the preferred model
+        route = self._route(prompt, enhancement_type)
+        cache_key = None
+        if not route.fallback:
+            cache_key = paragraph_cache_key(paragraph, enhancement_type, self.generation_params(route.preferred),
+                                            self._cache_scope(user_address, tenant))
+            content = self.paragraph_cache.get(cache_key)
+            if content is not None:
+                return {"content": content, "reused": True, "model": route.model}
+        
+        with self._llm_slot(route), stage_timer("writer.llm"):
+            response = route.llm.invoke(self._build_messages(prompt, system_instruction))
+        content = response.content.strip()
+        metadata = self._build_metadata(prompt, content, start_time, response.response_metadata, route)
+        if cache_key is not None:
+            self.paragraph_cache.set(cache_key, content)
+        
+        return {
+            "content": content,
+            "reused": False,
+            "model": metadata.get("model"),
+            "prompt_tokens": metadata.get("prompt_tokens"),
+            "completion_tokens": metadata.get("completion_tokens")
+        }
+    
+    def enhance_writing_incremental(self, draft_text: str, enhancement_type: str, user_address: str,
+                                    max_workers: Optional[int] = None,
+                                    tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Enhance a draft paragraph by paragraph, only sending changed paragraphs to the model
+        
+        Each paragraph's enhanced text is cached under its hash, the enhancement
+        type and the model, so after an edit only the edited paragraphs cost an
+        LLM call. Paragraphs are enhanced concurrently without surrounding
+        context and joined back together in order.
+        
+        Args:
+            draft_text: Existing text to improve
+            enhancement_type: Type of enhancement (grammar, creativity, conciseness, etc.)
+            user_address: Secret Network address
+            max_workers: Paragraphs enhanced in parallel (defaults to ENHANCE_CHUNK_WORKERS)
+            tenant: Optional tenant id used to scope shared cache entries
+            
+        Returns:
+            Enhanced content and metadata, including how many paragraphs were reused
+        """
+        try:
+            result = self._enhance_incremental(draft_text, enhancement_type, user_address, max_workers, tenant)
+            
+            self._store_metadata(user_address, result["metadata"])
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Incremental enhancement failed: {str(e)}")
+            raise
+    
+    def _enhance_incremental(self, draft_text: str, enhancement_type: str, user_address: str,
+                             max_workers: Optional[int], tenant: Optional[str]) -> Dict[str, Any]:
+        """Enhance a draft paragraph by paragraph, without storing metadata"""
+        start_time = time.time()
+        paragraphs = split_paragraphs(draft_text)
+        # A paragraph repeated within the draft is enhanced once
+        unique = list(dict.fromkeys(paragraphs))
+        
+        with ThreadPoolExecutor(max_workers=max_workers or self.chunk_workers) as pool:
+            enhanced = dict(zip(unique, pool.map(
+                lambda paragraph: self._enhance_paragraph(paragraph, enhancement_type, user_address, tenant),
+                unique
+            )))
+        
+        return self._incremental_result(draft_text, paragraphs, enhanced, start_time)
+    
+    def _incremental_result(self, draft_text: str, paragraphs: List[str], enhanced: Dict[str, Dict[str, Any]],
+                            start_time: float) -> Dict[str, Any]:
+        """Join enhanced paragraphs, keyed by their source text, into a result with reuse counts"""
+        generated_content = "\n\n".join(enhanced[paragraph]["content"] for paragraph in paragraphs)
+        
+        # Create metadata object; token counts are the sum over the LLM calls made
+        calls = [part for part in enhanced.values() if not part["reused"]]
+        prompt_tokens = sum(part["prompt_tokens"] or 0 for part in calls)
+        completion_tokens = sum(part["completion_tokens"] or 0 for part in calls)
+        metadata = self._build_metadata(draft_text, generated_content, start_time)
+        models = sorted({part["model"] for part in enhanced.values() if part["model"]})
+        if len(models) == 1:
+            metadata["model"] = models[0]
+        elif models:
+            metadata["models"] = models
+        metadata.update({
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_tokens": prompt_tokens + completion_tokens,
+            "incremental": True,
+            "paragraph_count": len(paragraphs),
+            "paragraphs_enhanced": len(calls),
+            "paragraphs_reused": len(paragraphs) - len(calls)
+        })
+        logger.info(f"Incremental enhancement reused {metadata['paragraphs_reused']} of {len(paragraphs)} paragraphs")
+        
+        return {
+            "content": generated_content,
+            "metadata": metadata
+        }
+    
+    def enhance_writing_stream(self, draft_text: str, enhancement_type: str,
+                               user_address: str, tenant: Optional[str] = None,
+                               incremental: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+        """Stream an enhanced version of existing writing
+        
+        Args:
+            draft_text: Existing text to improve
+            enhancement_type: Type of enhancement (grammar, creativity, conciseness, etc.)
+            user_address: Secret Network address
+            tenant: Optional tenant id used to scope shared cache entries
+            incremental: Enhance paragraph by paragraph (defaults to ENHANCE_INCREMENTAL)
+            
+        Yields:
+            Token records followed by a final record, as in generate_content_stream.
+            Long drafts and incremental enhancements are assembled from several
+            LLM calls and arrive as the final record alone.
+        """
+        if self._needs_split(draft_text, incremental):
+            yield {"type": "done", **self.enhance_writing(draft_text, enhancement_type, user_address,
+                                                          tenant=tenant, incremental=incremental)}
+            return
+        
+        prompt, system_instruction = self._build_enhancement(draft_text, enhancement_type)
+        
+        yield from self.generate_content_stream(
+            prompt=prompt,
             user_address=user_address,
-            system_instruction=system_instruction
-        )
\ No newline at end of file
+            system_instruction=system_instruction,
+            tenant=tenant,
+            task=enhancement_type
+        )
+    
+    async def aenhance_writing(self, draft_text: str, enhancement_type: str,
+                               user_address: str, tenant: Optional[str] = None,
+                               incremental: Optional[bool] = None) -> Dict[str, Any]:
+        """Async version of enhance_writing
+        
+        Args:
+            draft_text: Existing text to improve
+            enhancement_type: Type of enhancement (grammar, creativity, conciseness, etc.)
+            user_address: Secret Network address
+            tenant: Optional tenant id used to scope shared cache entries
+            incremental: Enhance paragraph by paragraph (defaults to ENHANCE_INCREMENTAL)
+            
+        Returns:
+            Enhanced content and metadata
+        """
+        if self._needs_split(draft_text, incremental):
+            return await self._aenhance_split(draft_text, enhancement_type, user_address, tenant, incremental)
+        
+        prompt, system_instruction = self._build_enhancement(draft_text, enhancement_type)
+        
+        return await self.agenerate_content(
+            prompt=prompt,
+            user_address=user_address,
+            system_instruction=system_instruction,
+            tenant=tenant,
+            task=enhancement_type
+        )
+    
+    async def _aenhance_split(self, draft_text: str, enhancement_type: str, user_address: str,
+                              tenant: Optional[str], incremental: Optional[bool]) -> Dict[str, Any]:
+        """Enhance a draft in chunks or paragraphs from async code
+        
+        Each chunk or paragraph call holds a slot of the same semaphore as other
+        async LLM calls, so concurrent long drafts stay within LLM_MAX_CONCURRENCY.
+        """
+        loop = asyncio.get_running_loop()
+        limiter = self._llm_limiter()
+        
+        async def limited(fn, *args):
+            async with limiter:
+                return await loop.run_in_executor(None, fn, *args)
+        
+        start_time = time.time()
+        try:
+            if self._incremental(incremental):
+                paragraphs = split_paragraphs(draft_text)
+                unique = list(dict.fromkeys(paragraphs))
+                parts = await asyncio.gather(*(
+                    limited(self._enhance_paragraph, paragraph, enhancement_type, user_address, tenant)
+                    for paragraph in unique
+                ))
+                result = self._incremental_result(draft_text, paragraphs, dict(zip(unique, parts)), start_time)
+            else:
+                chunks = split_into_chunks(draft_text, self.chunk_tokens, self.chunk_overlap_tokens)
+                enhanced = await asyncio.gather(*(
+                    limited(self._enhance_chunk, index, chunk, enhancement_type, user_address, tenant)
+                    for index, chunk in enumerate(chunks)
+                ))
+                result = self._chunked_result(draft_text, len(chunks), list(enhanced), start_time)
+            
+            await loop.run_in_executor(None, self._store_metadata, user_address, result["metadata"])
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Async split enhancement failed: {str(e)}")
+            raise
+    
+    def _enhance_variant(self, draft_text: str, enhancement_type: str, user_address: str,
+                         tenant: Optional[str], incremental: bool) -> Dict[str, Any]:
+        """Enhance a draft one way, as enhance_writing would, without storing metadata"""
+        if incremental:
+            return self._enhance_incremental(draft_text, enhancement_type, user_address, None, tenant)
+        if estimate_tokens(draft_text) > self.chunk_tokens:
+            return self._enhance_chunked(draft_text, enhancement_type, user_address, None, None, tenant)
+        prompt, system_instruction = self._build_enhancement(draft_text, enhancement_type)
+        return self._generate(prompt, system_instruction, user_address, tenant, enhancement_type)
+    
+    def enhance_writing_multi_stream(self, draft_text: str, enhancement_types: List[str], user_address: str,
+                                     max_concurrency: Optional[int] = None, tenant: Optional[str] = None,
+                                     incremental: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+        """Enhance one draft several ways at once, yielding each variant as it completes
+        
+        Variants run concurrently and go through the same cache, routing and
+        chunking as enhance_writing. Usage statistics for the whole request are
+        stored on Secret Network as a single aggregated metadata record.
+        
+        Args:
+            draft_text: Existing text to improve
+            enhancement_types: Enhancements to apply; duplicates are run once
+            user_address: Secret Network address
+            max_concurrency: Variants enhanced in parallel (defaults to LLM_MAX_CONCURRENCY)
+            tenant: Optional tenant id used to scope shared cache entries
+            incremental: Enhance paragraph by paragraph (defaults to ENHANCE_INCREMENTAL)
+            
+        Yields:
+            {"type": "variant", "enhancement_type": ..., "content": ..., "metadata": ...} or
+            {"type": "variant", "enhancement_type": ..., "error": ...} per type, in
+            completion order, then a final {"type": "summary", "metadata": ...} record
+        """
+        start_time = time.time()
+        enhancement_types = list(dict.fromkeys(enhancement_types))
+        incremental = self._incremental(incremental)
+        failed = 0
+        cache_hits = 0
+        models = set()
+        model_counts = {}
+        totals = {"prompt_tokens": 0, "completion_tokens": 0, "estimated_tokens": 0}
+        
+        pool = ThreadPoolExecutor(max_workers=max_concurrency or self.max_concurrent_llm_calls)
+        try:
+            futures = {
+                pool.submit(self._enhance_variant, draft_text, enhancement_type, user_address, tenant, incremental):
+                    enhancement_type
+                for enhancement_type in enhancement_types
+            }
+            for future in as_completed(futures):
+                enhancement_type = futures[future]
+                
+                # Report per-variant failures without failing the request
+                if future.exception() is not None:
+                    logger.error(f"Enhancement variant {enhancement_type} failed: {str(future.exception())}")
+                    failed += 1
+                    yield {"type": "variant", "enhancement_type": enhancement_type, "error": str(future.exception())}
+                    continue
+                
+                result = future.result()
+                metadata = result["metadata"]
+                cache_hits += 1 if metadata.get("cache_hit") else 0
+                models.update(metadata.get("models") or [metadata.get("model")])
+                model = metadata.get("model") or "unknown"
+                model_counts[model] = model_counts.get(model, 0) + 1
+                for field in totals:
+                    totals[field] += metadata.get(field) or 0
+                yield {"type": "variant", "enhancement_type": enhancement_type, **result}
+        finally:
+            # Also runs when the caller stops reading early; variants already started finish in the background
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        # One aggregated usage record for the whole request
+        end_time = time.time()
+        summary = {
+            "timestamp": int(end_time),
+            "enhancement_types": enhancement_types,
+            "draft_length": len(draft_text),
+            "batch_size": len(enhancement_types),
+            "succeeded": len(enhancement_types) - failed,
+            "failed": failed,
+            "cache_hits": cache_hits,
+            "processing_time": round(end_time - start_time, 2),
+            **totals,
+            "models": sorted(model for model in models if model),
+            "model_counts": model_counts,
+            "content_type": "enhance_multi"
+        }
+        self._store_metadata(user_address, summary)
+        
+        yield {"type": "summary", "metadata": summary}
+    
+    def enhance_writing_multi(self, draft_text: str, enhancement_types: List[str], user_address: str,
+                              max_concurrency: Optional[int] = None, tenant: Optional[str] = None,
+                              incremental: Optional[bool] = None) -> Dict[str, Any]:
+        """Enhance one draft several ways concurrently
+        
+        Args:
+            draft_text: Existing text to improve
+            enhancement_types: Enhancements to apply; duplicates are run once
+            user_address: Secret Network address
+            max_concurrency: Variants enhanced in parallel (defaults to LLM_MAX_CONCURRENCY)
+            tenant: Optional tenant id used to scope shared cache entries
+            incremental: Enhance paragraph by paragraph (defaults to ENHANCE_INCREMENTAL)
+            
+        Returns:
+            Dictionary with "variants" keyed by enhancement type in request order
+            (each with content and metadata, or an error) and the aggregated "metadata"
+        """
+        variants = {enhancement_type: None for enhancement_type in enhancement_types}
+        summary = {}
+        for record in self.enhance_writing_multi_stream(draft_text, enhancement_types, user_address,
+                                                        max_concurrency, tenant, incremental):
+            if record["type"] == "summary":
+                summary = record["metadata"]
+            else:
+                record.pop("type")
+                variants[record.pop("enhancement_type")] = record
+        
+        return {"variants": variants, "metadata": summary}
+    
+    def _batch_request(self, item: Union[str, Dict[str, Any]]) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """Return the (prompt, system_instruction, task) for a batch item, or None if invalid
+        
+        The task is the enhancement type for draft items and None for prompts, as the router expects.
+        """
+        if isinstance(item, str):
+            return (item, None, None) if item else None
+        if not isinstance(item, dict):
+            return None
+        if item.get("prompt"):
+            return item["prompt"], item.get("system_instruction"), None
+        if item.get("draft_text"):
+            enhancement_type = item.get("enhancement_type", "grammar")
+            return (*self._build_enhancement(item["draft_text"], enhancement_type), enhancement_type)
+        return None
+    
+    def _batch_outputs(self, route: Route, inputs: List[Any], max_concurrency: int) -> Iterator[Tuple[int, Any]]:
+        """Run one routed model's share of a batch, yielding (position, output) as each completes
+        
+        The batch holds as many in-flight slots on the model as it runs calls at once,
+        so the router's SLO fallback sees the load it adds.
+        """
+        with contextlib.ExitStack() as slots:
+            for _ in range(min(len(inputs), max_concurrency)):
+                slots.enter_context(self._llm_slot(route))
+            yield from route.llm.batch_as_completed(inputs, {"max_concurrency": max_concurrency},
+                                                    return_exceptions=True)
+    
+    def generate_many_stream(self, items: List[Union[str, Dict[str, Any]]], user_address: str,
+                             max_concurrency: Optional[int] = None,
+                             tenant: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Generate content for many prompts, yielding each result as it completes
+        
+        Cached items are answered first; the rest are routed like single requests
+        and fanned out with ChatOllama.batch_as_completed, one routed model at a
+        time so the batch stays within max_concurrency. Drafts too long for one
+        prompt, and incremental enhancements, run alongside through the chunked
+        and paragraph paths. Usage statistics for the whole batch are stored on
+        Secret Network as a single aggregated metadata record.
+        
+        Args:
+            items: Prompt strings, dicts with "prompt" and optional "system_instruction",
+                or dicts with "draft_text" and optional "enhancement_type" and "incremental"
+            user_address: Secret Network address for the user
+            max_concurrency: Maximum parallel LLM calls (defaults to LLM_MAX_CONCURRENCY)
+            tenant: Optional tenant id used to scope shared cache entries
+            
+        Yields:
+            {"type": "item", "index": ..., "content": ..., "metadata": ...} or
+            {"type": "item", "index": ..., "error": ...} per input, in completion
+            order, then a final {"type": "summary", "metadata": ...} record
+        """
+        start_time = time.time()
+        batch_concurrency = max_concurrency or self.max_concurrent_llm_calls
+        # Uncached items per routed model: its route, then (index, prompt, cache key, route) and messages per item
+        groups = {}
+        cache_hits = 0
+        failed = 0
+        totals = {"prompt_tokens": 0, "completion_tokens": 0, "estimated_tokens": 0}
+        split_pool = None
+        split_futures = {}
+        
+        try:
+            for index, item in enumerate(items):
+                if isinstance(item, dict) and not item.get("prompt") and item.get("draft_text") \
+                        and self._needs_split(item["draft_text"], item.get("incremental")):
+                    if split_pool is None:
+                        split_pool = ThreadPoolExecutor(max_workers=batch_concurrency)
+                    split_futures[split_pool.submit(
+                        self._enhance_variant, item["draft_text"], item.get("enhancement_type", "grammar"),
+                        user_address, tenant, self._incremental(item.get("incremental"))
+                    )] = index
+                    continue
+                
+                request = self._batch_request(item)
+                if request is None:
+                    failed += 1
+                    yield {"type": "item", "index": index, "error": "Batch item needs a prompt or draft_text"}
+                    continue
+                
+                prompt, system_instruction, task = request
+                route = self._route(prompt, task)
+                cache_key = self._cache_key(prompt, system_instruction, user_address, tenant, route)
+                cached_result = self._lookup_cache(cache_key, start_time)
+                if cached_result is not None:
+                    cache_hits += 1
+                    for field in totals:
+                        totals[field] += cached_result["metadata"].get(field) or 0
+                    yield {"type": "item", "index": index, **cached_result}
+                    continue
+                
+                _, pending, inputs = groups.setdefault(route.model, (route, [], []))
+                pending.append((index, prompt, cache_key, route))
+                inputs.append(self._build_messages(prompt, system_instruction))
+            
+            for model_route, pending, inputs in groups.values():
+                for position, output in self._batch_outputs(model_route, inputs, batch_concurrency):
+                    index, prompt, cache_key, route = pending[position]
+                    
+                    # Report per-item failures without failing the batch
+                    if isinstance(output, Exception):
+                        logger.error(f"Batch item {index} failed: {str(output)}")
+                        failed += 1
+                        yield {"type": "item", "index": index, "error": str(output)}
+                        continue
+                    
+                    metadata = self._build_metadata(prompt, output.content, start_time, output.response_metadata, route)
+                    for field in totals:
+                        totals[field] += metadata.get(field) or 0
+                    result = {"content": output.content, "metadata": metadata}
+                    self._cache_result(cache_key, result)
+                    yield {"type": "item", "index": index, **result}
+            
+            for future in as_completed(split_futures):
+                index = split_futures[future]
+                if future.exception() is not None:
+                    logger.error(f"Batch item {index} failed: {str(future.exception())}")
+                    failed += 1
+                    yield {"type": "item", "index": index, "error": str(future.exception())}
+                    continue
+                
+                result = future.result()
+                for field in totals:
+                    totals[field] += result["metadata"].get(field) or 0
+                yield {"type": "item", "index": index, **result}
+        finally:
+            if split_pool is not None:
+                split_pool.shutdown(wait=False, cancel_futures=True)
+        
+        # One aggregated usage record for the whole batch
+        end_time = time.time()
+        summary = {
+            "timestamp": int(end_time),
+            "batch_size": len(items),
+            "succeeded": len(items) - failed,
+            "failed": failed,
+            "cache_hits": cache_hits,
+            "processing_time": round(end_time - start_time, 2),
+            **totals,
+            "model": self.ollama_model,
+            "content_type": "batch"
+        }
+        self._store_metadata(user_address, summary)
+        
+        yield {"type": "summary", "metadata": summary}
+    
+    def generate_many(self, items: List[Union[str, Dict[str, Any]]], user_address: str,
+                      max_concurrency: Optional[int] = None,
+                      tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Generate content for many prompts concurrently
+        
+        Args:
+            items: Prompt strings, dicts with "prompt" and optional "system_instruction",
+                or dicts with "draft_text" and optional "enhancement_type"
+            user_address: Secret Network address for the user
+            max_concurrency: Maximum parallel LLM calls (defaults to LLM_MAX_CONCURRENCY)
+            tenant: Optional tenant id used to scope shared cache entries
+            
+        Returns:
+            Dictionary with "results" in input order (each with content and
+            metadata, or an error) and the aggregated batch "metadata"
+        """
+        results = [None] * len(items)
+        summary = {}
+        for record in self.generate_many_stream(items, user_address, max_concurrency, tenant):
+            if record["type"] == "summary":
+                summary = record["metadata"]
+            else:
+                index = record.pop("index")
+                record.pop("type")
+                results[index] = record
+        
+        return {"results": results, "metadata": summary}
+    
+    def _enhancement_items(self, drafts: List[Union[str, Dict[str, Any]]],
+                           enhancement_type: str) -> List[Any]:
+        """Turn drafts into generate_many items, defaulting their enhancement type"""
+        items = []
+        for draft in drafts:
+            if isinstance(draft, str):
+                draft = {"draft_text": draft}
+            if isinstance(draft, dict) and draft.get("draft_text"):
+                draft = {"enhancement_type": enhancement_type, **draft}
+            items.append(draft)
+        return items
+    
+    def enhance_many_stream(self, drafts: List[Union[str, Dict[str, Any]]], enhancement_type: str,
+                            user_address: str, max_concurrency: Optional[int] = None,
+                            tenant: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Enhance many drafts, yielding each result as it completes
+        
+        Args:
+            drafts: Draft strings, or dicts with "draft_text" and optional "enhancement_type"
+            enhancement_type: Enhancement applied to drafts that do not set their own
+            user_address: Secret Network address
+            max_concurrency: Maximum parallel LLM calls (defaults to LLM_MAX_CONCURRENCY)
+            tenant: Optional tenant id used to scope shared cache entries
+            
+        Yields:
+            Item records followed by a summary record, as in generate_many_stream
+        """
+        yield from self.generate_many_stream(
+            self._enhancement_items(drafts, enhancement_type), user_address, max_concurrency, tenant
+        )
+    
+    def enhance_many(self, drafts: List[Union[str, Dict[str, Any]]], enhancement_type: str,
+                     user_address: str, max_concurrency: Optional[int] = None,
+                     tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Enhance many drafts concurrently
+        
+        Args:
+            drafts: Draft strings, or dicts with "draft_text" and optional "enhancement_type"
+            enhancement_type: Enhancement applied to drafts that do not set their own
+            user_address: Secret Network address
+            max_concurrency: Maximum parallel LLM calls (defaults to LLM_MAX_CONCURRENCY)
+            tenant: Optional tenant id used to scope shared cache entries
+            
+        Returns:
+            Results in input order and the aggregated batch metadata, as in generate_many
+        """
+        return self.generate_many(
+            self._enhancement_items(drafts, enhancement_type), user_address, max_concurrency, tenant
+        )
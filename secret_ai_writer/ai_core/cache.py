@@ -0,0 +1,298 @@
+# secret_ai_writer/ai_core/cache.py
+
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    """In-process LRU cache with an entry cap and optional TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a copy of value, evicting the least recently used entries"""
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(value), expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DiskCache:
+    """Single-file SQLite store for JSON-serializable values
+
+    Entries are capped by count and total byte size, evicted least recently
+    used first, and expire after the TTL. Expired rows are dropped lazily on
+    read and in bulk by compact(), which also reclaims file space.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024,
+                 max_entries: int = 10000, ttl: Optional[float] = None,
+                 compact_interval: int = 1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.compact_interval = compact_interval
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value, then evict entries until the store is within its caps"""
+        payload = json.dumps(value).encode()
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), expires_at, now)
+            )
+            self._evict()
+            self._writes += 1
+            should_compact = self.compact_interval and self._writes % self.compact_interval == 0
+
+        if should_compact:
+            self.compact()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond the count and byte caps"""
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            count -= 1
+            total_bytes -= size
+            evicted += 1
+
+        self.evictions += evicted
+        logger.info(f"Evicted {evicted} entries from disk cache")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def compact(self) -> int:
+        """Drop expired entries and reclaim file space
+
+        Returns:
+            Number of expired entries removed
+        """
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+            self._conn.execute("VACUUM")
+        logger.info(f"Compacted disk cache, removed {removed} expired entries")
+        return removed
+
+    def size(self) -> Dict[str, int]:
+        """Return the current entry count and total payload bytes"""
+        with self._lock:
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {"entries": count, "bytes": total_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class TieredCache:
+    """Two-tier cache: an in-process LRU in front of an optional DiskCache
+
+    Reads check memory first, then disk (promoting disk hits into memory).
+    Writes go to both tiers. Values must be JSON-serializable.
+    """
+
+    def __init__(self, memory: Optional[LRUCache] = None, disk: Optional[DiskCache] = None):
+        self.memory = memory or LRUCache()
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, disk_path: Optional[str] = None) -> "TieredCache":
+        """Build a cache sized from environment settings
+
+        Args:
+            disk_path: SQLite file for the disk tier; defaults to CACHE_PATH,
+                and the disk tier is disabled if neither is set
+        """
+        ttl = config("CACHE_TTL", default="86400", cast=float) or None
+        memory = LRUCache(
+            max_entries=config("CACHE_MEMORY_ENTRIES", default="256", cast=int),
+            ttl=ttl
+        )
+
+        disk = None
+        disk_path = disk_path or config("CACHE_PATH", default=None)
+        if disk_path:
+            try:
+                disk = DiskCache(
+                    disk_path,
+                    max_bytes=config("CACHE_MAX_BYTES", default=str(64 * 1024 * 1024), cast=int),
+                    max_entries=config("CACHE_MAX_ENTRIES", default="10000", cast=int),
+                    ttl=ttl
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open disk cache at {disk_path}, using memory only: {str(e)}")
+
+        return cls(memory=memory, disk=disk)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value from the fastest tier that has it"""
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.error(f"Error reading from disk cache: {str(e)}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value in every tier"""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.error(f"Error writing to disk cache: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current tier sizes"""
+        stats = {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_evictions": self.memory.evictions,
+            "memory_entries": len(self.memory),
+        }
+        if self.disk is not None:
+            disk_size = self.disk.size()
+            stats.update({
+                "disk_evictions": self.disk.evictions,
+                "disk_entries": disk_size["entries"],
+                "disk_bytes": disk_size["bytes"],
+            })
+        return stats
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,122 @@
+# secret_ai_writer/ai_core/cache_keys.py
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
+from decouple import config, Csv
+
+# Bump when the key layout changes so old entries stop matching
+KEY_VERSION = 1
+
+# Metadata fields that describe a single request rather than the generated
+# content. They are never cached and are filled in fresh on every call; the
+# load and first-token timings in particular would replay a cold start on hits.
+PER_REQUEST_FIELDS = ("timestamp", "tx_hash", "tx_handle", "tx_status", "processing_time", "cache_hit", "coalesced",
+                      "cold_start", "load_duration", "total_duration", "time_to_first_token", "streamed", "route")
+
+_INLINE_WHITESPACE = re.compile(r"[ \t\f\v]+")
+_EXTRA_BLANK_LINES = re.compile(r"\n{3,}")
+
+def canonicalize_text(text: Optional[str]) -> str:
+    """Normalize whitespace that does not change what the model is asked
+
+    Line endings become \\n, runs of spaces/tabs collapse to one space, each
+    line is stripped, and more than one blank line collapses to one.
+    """
+    if not text:
+        return ""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_INLINE_WHITESPACE.sub(" ", line).strip() for line in text.split("\n")]
+    return _EXTRA_BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+class CacheKeyPolicy:
+    """Decides whether cached generations are shared between users
+
+    When sharing is enabled, users of the same tenant (or every user, if no
+    tenant is given) share entries. Tenants listed in CACHE_PRIVATE_TENANTS
+    always get per-user entries, and tenants in CACHE_SHARED_TENANTS always
+    share, whatever CACHE_SHARE_ACROSS_USERS says.
+    """
+
+    def __init__(self, share_across_users: Optional[bool] = None,
+                 shared_tenants: Optional[set] = None,
+                 private_tenants: Optional[set] = None):
+        if share_across_users is None:
+            share_across_users = config("CACHE_SHARE_ACROSS_USERS", default="False").lower() == "true"
+        if shared_tenants is None:
+            shared_tenants = set(config("CACHE_SHARED_TENANTS", default="", cast=Csv()))
+        if private_tenants is None:
+            private_tenants = set(config("CACHE_PRIVATE_TENANTS", default="", cast=Csv()))
+
+        self.share_across_users = share_across_users
+        self.shared_tenants = shared_tenants
+        self.private_tenants = private_tenants
+
+    def scope(self, user_address: str, tenant: Optional[str] = None) -> str:
+        """Return the cache scope a request's entries live in"""
+        if tenant in self.private_tenants:
+            shared = False
+        elif tenant in self.shared_tenants:
+            shared = True
+        else:
+            shared = self.share_across_users
+
+        if not shared:
+            return f"user:{user_address}"
+        return f"tenant:{tenant}" if tenant else "shared"
+
+def generation_cache_key(prompt: str, system_instruction: Optional[str],
+                         params: Dict[str, Any], scope: str) -> str:
+    """Derive the cache key for one LLM generation
+
+    Args:
+        prompt: Prompt sent to the model
+        system_instruction: System prompt sent to the model
+        params: Every generation parameter that affects the output
+            (model, temperature, max_tokens, ...)
+        scope: Sharing scope from CacheKeyPolicy.scope
+
+    Returns:
+        Hex digest identifying the generation
+    """
+    key_data = json.dumps({
+        "version": KEY_VERSION,
+        "prompt": canonicalize_text(prompt),
+        "system_instruction": canonicalize_text(system_instruction),
+        "params": params,
+        "scope": scope,
+    }, sort_keys=True).encode()
+    return hashlib.sha256(key_data).hexdigest()
+
+def paragraph_cache_key(paragraph: str, enhancement_type: str,
+                        params: Dict[str, Any], scope: str) -> str:
+    """Derive the cache key for one enhanced paragraph
+
+    Args:
+        paragraph: Paragraph of the draft, hashed after canonicalization
+        enhancement_type: Type of enhancement applied to it
+        params: Generation parameters, including the model
+        scope: Sharing scope from CacheKeyPolicy.scope
+
+    Returns:
+        Hex digest identifying the enhanced paragraph
+    """
+    key_data = json.dumps({
+        "version": KEY_VERSION,
+        "paragraph": hashlib.sha256(canonicalize_text(paragraph).encode()).hexdigest(),
+        "enhancement_type": enhancement_type,
+        "params": params,
+        "scope": scope,
+    }, sort_keys=True).encode()
+    return hashlib.sha256(key_data).hexdigest()
+
+def split_result(result: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split a generation result into its cacheable part and per-request fields
+
+    Returns:
+        Tuple with (cacheable result, per-request metadata)
+    """
+    metadata = dict(result.get("metadata", {}))
+    per_request = {field: metadata.pop(field) for field in PER_REQUEST_FIELDS if field in metadata}
+    return {**result, "metadata": metadata}, per_request
@@ -0,0 +1,182 @@
+# secret_ai_writer/ai_core/chain_clients.py
+
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+import nest_asyncio
+from aiohttp import ClientSession, TCPConnector
+from decouple import config
+from secret_sdk.client.lcd import LCDClient
+from secret_sdk.client.lcd.lcdclient import AsyncLCDClient
+from secret_sdk.key.mnemonic import MnemonicKey
+
+logger = logging.getLogger(__name__)
+
+def request_config() -> Dict[str, Any]:
+    """Return the LCD request timeouts and retries, the one place they are set"""
+    return {
+        "GET_TIMEOUT": config("LCD_GET_TIMEOUT", default="30", cast=int),
+        "POST_TIMEOUT": config("LCD_POST_TIMEOUT", default="30", cast=int),
+        "GET_RETRY": config("LCD_GET_RETRY", default="1", cast=int),
+    }
+
+class LoopThread:
+    """An event loop running in its own thread, driving a sync SDK client
+
+    The stock sync client calls loop.run_until_complete on one shared loop
+    from whichever thread makes the call, which breaks as soon as two threads
+    use the same client. Here every call is submitted to one background loop,
+    so any number of threads can share the client and their requests overlap.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        nest_asyncio.apply(self._loop)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="lcd-client-loop", daemon=True)
+        self._thread.start()
+
+    def run_until_complete(self, coroutine):
+        """Run a coroutine on the loop and wait for its result"""
+        # SDK coroutines call other sync SDK methods; those run nested on the loop thread
+        if threading.current_thread() is self._thread:
+            return self._loop.run_until_complete(coroutine)
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self) -> None:
+        """Stop the loop and its thread"""
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+class PooledLCDClient(LCDClient):
+    """LCDClient that keeps one keep-alive HTTP session instead of one per request
+
+    The stock synchronous client opens and closes an aiohttp session around
+    every call, so each query pays a fresh TCP/TLS handshake. This client
+    reuses a pooled session for the life of the process, and runs its calls
+    on a LoopThread so that it can be shared between threads.
+    """
+
+    def __init__(self, *args, pool_size: int = 10, keepalive_timeout: float = 30, **kwargs):
+        self._pool_size = pool_size
+        self._keepalive_timeout = keepalive_timeout
+        self._pooled_session = None
+        self._loop_thread = LoopThread()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def loop(self) -> LoopThread:
+        return self._loop_thread
+
+    @loop.setter
+    def loop(self, value) -> None:
+        # LCDClient.__init__ assigns the calling thread's loop; calls go to the loop thread instead
+        pass
+
+    def _session(self) -> ClientSession:
+        if self._pooled_session is None or self._pooled_session.closed:
+            self._pooled_session = ClientSession(
+                headers={"Accept": "application/json"},
+                connector=TCPConnector(limit=self._pool_size, keepalive_timeout=self._keepalive_timeout)
+            )
+        return self._pooled_session
+
+    async def _get(self, *args, **kwargs):
+        # Every call runs on the loop thread, so requests share the session without a lock
+        self.session = self._session()
+        return await AsyncLCDClient._get(self, *args, **kwargs)
+
+    async def _post(self, *args, **kwargs):
+        self.session = self._session()
+        return await AsyncLCDClient._post(self, *args, **kwargs)
+
+    def close(self) -> None:
+        """Close the pooled HTTP session and stop the loop thread"""
+        if self._pooled_session is not None and not self._pooled_session.closed:
+            self.loop.run_until_complete(self._pooled_session.close())
+        self._loop_thread.close()
+
+class ChainClient:
+    """A shared LCD client plus the wallet for one mnemonic, derived on first use"""
+
+    def __init__(self, lcd: LCDClient, mnemonic: Optional[str] = None):
+        self.lcd = lcd
+        self._mnemonic = mnemonic
+        self._wallet = None
+        self._lock = threading.Lock()
+
+    @property
+    def has_wallet(self) -> bool:
+        return bool(self._mnemonic)
+
+    @property
+    def wallet(self):
+        """Return the wallet, deriving the key from the mnemonic on first access
+
+        Raises:
+            ValueError: If the client was created without a mnemonic
+        """
+        if not self._mnemonic:
+            raise ValueError("Wallet not initialized. Mnemonic may be missing.")
+        with self._lock:
+            if self._wallet is None:
+                self._wallet = self.lcd.wallet(MnemonicKey(mnemonic=self._mnemonic))
+                logger.info("Wallet initialized successfully")
+            return self._wallet
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_chain_client(chain_id: Optional[str] = None, url: Optional[str] = None,
+                     mnemonic: Optional[str] = None) -> ChainClient:
+    """Return the process-wide ChainClient for a chain id, LCD URL and mnemonic
+
+    Args:
+        chain_id: Chain id (defaults to CHAIN_ID)
+        url: LCD URL (defaults to LCD_URL)
+        mnemonic: Wallet mnemonic, or None for a query-only client
+
+    Returns:
+        A ChainClient shared with every other caller using the same settings
+    """
+    chain_id = chain_id or config("CHAIN_ID", default="pulsar-3")
+    url = url or config("LCD_URL", default="https://lcd.testnet.secretsaturn.net")
+    mnemonic_id = hashlib.sha256(mnemonic.encode()).hexdigest() if mnemonic else None
+    client_key = (chain_id, url, mnemonic_id)
+
+    with _clients_lock:
+        client = _clients.get(client_key)
+        if client is None:
+            # Wallets for different mnemonics on the same endpoint share one LCD client
+            lcd = next((c.lcd for (c_id, c_url, _), c in _clients.items()
+                        if (c_id, c_url) == (chain_id, url)), None)
+            if lcd is None:
+                # The sync SDK client runs on the thread's event loop; asyncio.run() may have cleared it
+                try:
+                    asyncio.get_event_loop()
+                except RuntimeError:
+                    asyncio.set_event_loop(asyncio.new_event_loop())
+                lcd = PooledLCDClient(
+                    chain_id=chain_id,
+                    url=url,
+                    pool_size=config("LCD_POOL_SIZE", default="10", cast=int),
+                    keepalive_timeout=config("LCD_KEEPALIVE", default="30", cast=float),
+                    _request_config=request_config()
+                )
+                logger.info(f"Created pooled LCD client for {chain_id} at {url}")
+            client = _clients[client_key] = ChainClient(lcd, mnemonic)
+        return client
+
+def close_chain_clients() -> None:
+    """Close every pooled LCD session and forget the registered clients"""
+    with _clients_lock:
+        for lcd in {id(c.lcd): c.lcd for c in _clients.values()}.values():
+            try:
+                lcd.close()
+            except Exception as e:
+                logger.warning(f"Failed to close LCD client: {str(e)}")
+        _clients.clear()
@@ -0,0 +1,86 @@
+# secret_ai_writer/ai_core/chunking.py
+
+import re
+from typing import Dict, List
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split text on blank lines, dropping empty paragraphs"""
+    return [p.strip() for p in _PARAGRAPH_BREAK.split(text) if p.strip()]
+
+def _split_oversized(paragraph: str, max_tokens: int) -> List[str]:
+    """Split a paragraph that exceeds the budget on sentences, then on words"""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        candidate = f"{current} {sentence}".strip()
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            candidate = sentence
+        current = candidate
+
+        # A single sentence can still be too long; cut it on word boundaries
+        while estimate_tokens(current) > max_tokens:
+            words = current.split()
+            cut = []
+            while words and estimate_tokens(" ".join(cut + words[:1])) <= max_tokens:
+                cut.append(words.pop(0))
+            if not cut:
+                cut.append(words.pop(0))
+            pieces.append(" ".join(cut))
+            current = " ".join(words)
+
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_into_chunks(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[Dict[str, str]]:
+    """Split text into chunks of whole paragraphs within a token budget
+
+    Paragraphs are packed greedily; a paragraph larger than the budget is
+    split on sentences. Each chunk carries the tail of the previous chunk as
+    read-only context so the model keeps continuity across chunk boundaries.
+
+    Args:
+        text: Text to split
+        max_tokens: Token budget for each chunk's own text
+        overlap_tokens: Budget for the context taken from the previous chunk
+
+    Returns:
+        List of {"text": ..., "context": ...} in document order
+    """
+    paragraphs = []
+    for paragraph in split_paragraphs(text):
+        if estimate_tokens(paragraph) > max_tokens:
+            paragraphs.extend(_split_oversized(paragraph, max_tokens))
+        else:
+            paragraphs.append(paragraph)
+
+    groups = []
+    current = []
+    for paragraph in paragraphs:
+        if current and estimate_tokens("\n\n".join(current + [paragraph])) > max_tokens:
+            groups.append(current)
+            current = []
+        current.append(paragraph)
+    if current:
+        groups.append(current)
+
+    chunks = []
+    for index, group in enumerate(groups):
+        context = ""
+        if overlap_tokens and index > 0:
+            # Take whole trailing sentences of the previous chunk up to the overlap budget
+            sentences = _SENTENCE_END.split(groups[index - 1][-1])
+            tail = []
+            while sentences and estimate_tokens(" ".join([sentences[-1]] + tail)) <= overlap_tokens:
+                tail.insert(0, sentences.pop())
+            context = " ".join(tail)
+        chunks.append({"text": "\n\n".join(group), "context": context})
+    return chunks
@@ -1,14 +1,17 @@
 # secret_ai_writer/ai_core/confidential_chain.py
 
 import os
+import asyncio
 import logging
 from decouple import config
-from secret_sdk.client.lcd import LCDClient
-from secret_sdk.core.tx import Tx
-from secret_sdk.key.mnemonic import MnemonicKey
+from .chain_clients import get_chain_client
+from .encryption_keys import get_key_provider
+from .metrics import stage_timer
 import json
 import base64
+from typing import Optional
 import hashlib
+import threading
 import time
 
 logger = logging.getLogger(__name__)
@@ -18,19 +21,99 @@ class MockTxResult:
     def __init__(self, txhash):
         self.txhash = txhash
 
+# Upper bounds (seconds) of the processing-time histogram kept in usage rollups
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120)
+
+class UsageRollup:
+    """Running aggregate of one user's usage records within a batch"""
+    def __init__(self, user_address: str):
+        self.user_address = user_address
+        self.generations = 0
+        self.window_start = None
+        self.window_end = None
+        self.sums = {"prompt_length": 0, "response_length": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                     "estimated_tokens": 0, "processing_time": 0.0}
+        self.models = {}
+        self.latency_histogram = {f"le_{bound}": 0 for bound in LATENCY_BUCKETS}
+        self.latency_histogram["le_inf"] = 0
+    
+    def add(self, metadata: dict):
+        """Fold one usage record into the rollup"""
+        # Batch summaries already count several generations
+        generations = metadata.get("batch_size", 1)
+        self.generations += generations
+        
+        timestamp = metadata.get("timestamp", int(time.time()))
+        self.window_start = timestamp if self.window_start is None else min(self.window_start, timestamp)
+        self.window_end = timestamp if self.window_end is None else max(self.window_end, timestamp)
+        
+        for field in self.sums:
+            self.sums[field] += metadata.get(field) or 0
+        
+        # Multi-variant summaries count their variants per model; failed variants have no model
+        model_counts = metadata.get("model_counts") or {metadata.get("model", "unknown"): generations}
+        unattributed = generations - sum(model_counts.values())
+        if unattributed > 0:
+            model_counts = {**model_counts, "unknown": model_counts.get("unknown", 0) + unattributed}
+        for model, count in model_counts.items():
+            self.models[model] = self.models.get(model, 0) + count
+        
+        processing_time = metadata.get("processing_time") or 0
+        bucket = next((f"le_{bound}" for bound in LATENCY_BUCKETS if processing_time <= bound), "le_inf")
+        self.latency_histogram[bucket] += 1
+    
+    def to_dict(self) -> dict:
+        return {
+            "content_type": "usage_rollup",
+            "user_address": self.user_address,
+            "generations": self.generations,
+            "window_start": self.window_start,
+            "window_end": self.window_end,
+            "sums": {field: round(value, 2) for field, value in self.sums.items()},
+            "models": self.models,
+            "latency_histogram": self.latency_histogram
+        }
+
+class UsageBatch:
+    """Usage rollups that are sent together as one multi-message transaction
+    
+    Returned by store_usage_stats in batching mode; txhash stays None until
+    the batch is flushed.
+    """
+    def __init__(self):
+        self.rollups = {}
+        self.generations = 0
+        self.created_at = time.time()
+        self.txhash = None
+    
+    def add(self, user_address: str, metadata: dict):
+        rollup = self.rollups.get(user_address)
+        if rollup is None:
+            rollup = self.rollups[user_address] = UsageRollup(user_address)
+        before = rollup.generations
+        rollup.add(metadata)
+        self.generations += rollup.generations - before
+
 class PrivateMetadata:
     def __init__(self):
         """Initialize connection to Secret Network with authentication"""
+        # Batching mode: roll usage records up per user and flush them together
+        self.batch_size = config("USAGE_BATCH_SIZE", default="0", cast=int)
+        self.batch_interval = config("USAGE_BATCH_INTERVAL", default="30", cast=float)
+        self._batch = UsageBatch()
+        self._batch_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_flusher = threading.Event()
+        self._flusher = None
+        if self.batch_size > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="usage-batch-flusher", daemon=True)
+            self._flusher.start()
+        
         try:
-            # Create LCD client
-            self.chain = LCDClient(
-                chain_id=config("CHAIN_ID", default="pulsar-3"),
-                url=config("LCD_URL", default="https://lcd.testnet.secretsaturn.net")
-            )
-            
-            # Set up wallet from mnemonic
+            # Use the shared LCD client; the wallet is derived from the mnemonic on first use
             mnemonic = config("MNEMONIC")
-            self.wallet = self.chain.wallet(MnemonicKey(mnemonic=mnemonic))
+            self.chain_client = get_chain_client(mnemonic=mnemonic)
+            self.chain = self.chain_client.lcd
             
             # Store contract address
             self.contract_address = config("CONTRACT_ADDRESS")
@@ -46,13 +129,34 @@ class PrivateMetadata:
             self.dev_mode = True
             logger.info("Falling back to development mode")
     
+    @property
+    def wallet(self):
+        """Wallet from the shared chain client, derived from the mnemonic on first use"""
+        chain_client = getattr(self, 'chain_client', None)
+        if chain_client is None or not chain_client.has_wallet:
+            raise AttributeError("wallet")
+        return chain_client.wallet
+    
     def store_usage_stats(self, user_address: str, metadata: dict):
         """Store encrypted metadata on-chain
         
+        With USAGE_BATCH_SIZE set, the record is added to the pending batch
+        instead and the returned UsageBatch gets its txhash once flushed.
+        
         Args:
             user_address: The Secret Network address of the user
             metadata: Dictionary containing usage statistics/metadata
         """
+        if self.batch_size > 0:
+            with self._batch_lock:
+                batch = self._batch
+                batch.add(user_address, metadata)
+                should_flush = (batch.generations >= self.batch_size or
+                                time.time() - batch.created_at >= self.batch_interval)
+            if should_flush:
+                self.flush_usage_stats()
+            return batch
+        
         try:
             # Convert metadata to bytes and encrypt
             metadata_bytes = json.dumps(metadata).encode()
@@ -61,32 +165,33 @@ class PrivateMetadata:
             # Execute contract with private metadata
             if hasattr(self, 'wallet') and not self.dev_mode:
                 # Try different methods of contract execution based on SDK version
-                try:
-                    # Method 1: Original method
-                    tx_result = self.wallet.execute_contract(
-                        contract_address=self.contract_address,
-                        msg={
-                            "store_draft": {
-                                "encrypted_content": "",  # Empty for metadata-only updates
-                                "encrypted_metadata": encrypted_metadata
-                            }
-                        },
-                        gas_prices="0.25uscrt",
-                        gas=config("GAS", default="200000", cast=int)
-                    )
-                except AttributeError:
-                    # Method 2: Try with execute_contracts
-                    tx_result = self.wallet.execute_contracts(
-                        [self.contract_address],
-                        [{
-                            "store_draft": {
-                                "encrypted_content": "",
-                                "encrypted_metadata": encrypted_metadata
-                            }
-                        }],
-                        gas_prices="0.25uscrt",
-                        gas=config("GAS", default="200000", cast=int)
-                    )
+                with stage_timer("metadata.execute"):
+                    try:
+                        # Method 1: Original method
+                        tx_result = self.wallet.execute_contract(
+                            contract_address=self.contract_address,
+                            msg={
+                                "store_draft": {
+                                    "encrypted_content": "",  # Empty for metadata-only updates
+                                    "encrypted_metadata": encrypted_metadata
+                                }
+                            },
+                            gas_prices="0.25uscrt",
+                            gas=config("GAS", default="200000", cast=int)
+                        )
+                    except AttributeError:
+                        # Method 2: Try with execute_contracts
+                        tx_result = self.wallet.execute_contracts(
+                            [self.contract_address],
+                            [{
+                                "store_draft": {
+                                    "encrypted_content": "",
+                                    "encrypted_metadata": encrypted_metadata
+                                }
+                            }],
+                            gas_prices="0.25uscrt",
+                            gas=config("GAS", default="200000", cast=int)
+                        )
                 
                 logger.info(f"Stored metadata successfully, tx hash: {tx_result.txhash}")
                 return tx_result
@@ -103,6 +208,90 @@ class PrivateMetadata:
             mock_hash = f"mock_tx_{hashlib.md5(str(time.time()).encode()).hexdigest()[:16]}"
             return MockTxResult(mock_hash)
     
+    def flush_usage_stats(self) -> Optional[UsageBatch]:
+        """Send the pending usage batch as one transaction
+        
+        The contract keeps one draft per sender and every rollup is sent from
+        the same wallet, so separate messages would overwrite each other. All
+        rollups therefore go into one message, as a JSON list in its metadata.
+        
+        Returns:
+            The flushed UsageBatch, or None if nothing was pending
+        """
+        with self._flush_lock:
+            with self._batch_lock:
+                batch = self._batch
+                if not batch.rollups:
+                    return None
+                self._batch = UsageBatch()
+            
+            rollups = [rollup.to_dict() for rollup in batch.rollups.values()]
+            msgs = [{
+                "store_draft": {
+                    "encrypted_content": "",
+                    "encrypted_metadata": self.encrypt_data(json.dumps(rollups).encode())
+                }
+            }]
+            
+            batch.txhash = self._execute_batch(msgs)
+            logger.info(f"Stored usage batch covering {batch.generations} generations "
+                        f"for {len(rollups)} users, tx hash: {batch.txhash}")
+            return batch
+    
+    def _execute_batch(self, msgs: list) -> str:
+        """Execute several contract messages in one transaction and return its hash"""
+        try:
+            if hasattr(self, 'wallet') and not self.dev_mode:
+                gas = config("GAS", default="200000", cast=int) * len(msgs)
+                # Try different methods of multi-message execution based on SDK version
+                with stage_timer("metadata.execute_batch"):
+                    try:
+                        # Method 1: execute_contracts
+                        tx_result = self.wallet.execute_contracts(
+                            [self.contract_address] * len(msgs),
+                            msgs,
+                            gas_prices="0.25uscrt",
+                            gas=gas
+                        )
+                    except AttributeError:
+                        # Method 2: Try with multi_execute_tx
+                        tx_result = self.wallet.multi_execute_tx(
+                            [{"contract_addr": self.contract_address, "handle_msg": msg} for msg in msgs],
+                            gas_prices="0.25uscrt",
+                            gas=gas
+                        )
+                return tx_result.txhash
+            else:
+                # Development mode or missing wallet
+                logger.info("Development mode: Mock storing usage batch")
+                return f"mock_tx_{hashlib.md5(str(time.time()).encode()).hexdigest()[:16]}"
+            
+        except Exception as e:
+            logger.error(f"Failed to store usage batch: {str(e)}")
+            logger.info("Falling back to mock transaction")
+            return f"mock_tx_{hashlib.md5(str(time.time()).encode()).hexdigest()[:16]}"
+    
+    def _flush_periodically(self):
+        """Flush batches older than the flush interval even when traffic stops"""
+        while not self._stop_flusher.wait(min(self.batch_interval, 1.0)):
+            with self._batch_lock:
+                due = (self._batch.rollups and
+                       time.time() - self._batch.created_at >= self.batch_interval)
+            if due:
+                self.flush_usage_stats()
+    
+    def close(self):
+        """Stop the background flusher and send any pending usage batch"""
+        self._stop_flusher.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush_usage_stats()
+    
+    async def astore_usage_stats(self, user_address: str, metadata: dict):
+        """Async version of store_usage_stats, running the blocking SDK calls on the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.store_usage_stats, user_address, metadata)
+    
     def encrypt_data(self, data: bytes) -> str:
         """Encrypt data using Secret Network's encryption
         
@@ -119,30 +308,10 @@ class PrivateMetadata:
             return base64.b64encode(mock_encrypted).decode()
             
         try:
-            # Try different methods to get encryption key based on SDK version
-            encryption_key = None
-            
-            # Method 1: Try with wasm.query_tx_key
-            try:
-                if hasattr(self.chain, 'wasm') and hasattr(self.chain.wasm, 'query_tx_key'):
-                    encryption_key = self.chain.wasm.query_tx_key()
-            except Exception as e1:
-                logger.warning(f"Failed to get encryption key with wasm.query_tx_key: {str(e1)}")
-                
-            # Method 2: Try with query_tx_encryption_key
-            if encryption_key is None:
-                try:
-                    if hasattr(self.chain, 'query_tx_encryption_key'):
-                        encryption_key = self.chain.query_tx_encryption_key()
-                except Exception as e2:
-                    logger.warning(f"Failed to get encryption key with query_tx_encryption_key: {str(e2)}")
-            
-            # If we have an encryption key, use it
-            if encryption_key:
-                encrypted = self.chain.encryption.encrypt(encryption_key, data)
-                return base64.b64encode(encrypted).decode()
-            else:
-                raise ValueError("Could not obtain encryption key")
+            # The shared provider caches the key instead of querying it on every call
+            with stage_timer("metadata.encrypt"):
+                encrypted = get_key_provider(self.chain).encrypt(data)
+            return base64.b64encode(encrypted).decode()
             
         except Exception as e:
             logger.error(f"Encryption failed: {str(e)}")
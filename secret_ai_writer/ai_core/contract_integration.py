@@ -1,10 +1,8 @@
 # secret_ai_writer/ai_core/contract_integration.py
 
 import logging
-import json
-import base64
 from decouple import config
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 from .secret_ai_client import ConfidentialWriter
 
 logger = logging.getLogger(__name__)
@@ -57,23 +55,7 @@ class ContractManager:
             # Get wallet address
             wallet_address = self.client.get_wallet_address()
             
-            # Format content and metadata for the contract
-            encrypted_content = base64.b64encode(content.encode()).decode()
-            
-            encrypted_metadata = ""
-            if metadata:
-                metadata_json = json.dumps(metadata)
-                encrypted_metadata = base64.b64encode(metadata_json.encode()).decode()
-            
-            # Execute contract
-            msg = {
-                "store_draft": {
-                    "encrypted_content": encrypted_content,
-                    "encrypted_metadata": encrypted_metadata
-                }
-            }
-            
-            # Use the client to execute the contract
+            # Use the client to execute the contract; it compresses and encrypts the payload
             result = self.client.store_draft(content, metadata)
             
             logger.info(f"Draft stored in contract successfully, tx hash: {result.get('tx_hash')}")
@@ -121,4 +103,29 @@ class ContractManager:
                         {"timestamp": 1644144000, "error_fallback": True})
             
             # Return empty results on error
-            return ("", {})
\ No newline at end of file
+            return ("", {})
+    
+    def retrieve_drafts(self, addresses: Iterable[str],
+                        max_concurrency: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Retrieve drafts for many users from the Secret Network contract, as they complete.
+        
+        Args:
+            addresses: Addresses to retrieve drafts for
+            max_concurrency: Maximum parallel contract queries
+            
+        Yields:
+            Per-address draft or error records, then a summary record
+            (see ConfidentialWriter.retrieve_drafts)
+        """
+        if self.dev_mode:
+            logger.info("Development mode: Returning mock drafts from contract")
+            addresses = list(dict.fromkeys(addresses))
+            for address in addresses:
+                yield {"type": "draft", "address": address, "content": "This is a mock draft from the contract.",
+                       "metadata": {"timestamp": 1644144000, "title": "Mock Draft"}, "found": True}
+            yield {"type": "summary", "requested": len(addresses), "retrieved": len(addresses),
+                   "failed": 0, "cache_hits": 0, "elapsed": 0.0}
+            return
+        
+        yield from self.client.retrieve_drafts(addresses, max_concurrency=max_concurrency)
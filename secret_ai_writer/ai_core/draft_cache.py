@@ -0,0 +1,146 @@
+# secret_ai_writer/ai_core/draft_cache.py
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from decouple import config
+
+class DraftCache:
+    """Read-through cache of decrypted drafts, keyed by owner address
+
+    Entries expire after the TTL, so drafts changed by another process are
+    picked up, and are capped by count and total size. Each address has a
+    version that invalidate() bumps; a read that started before a store
+    finished carries the old version and is not cached.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            ttl: Seconds a decrypted draft is served from memory (defaults to
+                DRAFT_CACHE_TTL; 0 disables the cache)
+            max_entries: Maximum cached drafts (defaults to DRAFT_CACHE_MAX_ENTRIES)
+            max_bytes: Maximum total size of cached drafts (defaults to DRAFT_CACHE_MAX_BYTES)
+        """
+        if ttl is None:
+            ttl = config("DRAFT_CACHE_TTL", default="30", cast=float)
+        if max_entries is None:
+            max_entries = config("DRAFT_CACHE_MAX_ENTRIES", default="1024", cast=int)
+        if max_bytes is None:
+            max_bytes = config("DRAFT_CACHE_MAX_BYTES", default=str(16 * 1024 * 1024), cast=int)
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def version(self, address: str) -> int:
+        """Return the address's current version, to pass to put() after the read"""
+        with self._lock:
+            return self._versions.get(address, 0)
+
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached draft, or None if missing or expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is None or entry["expires_at"] <= time.time():
+                if entry is not None:
+                    self._remove(address)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(address)
+            self.hits += 1
+            return copy.deepcopy(entry["draft"])
+
+    def put(self, address: str, draft: Dict[str, Any], version: int) -> None:
+        """Cache a decrypted draft read at the given version
+
+        Dropped when the address was invalidated since the read began, or when
+        the draft alone is larger than the byte budget.
+        """
+        if not self.enabled:
+            return
+        size = len(draft.get("content", "")) + len(json.dumps(draft.get("metadata", {})))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if self._versions.get(address, 0) != version:
+                return
+            if address in self._entries:
+                self._remove(address)
+            self._entries[address] = {
+                "draft": copy.deepcopy(draft),
+                "size": size,
+                "expires_at": time.time() + self.ttl
+            }
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, address: str) -> None:
+        """Drop the address's draft and bump its version so in-flight reads are not cached"""
+        with self._lock:
+            self._versions[address] = self._versions.get(address, 0) + 1
+            if address in self._entries:
+                self._remove(address)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, address: str) -> None:
+        self._bytes -= self._entries.pop(address)["size"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current memory use"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions
+            }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_draft_cache(chain, contract_address: Optional[str]) -> DraftCache:
+    """Return the process-wide draft cache for a contract on a chain endpoint
+
+    Every ConfidentialWriter in the process shares it, so a store through one
+    writer invalidates the draft cached by any other.
+    """
+    cache_key = (getattr(chain, "chain_id", None), getattr(chain, "url", None), contract_address)
+    with _caches_lock:
+        cache = _caches.get(cache_key)
+        if cache is None:
+            cache = _caches[cache_key] = DraftCache()
+        return cache
+
+def draft_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every draft cache in the process, keyed by contract, chain id and URL"""
+    with _caches_lock:
+        return {f"{contract}@{chain_id}@{url}": cache.stats() for (chain_id, url, contract), cache in _caches.items()}
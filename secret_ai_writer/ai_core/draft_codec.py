@@ -0,0 +1,86 @@
+# secret_ai_writer/ai_core/draft_codec.py
+
+import logging
+import zlib
+from decouple import config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Envelope: magic, format version, codec id, then the (compressed) payload.
+# Text drafts and JSON metadata never start with a NUL byte, so anything
+# without the magic is an uncompressed draft stored before the envelope existed.
+MAGIC = b"\x00SAW"
+ENVELOPE_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+def _codec_for(size: int) -> int:
+    """Pick the codec for a payload of the given size from the DRAFT_COMPRESSION settings"""
+    if size < config("DRAFT_COMPRESSION_THRESHOLD", default="512", cast=int):
+        return CODEC_NONE
+    setting = config("DRAFT_COMPRESSION", default="auto").lower()
+    if setting == "auto":
+        return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+    codec = CODECS.get(setting)
+    if codec is None:
+        logger.warning(f"Unknown DRAFT_COMPRESSION {setting!r}, storing drafts uncompressed")
+        return CODEC_NONE
+    if codec == CODEC_ZSTD and zstandard is None:
+        logger.warning("DRAFT_COMPRESSION=zstd but zstandard is not installed, using zlib")
+        return CODEC_ZLIB
+    return codec
+
+def encode_payload(data: bytes) -> bytes:
+    """Compress a draft payload ahead of encryption, when it is large enough to pay off
+
+    Args:
+        data: Raw draft content or metadata bytes
+
+    Returns:
+        The enveloped compressed payload, or the data unchanged when it is
+        below the threshold or compression does not make it smaller
+    """
+    codec = _codec_for(len(data))
+    if codec == CODEC_ZLIB:
+        compressed = zlib.compress(data, config("DRAFT_ZLIB_LEVEL", default="6", cast=int))
+    elif codec == CODEC_ZSTD:
+        compressed = zstandard.ZstdCompressor(level=config("DRAFT_ZSTD_LEVEL", default="3", cast=int)).compress(data)
+    else:
+        return data
+
+    if HEADER_SIZE + len(compressed) >= len(data):
+        return data
+    return MAGIC + bytes([ENVELOPE_VERSION, codec]) + compressed
+
+def decode_payload(data: bytes) -> bytes:
+    """Undo encode_payload; data without the envelope header is returned as is
+
+    Raises:
+        ValueError: If the envelope version or codec is not supported here
+    """
+    if not data.startswith(MAGIC):
+        return data
+
+    version, codec = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported draft envelope version {version}")
+    payload = data[HEADER_SIZE:]
+    if codec == CODEC_NONE:
+        return payload
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Draft is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unsupported draft codec {codec}")
@@ -0,0 +1,144 @@
+# secret_ai_writer/ai_core/encryption_keys.py
+
+import base64
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from decouple import config
+from .metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+class EncryptionKeyProvider:
+    """Caches the Secret Network tx encryption key for one chain endpoint
+
+    The key (the consensus IO public key) is fetched on first use and reused
+    until the TTL expires. Data is sealed with the SDK's EncryptionUtils for
+    that key and the client's encryption seed, so this client can open it
+    again. If the cached key turns out to be malformed, encrypt drops it and
+    retries once with a freshly fetched one; any other error is raised as is.
+    Decrypt failures also leave the cached key alone.
+    """
+
+    def __init__(self, chain, ttl: Optional[float] = None):
+        """
+        Args:
+            chain: LCDClient the key belongs to
+            ttl: Seconds to reuse a fetched key (defaults to ENCRYPTION_KEY_TTL)
+        """
+        if ttl is None:
+            ttl = config("ENCRYPTION_KEY_TTL", default="3600", cast=float)
+        self.chain = chain
+        self.ttl = ttl
+        self._key = None
+        self._utils = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def get_key(self) -> Any:
+        """Return the cached encryption key, fetching it if missing or expired
+
+        Raises:
+            ValueError: If no SDK method returned a key
+        """
+        with self._lock:
+            if self._key is not None and time.time() - self._fetched_at < self.ttl:
+                self.hits += 1
+                return self._key
+
+            self.misses += 1
+            with stage_timer("chain.key_fetch"):
+                key = self._fetch_key()
+            if not key:
+                self.failures += 1
+                raise ValueError("Could not obtain encryption key")
+
+            self._key = key
+            self._fetched_at = time.time()
+            return key
+
+    def _fetch_key(self) -> Any:
+        """Query the chain for the key with registration.consensus_io_pub_key"""
+        try:
+            return self.chain.registration.consensus_io_pub_key()
+        except Exception as e:
+            logger.warning(f"Failed to get encryption key with registration.consensus_io_pub_key: {str(e)}")
+            return None
+
+    def invalidate(self) -> None:
+        """Drop the cached key so the next use fetches a fresh one"""
+        with self._lock:
+            if self._key is not None:
+                self.refreshes += 1
+            self._key = None
+            self._utils = None
+
+    def _encryption_utils(self) -> Any:
+        """Return EncryptionUtils for the cached key and the client's encryption seed"""
+        from secret_sdk.util.encrypt_utils import EncryptionUtils
+
+        key = self.get_key()
+        with self._lock:
+            if self._utils is None or self._utils.consensus_io_pubkey != key:
+                self._utils = EncryptionUtils(key, self.chain.encrypt_utils.seed)
+            return self._utils
+
+    def encrypt(self, data: bytes) -> bytes:
+        """Encrypt data with the cached key, refreshing it once if the key is malformed
+
+        Returns:
+            The nonce, the client's public key and the ciphertext, as the SDK lays them out
+        """
+        try:
+            utils = self._encryption_utils()
+            return bytes(utils.encrypt("", base64.b64encode(data).decode()))
+        except ValueError as e:
+            # X25519 rejects a key of the wrong size; other errors are not the key's fault
+            logger.warning(f"Encryption with cached key failed, refreshing key: {str(e)}")
+            self.invalidate()
+            utils = self._encryption_utils()
+            return bytes(utils.encrypt("", base64.b64encode(data).decode()))
+
+    def decrypt(self, encrypted_data: bytes) -> bytes:
+        """Decrypt data sealed by encrypt(); a failure is raised without touching the cached key"""
+        # Nonce, public key and at least the SIV tag; the SDK returns b"" for an empty ciphertext
+        if len(encrypted_data) < 80:
+            raise ValueError("Encrypted data is too short")
+        nonce, ciphertext = list(encrypted_data[:32]), bytes(encrypted_data[64:])
+        return base64.b64decode(self._encryption_utils().decrypt(ciphertext, nonce))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return key cache hit/miss/refresh counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "cached": self._key is not None
+        }
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+def get_key_provider(chain) -> EncryptionKeyProvider:
+    """Return the process-wide key provider for a chain endpoint
+
+    PrivateMetadata, ConfidentialWriter and ContractManager share one provider
+    per (chain id, LCD URL), so the key is fetched once for all of them.
+    """
+    provider_key = (getattr(chain, "chain_id", None), getattr(chain, "url", None))
+    with _providers_lock:
+        provider = _providers.get(provider_key)
+        if provider is None:
+            provider = _providers[provider_key] = EncryptionKeyProvider(chain)
+        return provider
+
+def key_provider_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every key provider in the process, keyed by chain id and URL"""
+    with _providers_lock:
+        return {f"{chain_id}@{url}": provider.stats() for (chain_id, url), provider in _providers.items()}
@@ -0,0 +1,166 @@
+# secret_ai_writer/ai_core/metrics.py
+
+import bisect
+import contextlib
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from decouple import config
+
+# Upper bounds (seconds) of the stage latency histograms
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+METRIC_NAME = "secret_ai_writer_stage_seconds"
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in
+
+        Samples above the top bucket report its bound rather than infinity,
+        which json.dumps would write as the invalid token Infinity.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[f"le_{bound}"] = cumulative
+        buckets["le_inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets
+        }
+
+class _StageTimer:
+    """Context manager recording how long a stage took, and whether it raised"""
+
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.start,
+                              "error" if exc_type is not None else "ok")
+        return False
+
+# Shared no-op timer handed out while metrics are disabled
+_NULL_TIMER = contextlib.nullcontext()
+
+class MetricsRegistry:
+    """Per-stage latency histograms for one process
+
+    Stages are dotted names such as "writer.llm" or "drafts.query"; each is
+    split by outcome ("ok" or "error"). When disabled, timers are a shared
+    no-op and nothing is recorded.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        """
+        Args:
+            enabled: Record timings (defaults to METRICS_ENABLED)
+        """
+        if enabled is None:
+            enabled = config("METRICS_ENABLED", default="True").lower() == "true"
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage: str):
+        """Return a context manager timing one run of a stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float, outcome: str = "ok") -> None:
+        """Record one run of a stage"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get((stage, outcome))
+            if histogram is None:
+                histogram = self._histograms[(stage, outcome)] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self) -> None:
+        """Forget every recorded timing"""
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return histograms as {stage: {outcome: histogram}}"""
+        with self._lock:
+            snapshot = {}
+            for (stage, outcome), histogram in sorted(self._histograms.items()):
+                snapshot.setdefault(stage, {})[outcome] = histogram.to_dict()
+            return snapshot
+
+    def prometheus_text(self) -> str:
+        """Render the histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each stage of a request",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        with self._lock:
+            for (stage, outcome), histogram in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",outcome="{outcome}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry used by the writers and the bridge
+registry = MetricsRegistry()
+
+def stage_timer(stage: str):
+    """Time a stage in the process-wide registry
+
+    Usage:
+        with stage_timer("writer.llm"):
+            response = llm.invoke(messages)
+    """
+    return registry.timer(stage)
+
+def metrics_snapshot() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Return the process-wide stage histograms as JSON-serializable data"""
+    return registry.snapshot()
+
+def prometheus_text() -> str:
+    """Return the process-wide stage histograms in Prometheus text format"""
+    return registry.prometheus_text()
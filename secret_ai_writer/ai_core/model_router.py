@@ -0,0 +1,164 @@
+# secret_ai_writer/ai_core/model_router.py
+
+import contextlib
+import math
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from decouple import config
+from .chunking import estimate_tokens
+from .telemetry import get_model_stats
+
+class Route(NamedTuple):
+    """The model picked for one request"""
+    model: str
+    llm: Any
+    # Model the rules chose before any SLO fallback; cache keys use it
+    preferred: str
+    reason: str
+
+    @property
+    def fallback(self) -> bool:
+        return self.model != self.preferred
+
+def _parse_task_models(value: str) -> Dict[str, str]:
+    """Parse "grammar=model-a,casual=model-b" into a task -> model mapping"""
+    task_models = {}
+    for pair in value.split(","):
+        if "=" in pair:
+            task, model = pair.split("=", 1)
+            task_models[task.strip()] = model.strip()
+    return task_models
+
+class ModelRouter:
+    """Picks the model for each generate/enhance request
+
+    Rules run in order: a model configured for the enhancement type, then
+    the small model for short prompts, then the primary model. If the chosen
+    model is saturated (too many requests in flight, or its recent latency
+    with the current queue would miss the SLO), the request falls back to
+    the small model instead.
+    """
+
+    def __init__(self, llms: Dict[str, Any], primary: str, small: Optional[str] = None,
+                 task_models: Optional[Dict[str, str]] = None, short_prompt_tokens: int = 0,
+                 slo_seconds: float = 0, max_in_flight: int = 0, model_parallel: int = 1):
+        """
+        Args:
+            llms: Chat model per model name, including the primary and small models
+            primary: Model used when no rule applies
+            small: Model for short prompts and SLO fallback
+            task_models: Model per enhancement type
+            short_prompt_tokens: Prompts up to this many tokens go to the small model (0 disables)
+            slo_seconds: Latency target; a model predicted to miss it is skipped (0 disables)
+            max_in_flight: Requests a model may have in flight before it is skipped (0 disables)
+            model_parallel: Requests Ollama serves at once per model, used to predict queueing
+        """
+        self.llms = llms
+        self.primary = primary
+        self.small = small
+        self.task_models = task_models or {}
+        self.short_prompt_tokens = short_prompt_tokens
+        self.slo_seconds = slo_seconds
+        self.max_in_flight = max_in_flight
+        self.model_parallel = max(1, model_parallel)
+        self._in_flight = {model: 0 for model in llms}
+        self._routed = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, primary: str, primary_llm: Any,
+                    build_llm: Callable[[str], Any]) -> Optional["ModelRouter"]:
+        """Build a router from the ROUTER_* settings, or None when only one model is configured
+
+        Args:
+            primary: The OLLAMA_MODEL name
+            primary_llm: Chat model already built for it
+            build_llm: Builds the chat model for another model name
+        """
+        small = config("ROUTER_SMALL_MODEL", default="") or None
+        task_models = _parse_task_models(config("ROUTER_TASK_MODELS", default=""))
+        models = {model for model in [small, *task_models.values()] if model and model != primary}
+        if not models:
+            return None
+
+        llms = {primary: primary_llm}
+        llms.update({model: build_llm(model) for model in sorted(models)})
+        return cls(
+            llms,
+            primary,
+            small=small,
+            task_models=task_models,
+            short_prompt_tokens=config("ROUTER_SHORT_PROMPT_TOKENS", default="200", cast=int),
+            slo_seconds=config("ROUTER_SLO_SECONDS", default="0", cast=float),
+            max_in_flight=config("ROUTER_MAX_IN_FLIGHT", default="0", cast=int),
+            model_parallel=config("ROUTER_MODEL_PARALLEL", default="1", cast=int)
+        )
+
+    def predicted_latency(self, model: str) -> Optional[float]:
+        """Predict a new request's latency on a model from its warm average and queue
+
+        Ollama serves model_parallel requests at a time, so a new request
+        waits for the batches ahead of it. None until the model has served
+        a request.
+        """
+        average = get_model_stats(model).stats()["avg_warm_processing_time"]
+        if average is None:
+            return None
+        with self._lock:
+            in_flight = self._in_flight.get(model, 0)
+        return average * math.ceil((in_flight + 1) / self.model_parallel)
+
+    def saturated(self, model: str) -> bool:
+        """Whether a model has too much in flight or is predicted to miss the SLO"""
+        if self.max_in_flight:
+            with self._lock:
+                if self._in_flight.get(model, 0) >= self.max_in_flight:
+                    return True
+        if self.slo_seconds:
+            predicted = self.predicted_latency(model)
+            return predicted is not None and predicted > self.slo_seconds
+        return False
+
+    def route(self, prompt: str, task: Optional[str] = None) -> Route:
+        """Pick the model for a request
+
+        Args:
+            prompt: Prompt to send
+            task: Enhancement type, or None for free-form generation
+
+        Returns:
+            Route with the model, its chat model, the rule-based choice and the reason
+        """
+        if task in self.task_models:
+            preferred, reason = self.task_models[task], "task"
+        elif self.small and self.short_prompt_tokens and estimate_tokens(prompt) <= self.short_prompt_tokens:
+            preferred, reason = self.small, "short_prompt"
+        else:
+            preferred, reason = self.primary, "default"
+
+        model = preferred
+        if self.small and preferred != self.small and self.saturated(preferred):
+            model, reason = self.small, "slo_fallback"
+
+        with self._lock:
+            self._routed[(model, reason)] = self._routed.get((model, reason), 0) + 1
+        return Route(model, self.llms[model], preferred, reason)
+
+    @contextlib.contextmanager
+    def slot(self, model: str):
+        """Count a request as in flight on a model for the duration of the block"""
+        with self._lock:
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[model] -= 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return in-flight requests and routing counts per model"""
+        with self._lock:
+            stats = {model: {"in_flight": in_flight, "routed": {}} for model, in_flight in self._in_flight.items()}
+            for (model, reason), count in self._routed.items():
+                stats[model]["routed"][reason] = count
+        return stats
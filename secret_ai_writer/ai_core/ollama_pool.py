@@ -0,0 +1,354 @@
+# secret_ai_writer/ai_core/ollama_pool.py
+
+import hashlib
+import logging
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in each backend's moving latency average
+_EWMA_ALPHA = 0.2
+
+# Prompt prefixes whose last backend the pool remembers
+_MAX_AFFINITY_KEYS = 1024
+
+class Backend:
+    """One Ollama endpoint with its load, health and latency statistics"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.ejections = 0
+        self.affinity_hits = 0
+        self.avg_latency = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retries": self.retries,
+            "ejections": self.ejections,
+            "affinity_hits": self.affinity_hits,
+            "avg_latency": round(self.avg_latency, 3) if self.avg_latency is not None else None
+        }
+
+class OllamaBackendPool:
+    """A set of Ollama endpoints serving the same models
+
+    Each request goes to the healthy backend with the fewest outstanding
+    requests. A backend is ejected after `eject_after` consecutive failed
+    requests or health probes, and re-admitted by its next successful probe.
+    If every backend is ejected, requests still go to the least loaded one
+    rather than failing outright.
+
+    Requests carrying an affinity key (their prompt prefix) go back to the
+    backend that last served that key, as long as it is at most
+    `affinity_slack` requests busier than the least loaded one, so Ollama
+    finds the prefix already evaluated in its KV cache.
+
+    With hedging enabled, a request that fails fast is retried once on
+    another backend, and one that is slow is duplicated there.
+    """
+
+    def __init__(self, urls: Sequence[str], eject_after: int = 3, hedge_after: float = 0,
+                 probe_timeout: float = 2.0, affinity_slack: Optional[int] = 1,
+                 max_concurrency: Optional[int] = None):
+        """
+        Args:
+            urls: Ollama base URLs
+            eject_after: Consecutive failures that take a backend out of rotation
+            hedge_after: Seconds after which a slow request is duplicated on
+                another backend, the first answer winning (0 disables hedging)
+            probe_timeout: Timeout of one health probe, in seconds
+            affinity_slack: Extra outstanding requests tolerated to keep a prompt
+                prefix on its backend (None disables prefix affinity)
+            max_concurrency: Workers running hedged requests; match the caller's
+                concurrency limit so that requests queue rather than hedge
+        """
+        if not urls:
+            raise ValueError("OllamaBackendPool needs at least one URL")
+        self.backends = [Backend(url.rstrip("/")) for url in urls]
+        self.eject_after = eject_after
+        self.hedge_after = hedge_after
+        self.probe_timeout = probe_timeout
+        self.affinity_slack = affinity_slack
+        self.max_concurrency = max_concurrency
+        self._affinity = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._probe_thread = None
+        self._hedge_executor = None
+
+    @classmethod
+    def from_config(cls) -> Optional["OllamaBackendPool"]:
+        """Build a pool from OLLAMA_BASE_URLS, or None when it lists fewer than two endpoints"""
+        urls = [url.strip() for url in config("OLLAMA_BASE_URLS", default="").split(",") if url.strip()]
+        if len(urls) < 2:
+            return None
+        pool = cls(
+            urls,
+            eject_after=config("OLLAMA_EJECT_AFTER", default="3", cast=int),
+            hedge_after=config("OLLAMA_HEDGE_AFTER", default="0", cast=float),
+            affinity_slack=config("OLLAMA_PREFIX_AFFINITY_SLACK", default="1", cast=int)
+            if config("OLLAMA_PREFIX_AFFINITY", default="True").lower() == "true" else None,
+            max_concurrency=config("LLM_MAX_CONCURRENCY", default="4", cast=int)
+        )
+        interval = config("OLLAMA_HEALTH_INTERVAL", default="10", cast=float)
+        if interval > 0:
+            pool.start_health_checks(interval)
+        return pool
+
+    @property
+    def urls(self) -> List[str]:
+        return [backend.url for backend in self.backends]
+
+    def acquire(self, exclude: Optional[Backend] = None, affinity: Optional[str] = None) -> Backend:
+        """Pick a healthy backend and count the request against it
+
+        Args:
+            exclude: Backend not to pick, unless it is the only one
+            affinity: Prompt prefix key; see the class docstring
+        """
+        with self._lock:
+            candidates = [b for b in self.backends if b is not exclude] or self.backends
+            healthy = [b for b in candidates if b.healthy] or candidates
+            # Ties go to the backend that has recently been fastest
+            backend = min(healthy, key=lambda b: (b.outstanding, b.avg_latency or 0))
+            if affinity is not None and self.affinity_slack is not None:
+                previous = self._affinity.pop(affinity, None)
+                if previous in healthy and previous.outstanding <= backend.outstanding + self.affinity_slack:
+                    backend = previous
+                    backend.affinity_hits += 1
+                self._affinity[affinity] = backend
+                if len(self._affinity) > _MAX_AFFINITY_KEYS:
+                    self._affinity.popitem(last=False)
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, latency: Optional[float], error: Optional[Exception] = None) -> None:
+        """Record the outcome of a request started with acquire()"""
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.consecutive_failures = 0
+                if latency is not None:
+                    backend.avg_latency = latency if backend.avg_latency is None else \
+                        backend.avg_latency + _EWMA_ALPHA * (latency - backend.avg_latency)
+                return
+            backend.errors += 1
+            self._record_failure(backend, f"request failed: {str(error)}")
+
+    def _record_failure(self, backend: Backend, reason: str) -> None:
+        """Count a failure against a backend, ejecting it after too many in a row (lock held)"""
+        backend.consecutive_failures += 1
+        if backend.healthy and backend.consecutive_failures >= self.eject_after:
+            backend.healthy = False
+            backend.ejections += 1
+            logger.warning(f"Ejected Ollama backend {backend.url}: {reason}")
+
+    def probe(self, backend: Backend) -> bool:
+        """Check one backend with GET /api/tags, ejecting or re-admitting it"""
+        try:
+            with urllib.request.urlopen(f"{backend.url}/api/tags", timeout=self.probe_timeout) as response:
+                ok = response.status == 200
+        except Exception as e:
+            ok = False
+            reason = str(e)
+        else:
+            reason = "health probe failed"
+
+        with self._lock:
+            if ok:
+                backend.consecutive_failures = 0
+                if not backend.healthy:
+                    backend.healthy = True
+                    logger.info(f"Re-admitted Ollama backend {backend.url}")
+            else:
+                self._record_failure(backend, reason)
+        return ok
+
+    def start_health_checks(self, interval: float) -> None:
+        """Probe every backend every interval seconds from a background thread"""
+        def run():
+            while not self._stopping.wait(interval):
+                for backend in self.backends:
+                    self.probe(backend)
+
+        self._probe_thread = threading.Thread(target=run, name="ollama-health", daemon=True)
+        self._probe_thread.start()
+
+    def call(self, request: Callable[[Backend], Any], affinity: Optional[str] = None) -> Any:
+        """Run a blocking request on the backend acquire() picks, hedging it when enabled"""
+        if not self.hedge_after or len(self.backends) < 2:
+            return self._timed(request, self.acquire(affinity=affinity))
+        return self._hedged(request, affinity)
+
+    def _timed(self, request: Callable[[Backend], Any], backend: Backend) -> Any:
+        start = time.perf_counter()
+        try:
+            result = request(backend)
+        except Exception as e:
+            self.release(backend, None, e)
+            raise
+        self.release(backend, time.perf_counter() - start)
+        return result
+
+    def _hedged(self, request: Callable[[Backend], Any], affinity: Optional[str] = None) -> Any:
+        """Send the request to a second backend if the first has failed or not answered in time"""
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                          thread_name_prefix="ollama-hedge")
+        first = self.acquire(affinity=affinity)
+        started = threading.Event()
+
+        def run_first():
+            started.set()
+            return self._timed(request, first)
+
+        pending = {self._hedge_executor.submit(run_first): first}
+        # The hedge timer starts once the request runs, not while it waits for a free worker
+        started.wait()
+        done, _ = wait(pending, timeout=self.hedge_after)
+
+        # First success wins; a slower request still running is discarded, one still queued is cancelled
+        second = error = None
+        second_is_retry = False
+        while True:
+            for future in done:
+                backend = pending.pop(future)
+                if future.exception() is None:
+                    if backend is second and not second_is_retry:
+                        with self._lock:
+                            backend.hedge_wins += 1
+                    for other, other_backend in pending.items():
+                        if other.cancel():
+                            self.release(other_backend, None)
+                    return future.result()
+                error = future.exception()
+            if second is None:
+                # No answer in time is a hedge; a fast error is a retry
+                second_is_retry = bool(done)
+                second = self.acquire(exclude=first)
+                with self._lock:
+                    if second_is_retry:
+                        second.retries += 1
+                    else:
+                        second.hedges += 1
+                pending[self._hedge_executor.submit(self._timed, request, second)] = second
+            if not pending:
+                raise error
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+    async def acall(self, request: Callable[[Backend], Any], affinity: Optional[str] = None) -> Any:
+        """Run an async request on the backend acquire() picks (not hedged)"""
+        backend = self.acquire(affinity=affinity)
+        start = time.perf_counter()
+        try:
+            result = await request(backend)
+        except Exception as e:
+            self.release(backend, None, e)
+            raise
+        self.release(backend, time.perf_counter() - start)
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return load, health and latency statistics per backend URL"""
+        with self._lock:
+            return {backend.url: backend.stats() for backend in self.backends}
+
+    def close(self) -> None:
+        """Stop the health probes and the hedging workers"""
+        self._stopping.set()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+
+def prefix_key(messages: Any) -> Optional[str]:
+    """Key a chat request by its prompt prefix: the system message and the first paragraph of the prompt
+
+    Enhancement templates put their instruction in that first paragraph, so
+    requests of one type share a key. Returns None for anything but a list of
+    chat messages.
+    """
+    if not isinstance(messages, (list, tuple)) or not messages:
+        return None
+    parts = []
+    for message in messages:
+        content = getattr(message, "content", None)
+        if not isinstance(content, str):
+            return None
+        if getattr(message, "type", None) != "system":
+            parts.append(content.split("\n\n", 1)[0])
+            break
+        parts.append(content)
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
+
+class PooledChatModel:
+    """Chat model spreading calls over an OllamaBackendPool
+
+    Offers the parts of the ChatOllama interface SecretAIWriter uses (invoke,
+    ainvoke, stream, batch_as_completed), each call going to the backend the
+    pool picks.
+    """
+
+    def __init__(self, pool: OllamaBackendPool, llms: Dict[str, Any]):
+        """
+        Args:
+            pool: Backend pool choosing where each call goes
+            llms: Chat model per backend URL, all for the same model
+        """
+        self.pool = pool
+        self.llms = llms
+
+    def invoke(self, messages: Any, *args, **kwargs) -> Any:
+        return self.pool.call(lambda backend: self.llms[backend.url].invoke(messages, *args, **kwargs),
+                              prefix_key(messages))
+
+    async def ainvoke(self, messages: Any, *args, **kwargs) -> Any:
+        return await self.pool.acall(lambda backend: self.llms[backend.url].ainvoke(messages, *args, **kwargs),
+                                     prefix_key(messages))
+
+    def stream(self, messages: Any, *args, **kwargs) -> Iterator[Any]:
+        backend = self.pool.acquire(affinity=prefix_key(messages))
+        start = time.perf_counter()
+        error = None
+        try:
+            yield from self.llms[backend.url].stream(messages, *args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Also runs when the caller stops reading early
+            self.pool.release(backend, None if error else time.perf_counter() - start, error)
+
+    def batch_as_completed(self, inputs: Sequence[Any], config: Optional[Dict[str, Any]] = None, *,
+                           return_exceptions: bool = False) -> Iterator[Tuple[int, Any]]:
+        """Invoke every input through the pool, yielding (index, output) as each completes"""
+        max_workers = (config or {}).get("max_concurrency") or len(inputs) or 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.invoke, messages): index for index, messages in enumerate(inputs)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None and not return_exceptions:
+                        raise future.exception()
+                    yield futures[future], future.exception() or future.result()
@@ -0,0 +1,68 @@
+# secret_ai_writer/ai_core/prompt_templates.py
+
+import functools
+from typing import Tuple
+
+# Ollama reuses the KV cache for the longest prefix a prompt shares with one it
+# has already evaluated. Every enhancement type therefore shares one system
+# prompt, and the type-specific instruction follows it, so requests of any type
+# reuse the system prompt and requests of the same type reuse the instruction too.
+ENHANCEMENT_SYSTEM_INSTRUCTION = (
+    "You are a writing enhancement specialist.\n"
+    "Provide the improved version without explaining your changes unless asked.\n"
+    "Keep your response concise. Just return the enhanced text."
+)
+
+ENHANCEMENT_INSTRUCTIONS = {
+    "grammar": "Improve the grammar and correct any errors in this text while preserving meaning:",
+    "creativity": "Make this text more creative and engaging while preserving key points:",
+    "conciseness": "Make this text more concise without losing important information:",
+    "professional": "Make this text more professional and formal:",
+    "casual": "Make this text more casual and conversational:"
+}
+
+DEFAULT_ENHANCEMENT_INSTRUCTION = "Improve this text while maintaining its core meaning:"
+
+class EnhancementTemplate:
+    """Precompiled prompt for one enhancement type
+
+    The fixed part (system prompt, focus and instruction) is built once and is
+    byte-for-byte identical on every request, ahead of anything that varies,
+    so only the draft itself has to be evaluated when the prefix is cached.
+    """
+
+    def __init__(self, enhancement_type: str, instruction: str):
+        self.enhancement_type = enhancement_type
+        self.system_instruction = ENHANCEMENT_SYSTEM_INSTRUCTION
+        self.prefix = f"Focus: {enhancement_type}.\n{instruction}\n\n"
+
+    def render(self, draft_text: str, context: str = "") -> Tuple[str, str]:
+        """Return the (prompt, system_instruction) pair for a draft
+
+        Args:
+            draft_text: Text to improve
+            context: Optional preceding text shown to the model for continuity only
+        """
+        if context:
+            return (f"{self.prefix}For context only, the text follows this passage. "
+                    f"Do not include it in your response:\n{context}\n\nText to improve:\n{draft_text}",
+                    self.system_instruction)
+        return self.prefix + draft_text, self.system_instruction
+
+ENHANCEMENT_TEMPLATES = {
+    enhancement_type: EnhancementTemplate(enhancement_type, instruction)
+    for enhancement_type, instruction in ENHANCEMENT_INSTRUCTIONS.items()
+}
+
+@functools.lru_cache(maxsize=64)
+def _custom_template(enhancement_type: str) -> EnhancementTemplate:
+    return EnhancementTemplate(enhancement_type, DEFAULT_ENHANCEMENT_INSTRUCTION)
+
+def enhancement_template(enhancement_type: str) -> EnhancementTemplate:
+    """Return the precompiled template for an enhancement type
+
+    Types outside the built-in five get the generic instruction; their
+    templates are compiled on first use and kept in a small LRU.
+    """
+    template = ENHANCEMENT_TEMPLATES.get(enhancement_type)
+    return template if template is not None else _custom_template(enhancement_type)
@@ -1,13 +1,17 @@
-from secret_sdk.client.lcd import LCDClient
-from secret_sdk.key.mnemonic import MnemonicKey
-from langchain_core.messages import HumanMessage, SystemMessage
 from decouple import config
+import asyncio
 import base64
 import json
 import logging
 import hashlib
 import time
-from typing import Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from .chain_clients import get_chain_client
+from .draft_cache import get_draft_cache
+from .draft_codec import decode_payload, encode_payload
+from .encryption_keys import get_key_provider
+from .metrics import stage_timer
 
 logger = logging.getLogger(__name__)
 
@@ -15,21 +19,18 @@ class ConfidentialWriter:
     def __init__(self):
         """Initialize the Secret Network client for confidential AI writing"""
         try:
-            # Initialize connection to Secret Network
-            self.chain = LCDClient(
-                chain_id=config("CHAIN_ID", default="pulsar-3"),
-                url=config("LCD_URL", default="https://lcd.testnet.secretsaturn.net")
-            )
-            
-            # Set up wallet from mnemonic if provided
+            # Initialize connection to Secret Network through the shared LCD client;
+            # the wallet is derived from the mnemonic, if provided, on first use
             mnemonic = config("MNEMONIC", default=None)
-            if mnemonic:
-                self.wallet = self.chain.wallet(MnemonicKey(mnemonic=mnemonic))
-                logger.info("Wallet initialized successfully")
+            self.chain_client = get_chain_client(mnemonic=mnemonic)
+            self.chain = self.chain_client.lcd
             
             # Store contract address
             self.contract_address = config("CONTRACT_ADDRESS", default=None)
             
+            # Decrypted drafts are served from memory until they expire or are overwritten
+            self.draft_cache = get_draft_cache(self.chain, self.contract_address)
+            
             # Flag to indicate if we're in development mode
             self.dev_mode = config("DEV_MODE", default="False").lower() == "true"
             
@@ -41,6 +42,14 @@ class ConfidentialWriter:
             self.dev_mode = True
             logger.info("Falling back to development mode")
     
+    @property
+    def wallet(self):
+        """Wallet from the shared chain client, derived from the mnemonic on first use"""
+        chain_client = getattr(self, 'chain_client', None)
+        if chain_client is None or not chain_client.has_wallet:
+            raise AttributeError("wallet")
+        return chain_client.wallet
+    
     def get_wallet_address(self) -> str:
         """Return the wallet address if wallet is initialized
         
@@ -86,42 +95,50 @@ class ConfidentialWriter:
             if not self.contract_address:
                 raise ValueError("Contract address not set in environment variables")
             
-            # Encrypt content
-            encrypted_content = self._encrypt_data(content.encode())
+            # Compress (when large enough) and encrypt content
+            encrypted_content = self._encrypt_data(encode_payload(content.encode()))
             
             # Encrypt metadata if provided
             encrypted_metadata = ""
             if metadata:
                 metadata_json = json.dumps(metadata)
-                encrypted_metadata = self._encrypt_data(metadata_json.encode())
+                encrypted_metadata = self._encrypt_data(encode_payload(metadata_json.encode()))
+            
+            # Drop the cached draft now, so reads racing the transaction are not cached,
+            # and again once it has run
+            owner = self.wallet.key.acc_address
+            self.draft_cache.invalidate(owner)
             
             # Try different methods of contract execution based on SDK version
-            try:
-                # Method 1: Original method
-                tx_result = self.wallet.execute_contract(
-                    contract_address=self.contract_address,
-                    msg={
-                        "store_draft": {
-                            "encrypted_content": encrypted_content,
-                            "encrypted_metadata": encrypted_metadata
-                        }
-                    },
-                    gas_prices="0.25uscrt",
-                    gas=config("GAS", default="200000", cast=int)
-                )
-            except AttributeError:
-                # Method 2: Try with execute_contracts
-                tx_result = self.wallet.execute_contracts(
-                    [self.contract_address],
-                    [{
-                        "store_draft": {
-                            "encrypted_content": encrypted_content,
-                            "encrypted_metadata": encrypted_metadata
-                        }
-                    }],
-                    gas_prices="0.25uscrt",
-                    gas=config("GAS", default="200000", cast=int)
-                )
+            with stage_timer("drafts.execute"):
+                try:
+                    # Method 1: Original method
+                    tx_result = self.wallet.execute_contract(
+                        contract_address=self.contract_address,
+                        msg={
+                            "store_draft": {
+                                "encrypted_content": encrypted_content,
+                                "encrypted_metadata": encrypted_metadata
+                            }
+                        },
+                        gas_prices="0.25uscrt",
+                        gas=config("GAS", default="200000", cast=int)
+                    )
+                except AttributeError:
+                    # Method 2: Try with execute_contracts
+                    tx_result = self.wallet.execute_contracts(
+                        [self.contract_address],
+                        [{
+                            "store_draft": {
+                                "encrypted_content": encrypted_content,
+                                "encrypted_metadata": encrypted_metadata
+                            }
+                        }],
+                        gas_prices="0.25uscrt",
+                        gas=config("GAS", default="200000", cast=int)
+                    )
+                finally:
+                    self.draft_cache.invalidate(owner)
             
             logger.info(f"Stored draft successfully, tx hash: {tx_result.txhash}")
             return {"tx_hash": tx_result.txhash, "success": True}
@@ -136,6 +153,11 @@ class ConfidentialWriter:
                 "success": True
             }
     
+    async def astore_draft(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async version of store_draft, running the blocking SDK calls on the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.store_draft, content, metadata)
+    
     def retrieve_draft(self, user_address: Optional[str] = None) -> Dict[str, Any]:
         """Retrieve and decrypt a draft for the given user
         
@@ -162,33 +184,14 @@ class ConfidentialWriter:
             if not user_address:
                 raise ValueError("No user address provided and no wallet initialized")
             
-            # Query contract for encrypted draft
-            query_result = self.chain.wasm.contract_query(
-                self.contract_address,
-                {"get_draft": {"address": user_address}}
-            )
-            
-            if not query_result or "encrypted_content" not in query_result:
-                return {"content": "", "metadata": {}, "found": False}
-            
-            # Decrypt content
-            decrypted_content = ""
-            if query_result.get("encrypted_content"):
-                content_bytes = base64.b64decode(query_result["encrypted_content"])
-                decrypted_content = self._decrypt_data(content_bytes).decode()
+            cached = self.draft_cache.get(user_address)
+            if cached is not None:
+                return cached
+            version = self.draft_cache.version(user_address)
             
-            # Decrypt metadata if present
-            metadata = {}
-            if query_result.get("encrypted_metadata"):
-                metadata_bytes = base64.b64decode(query_result["encrypted_metadata"])
-                metadata_str = self._decrypt_data(metadata_bytes).decode()
-                metadata = json.loads(metadata_str)
-            
-            return {
-                "content": decrypted_content,
-                "metadata": metadata,
-                "found": True
-            }
+            draft = self._decrypt_draft(self._query_draft(user_address))
+            self.draft_cache.put(user_address, draft, version)
+            return draft
             
         except Exception as e:
             logger.error(f"Failed to retrieve draft: {str(e)}")
@@ -201,6 +204,130 @@ class ConfidentialWriter:
                 "found": True
             }
     
+    async def aretrieve_draft(self, user_address: Optional[str] = None) -> Dict[str, Any]:
+        """Async version of retrieve_draft, running the blocking SDK calls on the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.retrieve_draft, user_address)
+    
+    def retrieve_drafts(self, addresses: Iterable[str], max_concurrency: Optional[int] = None,
+                        decrypt_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Retrieve and decrypt drafts for many addresses, yielding each as it completes
+        
+        Cached drafts are answered first. Contract queries for the rest run on a
+        bounded pool sharing the pooled LCD client, and each result is handed to
+        a separate decryption pool, so drafts stream back while slower queries
+        are still in flight. A failed address is reported and the run goes on.
+        
+        Args:
+            addresses: Secret Network addresses to retrieve drafts for; duplicates are fetched once
+            max_concurrency: Maximum parallel contract queries (defaults to DRAFT_QUERY_CONCURRENCY)
+            decrypt_workers: Decryption worker threads (defaults to DRAFT_DECRYPT_WORKERS)
+            
+        Yields:
+            {"type": "draft", "address": ..., "content": ..., "metadata": ..., "found": ...} or
+            {"type": "draft", "address": ..., "error": ...} per address, in completion
+            order, then a final {"type": "summary", ...} record with the counts
+        """
+        start_time = time.time()
+        addresses = list(dict.fromkeys(addresses))
+        counts = {"requested": len(addresses), "retrieved": 0, "failed": 0, "cache_hits": 0}
+        
+        if self.dev_mode:
+            for address in addresses:
+                counts["retrieved"] += 1
+                yield {"type": "draft", "address": address, **self.retrieve_draft(address)}
+        else:
+            yield from self._stream_drafts(addresses, counts, max_concurrency, decrypt_workers)
+        
+        yield {"type": "summary", **counts, "elapsed": round(time.time() - start_time, 3)}
+    
+    def _stream_drafts(self, addresses: List[str], counts: Dict[str, int], max_concurrency: Optional[int],
+                       decrypt_workers: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """Query and decrypt drafts on two pools, yielding records as they complete"""
+        query_pool = ThreadPoolExecutor(
+            max_workers=max_concurrency or config("DRAFT_QUERY_CONCURRENCY", default="16", cast=int),
+            thread_name_prefix="draft-query"
+        )
+        decrypt_pool = ThreadPoolExecutor(
+            max_workers=decrypt_workers or config("DRAFT_DECRYPT_WORKERS", default="4", cast=int),
+            thread_name_prefix="draft-decrypt"
+        )
+        # future -> (stage, address, cache version when the read began)
+        pending = {}
+        
+        try:
+            for address in addresses:
+                cached = self.draft_cache.get(address)
+                if cached is not None:
+                    counts["cache_hits"] += 1
+                    counts["retrieved"] += 1
+                    yield {"type": "draft", "address": address, **cached}
+                    continue
+                version = self.draft_cache.version(address)
+                pending[query_pool.submit(self._query_draft, address)] = ("query", address, version)
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, address, version = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to retrieve draft for {address}: {str(e)}")
+                        counts["failed"] += 1
+                        yield {"type": "draft", "address": address, "error": str(e)}
+                        continue
+                    
+                    if stage == "query":
+                        pending[decrypt_pool.submit(self._decrypt_draft, result)] = ("decrypt", address, version)
+                    else:
+                        self.draft_cache.put(address, result, version)
+                        counts["retrieved"] += 1
+                        yield {"type": "draft", "address": address, **result}
+        finally:
+            # Nothing keeps running if the consumer stops early
+            query_pool.shutdown(wait=False, cancel_futures=True)
+            decrypt_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _query_draft(self, user_address: str) -> Optional[Dict[str, Any]]:
+        """Query the contract for the encrypted draft stored for an address"""
+        with stage_timer("drafts.query"):
+            return self.chain.wasm.contract_query(
+                self.contract_address,
+                {"get_draft": {"address": user_address}}
+            )
+    
+    def _decrypt_draft(self, query_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Decrypt and decompress a get_draft query result
+        
+        Args:
+            query_result: Contract response with encrypted_content and encrypted_metadata
+            
+        Returns:
+            Dictionary with decrypted content and metadata
+        """
+        if not query_result or "encrypted_content" not in query_result:
+            return {"content": "", "metadata": {}, "found": False}
+        
+        # Decrypt content
+        decrypted_content = ""
+        if query_result.get("encrypted_content"):
+            content_bytes = base64.b64decode(query_result["encrypted_content"])
+            decrypted_content = decode_payload(self._decrypt_data(content_bytes)).decode()
+        
+        # Decrypt metadata if present
+        metadata = {}
+        if query_result.get("encrypted_metadata"):
+            metadata_bytes = base64.b64decode(query_result["encrypted_metadata"])
+            metadata_str = decode_payload(self._decrypt_data(metadata_bytes)).decode()
+            metadata = json.loads(metadata_str)
+        
+        return {
+            "content": decrypted_content,
+            "metadata": metadata,
+            "found": True
+        }
+    
     def _encrypt_data(self, data: bytes) -> str:
         """Encrypt data using Secret Network's encryption
         
@@ -217,30 +344,10 @@ class ConfidentialWriter:
             return base64.b64encode(mock_encrypted).decode()
             
         try:
-            # Try different methods to get encryption key based on SDK version
-            encryption_key = None
-            
-            # Method 1: Try with wasm.query_tx_key
-            try:
-                if hasattr(self.chain, 'wasm') and hasattr(self.chain.wasm, 'query_tx_key'):
-                    encryption_key = self.chain.wasm.query_tx_key()
-            except Exception as e1:
-                logger.warning(f"Failed to get encryption key with wasm.query_tx_key: {str(e1)}")
-                
-            # Method 2: Try with query_tx_encryption_key
-            if encryption_key is None:
-                try:
-                    if hasattr(self.chain, 'query_tx_encryption_key'):
-                        encryption_key = self.chain.query_tx_encryption_key()
-                except Exception as e2:
-                    logger.warning(f"Failed to get encryption key with query_tx_encryption_key: {str(e2)}")
-            
-            # If we have an encryption key, use it
-            if encryption_key:
-                encrypted = self.chain.encryption.encrypt(encryption_key, data)
-                return base64.b64encode(encrypted).decode()
-            else:
-                raise ValueError("Could not obtain encryption key")
+            # The shared provider caches the key instead of querying it on every call
+            with stage_timer("drafts.encrypt"):
+                encrypted = get_key_provider(self.chain).encrypt(data)
+            return base64.b64encode(encrypted).decode()
             
         except Exception as e:
             logger.error(f"Encryption failed: {str(e)}")
@@ -263,21 +370,23 @@ class ConfidentialWriter:
             # In development mode, just use a simple mock decryption
             logger.info("Development mode: Using mock decryption")
             try:
-                return base64.b64decode(base64.b64decode(encrypted_data))
+                # Mock encryption is base64 twice; callers have already removed the outer layer
+                return base64.b64decode(encrypted_data, validate=True)
             except:
                 # If that fails, just return the data as is
                 return encrypted_data
                 
         try:
-            return self.chain.encryption.decrypt(encrypted_data)
+            with stage_timer("drafts.decrypt"):
+                return get_key_provider(self.chain).decrypt(encrypted_data)
         except Exception as e:
             logger.error(f"Decryption failed: {str(e)}")
             
             # Fallback: If we're in development/testing mode, use a mock decryption
             logger.warning("Using mock decryption for development purposes")
             try:
-                # Try to decode the double base64 encoding
-                return base64.b64decode(base64.b64decode(encrypted_data))
+                # Undo the inner base64 layer of the mock encryption
+                return base64.b64decode(encrypted_data, validate=True)
             except:
                 # If that fails, just return the data as is
                 return encrypted_data
\ No newline at end of file
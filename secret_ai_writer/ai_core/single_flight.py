@@ -0,0 +1,106 @@
+# secret_ai_writer/ai_core/single_flight.py
+
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+class _Call:
+    """One in-flight call that later callers with the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait and receive a copy of its result, or its
+    exception. Once the call finishes the key is free again, so results are
+    never reused after the fact; that is the cache's job.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once for all concurrent callers with this key
+
+        Returns:
+            (result, coalesced), coalesced being True for callers that shared
+            another caller's execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        try:
+            result = fn()
+            # Waiters copy a snapshot, so the leader may go on to modify its own result
+            call.result = copy.deepcopy(result)
+            return result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async version of do() for callers on the same event loop"""
+        flight_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            future = self._async_calls.get(flight_key)
+            leader = future is None
+            if leader:
+                future = self._async_calls[flight_key] = asyncio.get_running_loop().create_future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # shield: a cancelled waiter must not cancel the leader's call
+            return copy.deepcopy(await asyncio.shield(future)), True
+
+        try:
+            result = await fn()
+            future.set_result(copy.deepcopy(result))
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; mark the exception retrieved so asyncio does not log it
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[flight_key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many calls ran and how many were coalesced into them"""
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._async_calls)
+            }
@@ -0,0 +1,174 @@
+# secret_ai_writer/ai_core/telemetry.py
+
+import threading
+from typing import Any, Dict, Mapping, Optional
+from decouple import config
+from .chunking import estimate_tokens
+
+# Ollama reports every duration in nanoseconds
+_NS_PER_SECOND = 1e9
+
+# Weight of the newest sample in the moving averages kept per model
+_EWMA_ALPHA = 0.2
+
+def _seconds(nanoseconds: Optional[int]) -> Optional[float]:
+    return round(nanoseconds / _NS_PER_SECOND, 3) if nanoseconds is not None else None
+
+def _rate(count: Optional[int], nanoseconds: Optional[int]) -> Optional[float]:
+    if not count or not nanoseconds:
+        return None
+    return round(count / (nanoseconds / _NS_PER_SECOND), 2)
+
+def is_cold_start(load_duration: Optional[float]) -> bool:
+    """Whether a request paid a model load, given Ollama's load_duration in seconds
+
+    Warm requests still report a few milliseconds of load time, so only loads
+    of at least OLLAMA_COLD_LOAD_SECONDS count as cold.
+    """
+    return (load_duration or 0) >= config("OLLAMA_COLD_LOAD_SECONDS", default="0.5", cast=float)
+
+def generation_telemetry(response_metadata: Optional[Mapping[str, Any]], prompt: str,
+                         generated_content: str) -> Dict[str, Any]:
+    """Build token and timing metadata from an Ollama response
+
+    Uses the statistics Ollama returns with the final message (prompt and
+    eval counts and durations, model load time). Backends that report none
+    of them fall back to a character-based token estimate.
+
+    Args:
+        response_metadata: response_metadata of the final AIMessage/AIMessageChunk
+        prompt: Prompt sent to the model
+        generated_content: Text the model returned
+
+    Returns:
+        Dictionary of metadata fields; token_source says whether the counts
+        came from the model ("ollama") or are estimated ("estimate"), and
+        cold_start whether the model had to be loaded for this request
+    """
+    response_metadata = response_metadata or {}
+    prompt_tokens = response_metadata.get("prompt_eval_count")
+    completion_tokens = response_metadata.get("eval_count")
+
+    if prompt_tokens is None and completion_tokens is None:
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(generated_content)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_tokens": prompt_tokens + completion_tokens,
+            "token_source": "estimate"
+        }
+
+    # Ollama omits prompt_eval_count when the whole prompt came from its KV cache
+    prompt_tokens = prompt_tokens or 0
+    completion_tokens = completion_tokens or 0
+    load_duration = response_metadata.get("load_duration")
+    prompt_eval_duration = response_metadata.get("prompt_eval_duration")
+    eval_duration = response_metadata.get("eval_duration")
+
+    # The first token is ready once the model is loaded and the prompt evaluated
+    time_to_first_token = None
+    if prompt_eval_duration is not None:
+        time_to_first_token = _seconds((load_duration or 0) + prompt_eval_duration)
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "estimated_tokens": prompt_tokens + completion_tokens,
+        "token_source": "ollama",
+        "load_duration": _seconds(load_duration),
+        "prompt_eval_duration": _seconds(prompt_eval_duration),
+        "eval_duration": _seconds(eval_duration),
+        "total_duration": _seconds(response_metadata.get("total_duration")),
+        "prompt_tokens_per_second": _rate(prompt_tokens, prompt_eval_duration),
+        "tokens_per_second": _rate(completion_tokens, eval_duration),
+        "time_to_first_token": time_to_first_token,
+        "cold_start": is_cold_start(_seconds(load_duration))
+    }
+
+class ModelStats:
+    """Running generation statistics for one model"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.measured_requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.prompt_eval_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.load_seconds = 0.0
+        self.processing_seconds = 0.0
+        self.avg_time_to_first_token = None
+        self.avg_tokens_per_second = None
+        self.avg_processing_time = None
+        self.cold_requests = 0
+        self.avg_cold_processing_time = None
+        self.avg_warm_processing_time = None
+
+    @staticmethod
+    def _ewma(average: Optional[float], sample: Optional[float]) -> Optional[float]:
+        if sample is None:
+            return average
+        return sample if average is None else average + _EWMA_ALPHA * (sample - average)
+
+    def record(self, metadata: Dict[str, Any]) -> None:
+        """Fold the metadata of one completed LLM call into the statistics"""
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += metadata.get("prompt_tokens") or 0
+            self.completion_tokens += metadata.get("completion_tokens") or 0
+            self.processing_seconds += metadata.get("processing_time") or 0
+            self.avg_processing_time = self._ewma(self.avg_processing_time, metadata.get("processing_time"))
+            if metadata.get("token_source") == "ollama":
+                self.measured_requests += 1
+                self.prompt_eval_seconds += metadata.get("prompt_eval_duration") or 0
+                self.eval_seconds += metadata.get("eval_duration") or 0
+                self.load_seconds += metadata.get("load_duration") or 0
+                # Cold and warm latency are tracked apart so model loads do not skew the warm average
+                if metadata.get("cold_start"):
+                    self.cold_requests += 1
+                    self.avg_cold_processing_time = self._ewma(self.avg_cold_processing_time, metadata.get("processing_time"))
+                else:
+                    self.avg_warm_processing_time = self._ewma(self.avg_warm_processing_time, metadata.get("processing_time"))
+            self.avg_time_to_first_token = self._ewma(self.avg_time_to_first_token, metadata.get("time_to_first_token"))
+            self.avg_tokens_per_second = self._ewma(self.avg_tokens_per_second, metadata.get("tokens_per_second"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return totals, throughput and moving averages"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "measured_requests": self.measured_requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "prompt_eval_seconds": round(self.prompt_eval_seconds, 3),
+                "eval_seconds": round(self.eval_seconds, 3),
+                "load_seconds": round(self.load_seconds, 3),
+                "processing_seconds": round(self.processing_seconds, 3),
+                "tokens_per_second": round(self.completion_tokens / self.eval_seconds, 2) if self.eval_seconds else None,
+                "avg_time_to_first_token": round(self.avg_time_to_first_token, 3) if self.avg_time_to_first_token is not None else None,
+                "avg_tokens_per_second": round(self.avg_tokens_per_second, 2) if self.avg_tokens_per_second is not None else None,
+                "avg_processing_time": round(self.avg_processing_time, 3) if self.avg_processing_time is not None else None,
+                "cold_requests": self.cold_requests,
+                "avg_cold_processing_time": round(self.avg_cold_processing_time, 3) if self.avg_cold_processing_time is not None else None,
+                "avg_warm_processing_time": round(self.avg_warm_processing_time, 3) if self.avg_warm_processing_time is not None else None
+            }
+
+_model_stats = {}
+_model_stats_lock = threading.Lock()
+
+def get_model_stats(model: str) -> ModelStats:
+    """Return the process-wide ModelStats for a model, creating it on first use"""
+    with _model_stats_lock:
+        stats = _model_stats.get(model)
+        if stats is None:
+            stats = _model_stats[model] = ModelStats(model)
+        return stats
+
+def model_stats() -> Dict[str, Dict[str, Any]]:
+    """Return running statistics for every model used by this process, keyed by model"""
+    with _model_stats_lock:
+        models = list(_model_stats.items())
+    return {model: stats.stats() for model, stats in models}
@@ -0,0 +1,152 @@
+# secret_ai_writer/ai_core/usage_queue.py
+
+import logging
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Queue sentinel telling the worker to exit
+_STOP = object()
+
+class UsageStatsQueue:
+    """Write-behind queue for on-chain usage statistics
+
+    submit() returns a handle immediately and a background thread sends the
+    transactions through the metadata handler in order. status() resolves a
+    handle to its final tx hash once the transaction has been broadcast.
+    """
+
+    def __init__(self, metadata_handler, max_depth: Optional[int] = None,
+                 put_timeout: Optional[float] = None, max_tracked: int = 10000):
+        """
+        Args:
+            metadata_handler: Object with store_usage_stats(user_address, metadata),
+                usually a PrivateMetadata
+            max_depth: Maximum queued writes (defaults to USAGE_QUEUE_DEPTH)
+            put_timeout: Seconds submit() waits for room in a full queue before
+                dropping the write (defaults to USAGE_QUEUE_PUT_TIMEOUT)
+            max_tracked: Number of finished handles kept for status()
+        """
+        if max_depth is None:
+            max_depth = config("USAGE_QUEUE_DEPTH", default="1000", cast=int)
+        if put_timeout is None:
+            put_timeout = config("USAGE_QUEUE_PUT_TIMEOUT", default="1.0", cast=float)
+
+        self.metadata_handler = metadata_handler
+        self.put_timeout = put_timeout
+        self.max_tracked = max_tracked
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._statuses = OrderedDict()
+        self._lock = threading.Lock()
+        # Guards _closed and counts submit() calls between their closed check and their put
+        self._submit_lock = threading.Condition()
+        self._submitting = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="usage-stats-writer", daemon=True)
+        self._worker.start()
+
+    def submit(self, user_address: str, metadata: Dict[str, Any]) -> str:
+        """Queue a usage-stats write and return its handle
+
+        Args:
+            user_address: The Secret Network address of the user
+            metadata: Dictionary containing usage statistics/metadata
+
+        Returns:
+            Handle to pass to status()
+        """
+        handle = f"usage_{uuid.uuid4().hex}"
+        self._set_status(handle, {"status": "pending", "tx_hash": None})
+
+        with self._submit_lock:
+            if self._closed:
+                self._set_status(handle, {"status": "dropped", "tx_hash": None, "error": "Queue is closed"})
+                return handle
+            self._submitting += 1
+
+        # The put happens outside the lock so that a full queue does not serialize submitters
+        try:
+            self._queue.put((handle, user_address, dict(metadata)), timeout=self.put_timeout)
+        except queue.Full:
+            logger.warning("Usage stats queue is full, dropping write")
+            self._set_status(handle, {"status": "dropped", "tx_hash": None, "error": "Queue is full"})
+        finally:
+            with self._submit_lock:
+                self._submitting -= 1
+                self._submit_lock.notify_all()
+
+        return handle
+
+    def status(self, handle: str) -> Dict[str, Any]:
+        """Return the state of a queued write
+
+        Returns:
+            Dictionary with "status" (pending, batched, stored, failed, dropped
+            or unknown), "tx_hash" once stored, "generations" covered by a
+            batched transaction, and "error" on failure
+        """
+        with self._lock:
+            entry = self._statuses.get(handle)
+        if entry is None:
+            return {"handle": handle, "status": "unknown", "tx_hash": None}
+
+        # Batched writes resolve once their batch has been flushed
+        batch = entry.get("batch")
+        if batch is not None:
+            status = "stored" if batch.txhash else "batched"
+            return {"handle": handle, "status": status, "tx_hash": batch.txhash,
+                    "generations": batch.generations}
+        return {"handle": handle, **entry}
+
+    def depth(self) -> int:
+        """Return the number of writes waiting to be sent"""
+        return self._queue.qsize()
+
+    def flush(self) -> None:
+        """Block until every queued write has been sent"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush queued writes and stop the worker thread"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Writes already past the closed check go in ahead of the stop sentinel
+            self._submit_lock.wait_for(lambda: self._submitting == 0)
+        self._queue.put((_STOP, None, None))
+        self._worker.join()
+        logger.info("Usage stats queue flushed and closed")
+
+    def _set_status(self, handle: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._statuses[handle] = entry
+            self._statuses.move_to_end(handle)
+            while len(self._statuses) > self.max_tracked:
+                self._statuses.popitem(last=False)
+
+    def _run(self) -> None:
+        """Worker loop sending queued writes until the stop sentinel arrives"""
+        while True:
+            handle, user_address, metadata = self._queue.get()
+            try:
+                if handle is _STOP:
+                    return
+                tx_result = self.metadata_handler.store_usage_stats(
+                    user_address=user_address,
+                    metadata=metadata
+                )
+                if hasattr(tx_result, "generations"):
+                    self._set_status(handle, {"status": "batched", "batch": tx_result})
+                else:
+                    self._set_status(handle, {"status": "stored", "tx_hash": tx_result.txhash})
+            except Exception as e:
+                logger.error(f"Background usage stats write failed: {str(e)}")
+                self._set_status(handle, {"status": "failed", "tx_hash": None, "error": str(e)})
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,145 @@
+# tests/test_ai_bridge.py
+import gc
+import io
+import json
+import sys
+import time
+import weakref
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import ai_bridge
+from test_ai_integration import make_writer
+
+
+class FakeConfidentialWriter:
+    def retrieve_draft(self, user_address):
+        return {"content": f"draft for {user_address}", "metadata": {}, "found": True}
+
+
+class FakeWriters(ai_bridge.BridgeWriters):
+    def confidential_writer(self):
+        return FakeConfidentialWriter()
+
+
+def test_daemon_answers_each_frame_with_its_id():
+    daemon = ai_bridge.BridgeDaemon(writers=FakeWriters(), max_workers=2)
+    requests = "\n".join([
+        json.dumps({"id": 1, "action": "retrieve", "data": {"user_address": "secret1a"}}),
+        "not json",
+        json.dumps({"id": 2, "action": "unknown", "data": {}}),
+        json.dumps({"action": "shutdown"}),
+        json.dumps({"id": 3, "action": "retrieve", "data": {}}),
+    ]) + "\n"
+    out = io.StringIO()
+    
+    daemon.serve_stream(io.StringIO(requests), out)
+    daemon.close()
+    
+    frames = {frame["id"]: frame for frame in map(json.loads, out.getvalue().splitlines())}
+    assert frames[1]["result"]["content"] == "draft for secret1a"
+    assert "Invalid request frame" in frames[None]["error"]
+    assert frames[2]["result"] == {"error": "Unknown action: unknown"}
+    assert 3 not in frames
+
+
+def test_daemon_does_not_keep_finished_requests():
+    daemon = ai_bridge.BridgeDaemon(writers=FakeWriters(), max_workers=2)
+    submitted = []
+    submit = daemon.executor.submit
+    
+    def tracking_submit(*args):
+        future = submit(*args)
+        submitted.append(weakref.ref(future))
+        return future
+    
+    daemon.executor.submit = tracking_submit
+    
+    def frames():
+        for n in range(20):
+            yield json.dumps({"id": n, "action": "retrieve", "data": {}}) + "\n"
+        # The connection is still open; every finished request must already be released
+        time.sleep(0.2)
+        gc.collect()
+        assert len(submitted) == 20 and all(ref() is None for ref in submitted)
+        yield json.dumps({"action": "shutdown"}) + "\n"
+    
+    out = io.StringIO()
+    daemon.serve_stream(frames(), out)
+    daemon.close()
+    
+    assert len(out.getvalue().splitlines()) == 20
+
+
+def test_metrics_action_reports_daemon_stage_timings():
+    daemon = ai_bridge.BridgeDaemon(writers=FakeWriters(), max_workers=1)
+    requests = "\n".join([
+        json.dumps({"id": 1, "action": "retrieve", "data": {"user_address": "secret1a"}}),
+        json.dumps({"action": "shutdown"}),
+    ]) + "\n"
+    daemon.serve_stream(io.StringIO(requests), io.StringIO())
+    
+    result = ai_bridge.handle_action("metrics", {}, daemon.writers)
+    prometheus = ai_bridge.handle_action("metrics", {"format": "prometheus"}, daemon.writers)
+    daemon.close()
+    
+    assert result["stages"]["bridge.retrieve"]["ok"]["count"] >= 1
+    assert 'stage="bridge.retrieve"' in prometheus["body"]
+
+
+def test_unknown_actions_share_one_metrics_stage():
+    daemon = ai_bridge.BridgeDaemon(writers=FakeWriters(), max_workers=1)
+    requests = "\n".join([
+        *(json.dumps({"id": n, "action": f"made-up-{n}", "data": {}}) for n in range(3)),
+        json.dumps({"id": 3, "action": ["not", "a", "name"], "data": {}}),
+        json.dumps({"action": "shutdown"}),
+    ]) + "\n"
+    daemon.serve_stream(io.StringIO(requests), io.StringIO())
+    daemon.close()
+    
+    stages = ai_bridge.handle_action("metrics", {}, daemon.writers)["stages"]
+    
+    assert stages["bridge.unknown"]["ok"]["count"] >= 4
+    assert not any(stage.startswith("bridge.made-up") for stage in stages)
+
+
+def test_streamed_enhance_multi_sends_a_frame_per_variant():
+    class MultiWriters(FakeWriters):
+        def ai_writer(self):
+            return writer
+    
+    writer = make_writer("first variant", "second variant")
+    daemon = ai_bridge.BridgeDaemon(writers=MultiWriters(), max_workers=1)
+    request = {"id": 7, "action": "enhance_multi", "stream": True,
+               "data": {"draft_text": "Draft", "enhancement_types": ["grammar", "casual"], "max_concurrency": 1}}
+    out = io.StringIO()
+    
+    daemon.serve_stream(io.StringIO(json.dumps(request) + "\n"), out)
+    daemon.close()
+    
+    frames = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [frame["variant"]["enhancement_type"] for frame in frames[:2]] == ["grammar", "casual"]
+    assert {frame["variant"]["content"] for frame in frames[:2]} == {"first variant", "second variant"}
+    assert frames[2]["result"]["metadata"]["succeeded"] == 2
+    assert len(writer.metadata_handler.stored) == 1
+
+
+def test_argv_mode_answers_with_the_stored_tx_hash(monkeypatch, capsys):
+    from secret_ai_writer.ai_core import ai_integration
+    from secret_ai_writer.ai_core.usage_queue import UsageStatsQueue
+    
+    def build_writer(cache=None, write_behind=None):
+        writer = make_writer("Generated once")
+        writer.metadata_handler.close = lambda: None
+        if write_behind is not False:
+            writer.usage_queue = UsageStatsQueue(writer.metadata_handler)
+        return writer
+    
+    monkeypatch.setattr(ai_integration, "SecretAIWriter", build_writer)
+    monkeypatch.setattr(sys, "argv", ["ai_bridge.py", "generate", json.dumps({"prompt": "Hi", "user_address": "secret1a"})])
+    ai_bridge.main()
+    
+    metadata = json.loads(capsys.readouterr().out)["metadata"]
+    assert metadata["tx_hash"] == "mock_tx_test"
+    assert "tx_handle" not in metadata
@@ -0,0 +1,326 @@
+# tests/test_ai_integration.py
+import asyncio
+import threading
+import time
+import weakref
+from types import SimpleNamespace
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from secret_ai_writer.ai_core.ai_integration import SecretAIWriter
+from secret_ai_writer.ai_core.cache import DiskCache, LRUCache, TieredCache
+from secret_ai_writer.ai_core.cache_keys import CacheKeyPolicy
+from secret_ai_writer.ai_core.confidential_chain import MockTxResult
+from secret_ai_writer.ai_core.single_flight import SingleFlight
+
+
+class FakeMetadataHandler:
+    def __init__(self):
+        self.stored = []
+    
+    def store_usage_stats(self, user_address, metadata):
+        self.stored.append((user_address, metadata))
+        return MockTxResult("mock_tx_test")
+
+
+def make_writer(*responses):
+    writer = SecretAIWriter.__new__(SecretAIWriter)
+    writer.ollama_model = "fake-model"
+    writer.temperature = 0.7
+    writer.max_tokens = 1024
+    writer.llm = GenericFakeChatModel(messages=iter(AIMessage(content=r) for r in responses))
+    writer.metadata_handler = FakeMetadataHandler()
+    writer.cache = None
+    writer.cache_policy = None
+    writer._llm_semaphores = weakref.WeakKeyDictionary()
+    writer.usage_queue = None
+    writer.max_concurrent_llm_calls = 4
+    writer.chunk_tokens = 1500
+    writer.chunk_overlap_tokens = 20
+    writer.chunk_workers = 4
+    writer.keep_alive = "30m"
+    writer._ollama_clients = {}
+    writer.router = None
+    writer.backend_pool = None
+    writer.single_flight = SingleFlight()
+    writer.incremental_enhance = False
+    writer.paragraph_cache = LRUCache()
+    return writer
+
+
+def test_generate_content_stream_yields_tokens_then_metadata():
+    writer = make_writer("Privacy matters for AI")
+    
+    records = list(writer.generate_content_stream("Write about privacy", "secret1user"))
+    
+    tokens = [r["content"] for r in records if r["type"] == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Privacy matters for AI"
+    
+    done = records[-1]
+    assert done["type"] == "done"
+    assert done["content"] == "Privacy matters for AI"
+    assert done["metadata"]["streamed"] is True
+    assert done["metadata"]["time_to_first_token"] is not None
+    assert done["metadata"]["tx_hash"] == "mock_tx_test"
+
+
+def test_cached_generation_is_shared_with_fresh_metadata():
+    writer = make_writer("Cached answer", "Second answer")
+    writer.cache = TieredCache()
+    writer.cache_policy = CacheKeyPolicy(share_across_users=True, shared_tenants=set(), private_tenants=set())
+    
+    first = writer.generate_content("Write about privacy", "secret1a")
+    second = writer.generate_content("Write  about privacy ", "secret1b")
+    
+    assert second["content"] == first["content"] == "Cached answer"
+    assert second["metadata"]["cache_hit"] is True
+    assert "cache_hit" not in first["metadata"]
+    assert len(writer.metadata_handler.stored) == 2
+
+
+def test_cache_hit_does_not_replay_cold_start_telemetry():
+    writer = make_writer()
+    cold = AIMessage(content="Cold answer", response_metadata={
+        "prompt_eval_count": 10, "eval_count": 5, "load_duration": 3_000_000_000,
+        "prompt_eval_duration": 100_000_000, "eval_duration": 200_000_000, "total_duration": 3_400_000_000
+    })
+    writer.llm = SimpleNamespace(invoke=lambda messages: cold)
+    writer.cache = TieredCache()
+    
+    first = writer.generate_content("Write about privacy", "secret1a")
+    second = writer.generate_content("Write about privacy", "secret1a")
+    
+    assert first["metadata"]["cold_start"] is True
+    assert second["metadata"]["cache_hit"] is True
+    for field in ("cold_start", "load_duration", "total_duration", "time_to_first_token"):
+        assert field not in second["metadata"]
+    assert second["metadata"]["completion_tokens"] == 5
+
+
+def test_agenerate_content_respects_concurrency_limit():
+    writer = make_writer(*(f"answer {i}" for i in range(6)))
+    writer.max_concurrent_llm_calls = 2
+    in_flight = []
+    peak = []
+    
+    async def ainvoke(messages):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        return AIMessage(content="answer")
+    
+    writer.llm = SimpleNamespace(ainvoke=ainvoke)
+    
+    async def run(round_number):
+        return await asyncio.gather(*(
+            writer.aenhance_writing(f"draft {round_number}.{i}", "grammar", "secret1user") for i in range(6)
+        ))
+    
+    # Each asyncio.run has its own event loop; the limit must hold on both
+    for round_number in range(2):
+        results = asyncio.run(run(round_number))
+        assert [r["content"] for r in results] == ["answer"] * 6
+    
+    assert max(peak) == 2
+    assert len(writer.metadata_handler.stored) == 12
+
+
+def test_generate_many_keeps_input_order_and_reports_item_errors():
+    writer = make_writer()
+    
+    def fake_batch_as_completed(inputs, config, return_exceptions=False):
+        assert config["max_concurrency"] == 3
+        for position in reversed(range(len(inputs))):
+            prompt = inputs[position][1].content
+            if "fail" in prompt:
+                yield position, RuntimeError("model crashed")
+            else:
+                yield position, AIMessage(content=f"answer to {prompt}")
+    
+    writer.llm = SimpleNamespace(batch_as_completed=fake_batch_as_completed)
+    
+    batch = writer.generate_many(["first", {"prompt": "please fail"}, {}, "last"],
+                                 "secret1user", max_concurrency=3)
+    
+    results = batch["results"]
+    assert results[0]["content"] == "answer to first"
+    assert results[1] == {"error": "model crashed"}
+    assert "error" in results[2]
+    assert results[3]["content"] == "answer to last"
+    assert batch["metadata"]["succeeded"] == 2
+    assert batch["metadata"]["failed"] == 2
+    assert len(writer.metadata_handler.stored) == 1
+
+
+def test_long_drafts_are_enhanced_in_ordered_chunks():
+    writer = make_writer()
+    seen_prompts = []
+    
+    def invoke(messages):
+        prompt = messages[1].content
+        seen_prompts.append(prompt)
+        text = prompt.split("Text to improve:\n")[-1].split("\n\n")[-1]
+        return AIMessage(content=text.upper())
+    
+    writer.llm = SimpleNamespace(invoke=invoke)
+    writer.chunk_tokens = 20
+    paragraphs = [f"Paragraph {n} talks about privacy. It has a second sentence." for n in range(6)]
+    
+    result = writer.enhance_writing("\n\n".join(paragraphs), "grammar", "secret1user")
+    
+    assert result["content"] == "\n\n".join(p.upper() for p in paragraphs)
+    assert result["metadata"]["chunk_count"] == len(seen_prompts) == 6
+    assert [c["index"] for c in result["metadata"]["chunks"]] == list(range(6))
+    assert sum("For context only" in p for p in seen_prompts) == 5
+    assert len(writer.metadata_handler.stored) == 1
+
+
+def test_stream_async_and_batch_enhancement_split_long_drafts():
+    writer = make_writer()
+    seen_prompts = []
+    
+    def invoke(messages):
+        seen_prompts.append(messages[1].content)
+        text = messages[1].content.split("Text to improve:\n")[-1].split("\n\n")[-1]
+        return AIMessage(content=text.upper())
+    
+    def batch_as_completed(inputs, config, return_exceptions=False):
+        for position, messages in enumerate(inputs):
+            yield position, invoke(messages)
+    
+    writer.llm = SimpleNamespace(invoke=invoke, batch_as_completed=batch_as_completed)
+    writer.chunk_tokens = 20
+    paragraphs = [f"Paragraph {n} talks about privacy. It has a second sentence." for n in range(3)]
+    draft = "\n\n".join(paragraphs)
+    expected = "\n\n".join(p.upper() for p in paragraphs)
+    
+    streamed = list(writer.enhance_writing_stream(draft, "grammar", "secret1user"))
+    awaited = asyncio.run(writer.aenhance_writing(draft, "casual", "secret1user"))
+    batch = writer.generate_many([{"draft_text": draft}, "short prompt"], "secret1user")
+    
+    assert streamed[-1]["content"] == awaited["content"] == expected
+    assert streamed[-1]["metadata"]["chunk_count"] == awaited["metadata"]["chunk_count"] == 3
+    assert batch["results"][0]["content"] == expected
+    assert batch["results"][1]["content"] == "SHORT PROMPT"
+    assert batch["metadata"]["succeeded"] == 2
+    assert all(len(prompt) < 400 for prompt in seen_prompts)
+
+
+def test_async_long_drafts_share_the_llm_concurrency_limit():
+    writer = make_writer()
+    writer.max_concurrent_llm_calls = 2
+    writer.chunk_tokens = 20
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+    
+    def invoke(messages):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.pop()
+        return AIMessage(content="enhanced")
+    
+    writer.llm = SimpleNamespace(invoke=invoke)
+    drafts = ["\n\n".join(f"Draft {d} paragraph {n} talks about privacy. It has a second sentence." for n in range(3))
+              for d in range(4)]
+    
+    async def run():
+        return await asyncio.gather(*(writer.aenhance_writing(draft, "casual", "secret1user") for draft in drafts))
+    
+    results = asyncio.run(run())
+    
+    assert all(result["metadata"]["chunk_count"] == 3 for result in results)
+    assert len(peak) == 12
+    assert max(peak) == 2
+    assert len(writer.metadata_handler.stored) == 4
+
+
+def test_incremental_enhancement_only_sends_changed_paragraphs():
+    writer = make_writer()
+    seen_prompts = []
+    
+    def invoke(messages):
+        text = messages[1].content.split("\n\n", 1)[1]
+        seen_prompts.append(text)
+        return AIMessage(content=text.upper())
+    
+    writer.llm = SimpleNamespace(invoke=invoke)
+    paragraphs = [f"Paragraph {n} talks about privacy." for n in range(5)]
+    
+    first = writer.enhance_writing("\n\n".join(paragraphs), "grammar", "secret1user", incremental=True)
+    paragraphs[2] = "Paragraph 2 was edited."
+    second = writer.enhance_writing("\n\n".join(paragraphs), "grammar", "secret1user", incremental=True)
+    other_type = writer.enhance_writing("\n\n".join(paragraphs), "casual", "secret1user", incremental=True)
+    
+    assert second["content"] == "\n\n".join(p.upper() for p in paragraphs)
+    assert first["metadata"]["paragraphs_reused"] == 0
+    assert second["metadata"]["paragraphs_enhanced"] == 1
+    assert second["metadata"]["paragraphs_reused"] == 4
+    assert seen_prompts[5:6] == ["Paragraph 2 was edited."]
+    assert other_type["metadata"]["paragraphs_enhanced"] == 5
+    assert len(writer.metadata_handler.stored) == 3
+
+
+def test_incremental_paragraphs_are_reused_across_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    paragraphs = [f"Paragraph {n} talks about privacy." for n in range(3)]
+    seen_prompts = []
+    
+    def invoke(messages):
+        text = messages[1].content.split("\n\n", 1)[1]
+        seen_prompts.append(text)
+        return AIMessage(content=text.upper())
+    
+    # Each argv-mode bridge process builds a fresh writer over the same cache file
+    results = []
+    for _ in range(2):
+        writer = make_writer()
+        writer.llm = SimpleNamespace(invoke=invoke)
+        writer.cache = writer.paragraph_cache = TieredCache(disk=DiskCache(path))
+        results.append(writer.enhance_writing("\n\n".join(paragraphs), "grammar", "secret1user", incremental=True))
+    
+    assert len(seen_prompts) == 3
+    assert results[1]["metadata"]["paragraphs_reused"] == 3
+    assert results[1]["content"] == results[0]["content"]
+
+
+def test_enhance_writing_multi_streams_variants_as_they_finish():
+    writer = make_writer()
+    delays = {"grammar": 0.3, "casual": 0.05, "professional": 0.1}
+    active = []
+    peak = []
+    lock = threading.Lock()
+    
+    def invoke(messages):
+        enhancement_type = messages[1].content.split(".", 1)[0].removeprefix("Focus: ")
+        with lock:
+            active.append(enhancement_type)
+            peak.append(len(active))
+        time.sleep(delays[enhancement_type])
+        with lock:
+            active.remove(enhancement_type)
+        if enhancement_type == "professional":
+            raise RuntimeError("model crashed")
+        return AIMessage(content=f"{enhancement_type} version")
+    
+    writer.llm = SimpleNamespace(invoke=invoke)
+    
+    records = list(writer.enhance_writing_multi_stream(
+        "A short draft.", ["grammar", "casual", "professional", "grammar"], "secret1user"
+    ))
+    
+    assert [r.get("enhancement_type") for r in records] == ["casual", "professional", "grammar", None]
+    assert records[0]["content"] == "casual version"
+    assert records[1]["error"] == "model crashed"
+    summary = records[-1]["metadata"]
+    assert summary["succeeded"] == 2 and summary["failed"] == 1
+    assert summary["batch_size"] == 3 and summary["model_counts"] == {"fake-model": 2}
+    assert summary["enhancement_types"] == ["grammar", "casual", "professional"]
+    assert max(peak) == 3
+    assert writer.metadata_handler.stored == [("secret1user", summary)]
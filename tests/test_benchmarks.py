@@ -0,0 +1,29 @@
+# tests/test_benchmarks.py
+from benchmarks.run_benchmarks import OPERATIONS, percentile, run
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    
+    assert percentile(samples, 0.50) == 50.0
+    assert percentile(samples, 0.95) == 95.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([3.0], 0.99) == 3.0
+
+
+def test_offline_benchmark_reports_every_operation():
+    results = run(
+        requests=4, concurrency_levels=[1, 2], operations=list(OPERATIONS),
+        token_rate=5000.0, prompt_rate=100000.0, llm_latency=0.0, load_time=0.0,
+        response_tokens=8, lcd_latency=0.0, use_cache=False
+    )
+    
+    rows = {(row["operation"], row["concurrency"]): row for row in results["results"]}
+    assert set(rows) == {(op, level) for op in OPERATIONS for level in (1, 2)}
+    for row in rows.values():
+        assert row["errors"] == 0
+        assert set(row["latency"]) == {"p50", "p95", "p99", "mean", "max"}
+        assert row["throughput_rps"] > 0
+    assert results["models"]["bench-model"]["requests"] >= 16
+    assert "writer.llm" in results["stages"]
+    assert "drafts.query" in results["stages"]
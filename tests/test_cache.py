@@ -0,0 +1,47 @@
+# tests/test_cache.py
+import time
+
+from secret_ai_writer.ai_core.cache import DiskCache, LRUCache, TieredCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+
+def test_disk_cache_enforces_caps_and_ttl(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_entries=2, ttl=60)
+    cache.set("a", {"content": "one"})
+    cache.set("b", {"content": "two"})
+    cache.set("c", {"content": "three"})
+    
+    assert cache.get("a") is None
+    assert cache.get("c") == {"content": "three"}
+    assert cache.size()["entries"] == 2
+    
+    cache.ttl = 0.01
+    cache.set("d", {"content": "four"})
+    time.sleep(0.02)
+    assert cache.compact() == 1
+    assert cache.get("d") is None
+    cache.close()
+
+
+def test_tiered_cache_promotes_disk_hits_and_counts(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    TieredCache(disk=DiskCache(path)).set("key", {"content": "cached"})
+    
+    cache = TieredCache(disk=DiskCache(path))
+    assert cache.get("missing") is None
+    assert cache.get("key") == {"content": "cached"}
+    assert cache.get("key") == {"content": "cached"}
+    
+    stats = cache.stats()
+    assert (stats["misses"], stats["disk_hits"], stats["memory_hits"]) == (1, 1, 1)
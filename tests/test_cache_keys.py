@@ -0,0 +1,37 @@
+# tests/test_cache_keys.py
+from secret_ai_writer.ai_core.cache_keys import (
+    CacheKeyPolicy, canonicalize_text, generation_cache_key, split_result
+)
+
+PARAMS = {"model": "mistral:7b-instruct", "temperature": 0.7, "max_tokens": 1024}
+
+
+def test_canonicalize_text_ignores_incidental_whitespace():
+    assert canonicalize_text("  Write\tabout   privacy \r\n\r\n\r\n\nin AI  ") == "Write about privacy\n\nin AI"
+
+
+def test_key_depends_on_generation_params_not_whitespace():
+    key = generation_cache_key("Write  about privacy", None, PARAMS, "shared")
+    
+    assert key == generation_cache_key(" Write about privacy\n", None, PARAMS, "shared")
+    assert key != generation_cache_key("Write about privacy", None, {**PARAMS, "model": "llama3"}, "shared")
+    assert key != generation_cache_key("Write about privacy", None, {**PARAMS, "temperature": 0.2}, "shared")
+
+
+def test_policy_scopes_users_and_tenants():
+    policy = CacheKeyPolicy(share_across_users=True, shared_tenants=set(), private_tenants={"acme"})
+    
+    assert policy.scope("secret1a") == policy.scope("secret1b") == "shared"
+    assert policy.scope("secret1a", "globex") == "tenant:globex"
+    assert policy.scope("secret1a", "acme") == "user:secret1a"
+    assert CacheKeyPolicy(False, set(), set()).scope("secret1a") == "user:secret1a"
+
+
+def test_split_result_separates_per_request_fields():
+    cacheable, per_request = split_result({
+        "content": "text",
+        "metadata": {"model": "m", "timestamp": 1, "tx_hash": "abc", "processing_time": 2.0}
+    })
+    
+    assert cacheable == {"content": "text", "metadata": {"model": "m"}}
+    assert per_request == {"timestamp": 1, "tx_hash": "abc", "processing_time": 2.0}
@@ -0,0 +1,85 @@
+# tests/test_chain_clients.py
+import base64
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.fake_lcd import FakeLCDServer
+from secret_ai_writer.ai_core import chain_clients
+
+
+class FakeLCDHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    barrier = None
+    
+    def do_GET(self):
+        self.connections.add(self.client_address)
+        if self.barrier is not None:
+            # Only answers once enough requests are in flight at the same time
+            self.barrier.wait()
+        body = json.dumps({
+            "key": base64.b64encode(b"k" * 32).decode(),
+            "block": {"header": {"height": "1"}}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def lcd_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLCDHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    chain_clients.close_chain_clients()
+    server.shutdown()
+
+
+def test_clients_are_shared_and_reuse_connections(lcd_url):
+    FakeLCDHandler.connections.clear()
+    client = chain_clients.get_chain_client("pulsar-3", lcd_url, "word " * 24)
+    
+    for _ in range(3):
+        client.lcd.tendermint.block_info()
+    
+    assert chain_clients.get_chain_client("pulsar-3", lcd_url, "word " * 24) is client
+    assert len(FakeLCDHandler.connections) == 1
+    
+    query_only = chain_clients.get_chain_client("pulsar-3", lcd_url)
+    assert query_only is not client
+    assert query_only.lcd is client.lcd
+    assert not query_only.has_wallet
+    with pytest.raises(ValueError):
+        query_only.wallet
+
+
+def test_shared_client_serves_concurrent_threads(lcd_url, monkeypatch):
+    client = chain_clients.get_chain_client("pulsar-3", lcd_url)
+    monkeypatch.setattr(FakeLCDHandler, "barrier", threading.Barrier(4, timeout=5))
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        heights = list(pool.map(lambda _: client.lcd.tendermint.block_info()["block"]["header"]["height"], range(8)))
+    
+    assert heights == ["1"] * 8
+
+
+def test_shared_client_serves_concurrent_contract_queries():
+    with FakeLCDServer(latency=0.01) as lcd:
+        lcd.put_draft("secret1a", "content")
+        client = chain_clients.get_chain_client("pulsar-3", lcd.url)
+        query = lambda _: client.lcd.wasm.contract_query("secret1contract", {"get_draft": {"address": "secret1a"}})
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            drafts = list(pool.map(query, range(32)))
+        chain_clients.close_chain_clients()
+    
+    assert [draft["encrypted_content"] for draft in drafts] == ["content"] * 32
@@ -0,0 +1,21 @@
+# tests/test_chunking.py
+from secret_ai_writer.ai_core.chunking import estimate_tokens, split_into_chunks
+
+
+def test_chunks_keep_paragraphs_whole_within_budget():
+    paragraphs = ["word " * 30, "word " * 30, "word " * 30]
+    chunks = split_into_chunks("\n\n".join(paragraphs), max_tokens=80)
+    
+    assert len(chunks) == 2
+    assert all(estimate_tokens(chunk["text"]) <= 80 for chunk in chunks)
+    assert chunks[0]["context"] == ""
+
+
+def test_oversized_paragraph_splits_on_sentences_with_overlap_context():
+    paragraph = " ".join(f"Sentence number {n} is here." for n in range(40))
+    chunks = split_into_chunks(paragraph, max_tokens=50, overlap_tokens=10)
+    
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk["text"]) <= 50 for chunk in chunks)
+    assert " ".join(chunk["text"] for chunk in chunks) == paragraph
+    assert chunks[1]["context"] and chunks[0]["text"].endswith(chunks[1]["context"])
@@ -0,0 +1,67 @@
+# tests/test_draft_cache.py
+import json
+
+from secret_sdk.key.mnemonic import MnemonicKey
+
+from benchmarks.fake_lcd import FakeLCDServer
+from secret_ai_writer.ai_core.chain_clients import close_chain_clients
+from secret_ai_writer.ai_core.draft_cache import DraftCache
+
+
+def test_cache_expires_and_stays_within_budget(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("secret_ai_writer.ai_core.draft_cache.time.time", lambda: clock[0])
+    cache = DraftCache(ttl=10, max_entries=2, max_bytes=100)
+    
+    cache.put("a", {"content": "x" * 40, "metadata": {}, "found": True}, cache.version("a"))
+    cache.put("b", {"content": "y" * 40, "metadata": {}, "found": True}, cache.version("b"))
+    cache.put("c", {"content": "z" * 40, "metadata": {}, "found": True}, cache.version("c"))
+    cache.put("huge", {"content": "w" * 200, "metadata": {}, "found": True}, cache.version("huge"))
+    
+    assert cache.get("a") is None
+    assert cache.get("huge") is None
+    assert cache.get("c")["content"] == "z" * 40
+    assert cache.stats()["bytes"] <= 100
+    
+    clock[0] += 11
+    assert cache.get("c") is None
+
+
+def test_read_started_before_invalidation_is_not_cached():
+    cache = DraftCache(ttl=60, max_entries=8, max_bytes=1024)
+    version = cache.version("a")
+    
+    cache.invalidate("a")
+    cache.put("a", {"content": "stale", "metadata": {}, "found": True}, version)
+    
+    assert cache.get("a") is None
+
+
+def test_writer_serves_repeat_reads_from_cache_until_stored(monkeypatch):
+    with FakeLCDServer() as lcd:
+        monkeypatch.setenv("LCD_URL", lcd.url)
+        monkeypatch.setenv("CHAIN_ID", "cache-test-1")
+        monkeypatch.setenv("CONTRACT_ADDRESS", "secret1cachetestcontract")
+        monkeypatch.setenv("MNEMONIC", MnemonicKey().mnemonic)
+        monkeypatch.setenv("DEV_MODE", "False")
+        monkeypatch.setenv("DRAFT_CACHE_TTL", "60")
+        
+        from secret_ai_writer.ai_core.secret_ai_client import ConfidentialWriter
+        writer = ConfidentialWriter()
+        try:
+            owner = writer.get_wallet_address()
+            lcd.put_draft(owner, writer._encrypt_data(b"first"), writer._encrypt_data(json.dumps({"v": 1}).encode()))
+            
+            assert writer.retrieve_draft()["content"] == "first"
+            queries = lcd.requests
+            cached = writer.retrieve_draft()
+            assert cached == {"content": "first", "metadata": {"v": 1}, "found": True}
+            assert lcd.requests == queries
+            
+            # Another writer in the process shares the cache, and a store through it invalidates the draft
+            lcd.put_draft(owner, writer._encrypt_data(b"second"))
+            ConfidentialWriter().store_draft("second")
+            assert writer.retrieve_draft()["content"] == "second"
+            assert writer.draft_cache.stats()["hits"] == 1
+        finally:
+            close_chain_clients()
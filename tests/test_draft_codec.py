@@ -0,0 +1,33 @@
+# tests/test_draft_codec.py
+import pytest
+
+from secret_ai_writer.ai_core import draft_codec
+from secret_ai_writer.ai_core.draft_codec import MAGIC, decode_payload, encode_payload
+
+DRAFT = ("The confidential writer keeps drafts private while the model suggests edits. " * 40).encode()
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_large_drafts_are_compressed_and_round_trip(monkeypatch, codec):
+    monkeypatch.setenv("DRAFT_COMPRESSION", codec)
+    
+    encoded = encode_payload(DRAFT)
+    
+    assert encoded.startswith(MAGIC)
+    assert encoded[len(MAGIC) + 1] == draft_codec.CODECS[codec]
+    assert len(encoded) < len(DRAFT) / 4
+    assert decode_payload(encoded) == DRAFT
+
+
+def test_small_and_legacy_drafts_pass_through(monkeypatch):
+    monkeypatch.setenv("DRAFT_COMPRESSION_THRESHOLD", "512")
+    
+    assert encode_payload(b"short draft") == b"short draft"
+    # Drafts stored before the envelope are plain UTF-8 text or JSON
+    assert decode_payload(DRAFT) == DRAFT
+    assert decode_payload(b'{"title": "Draft"}') == b'{"title": "Draft"}'
+
+
+def test_unknown_envelope_version_is_rejected():
+    with pytest.raises(ValueError):
+        decode_payload(MAGIC + bytes([99, draft_codec.CODEC_ZLIB]) + b"payload")
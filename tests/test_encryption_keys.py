@@ -0,0 +1,75 @@
+# tests/test_encryption_keys.py
+from types import SimpleNamespace
+
+import pytest
+from secret_sdk.util.encrypt_utils import EncryptionUtils
+
+from secret_ai_writer.ai_core.encryption_keys import EncryptionKeyProvider, get_key_provider
+
+
+def make_chain(*keys):
+    """Chain fake whose tx-key endpoint hands out keys in order; the enclave key pair is real"""
+    enclave = EncryptionUtils(b"")
+    keys = iter(keys or [enclave.get_pub_key()])
+    queries = []
+    
+    def consensus_io_pub_key():
+        queries.append(1)
+        return next(keys)
+    
+    chain = SimpleNamespace(chain_id="pulsar-3", url="https://lcd.test",
+                            encrypt_utils=EncryptionUtils(b""),
+                            registration=SimpleNamespace(consensus_io_pub_key=consensus_io_pub_key))
+    return chain, enclave, queries
+
+
+def test_key_is_cached_and_data_round_trips():
+    chain, _, queries = make_chain()
+    provider = EncryptionKeyProvider(chain, ttl=60)
+    
+    sealed = [provider.encrypt(b"a"), provider.encrypt(b"b")]
+    
+    assert [provider.decrypt(data) for data in sealed] == [b"a", b"b"]
+    assert len(queries) == 1
+
+
+def test_malformed_key_is_refreshed_once():
+    enclave = EncryptionUtils(b"")
+    chain, _, queries = make_chain(b"short", enclave.get_pub_key())
+    provider = EncryptionKeyProvider(chain, ttl=60)
+    
+    assert provider.decrypt(provider.encrypt(b"c")) == b"c"
+    assert len(queries) == 2
+    assert provider.stats() == {"hits": 1, "misses": 2, "refreshes": 1, "failures": 0, "cached": True}
+
+
+def test_errors_unrelated_to_the_key_do_not_refetch():
+    chain, _, queries = make_chain()
+    del chain.encrypt_utils
+    provider = EncryptionKeyProvider(chain, ttl=60)
+    
+    with pytest.raises(AttributeError):
+        provider.encrypt(b"a")
+    
+    assert len(queries) == 1
+    assert provider.stats()["refreshes"] == 0
+
+
+def test_decrypt_failure_keeps_the_cached_key():
+    chain, _, queries = make_chain()
+    provider = EncryptionKeyProvider(chain, ttl=60)
+    sealed = provider.encrypt(b"a")
+    
+    for _ in range(3):
+        with pytest.raises(Exception):
+            provider.decrypt(sealed[:64] + b"tampered" + sealed[72:])
+    
+    assert len(queries) == 1
+    assert provider.stats() == {"hits": 3, "misses": 1, "refreshes": 0, "failures": 0, "cached": True}
+
+
+def test_provider_is_shared_per_chain_endpoint():
+    chain, _, _ = make_chain()
+    other, _, _ = make_chain()
+    
+    assert get_key_provider(chain) is get_key_provider(other)
@@ -0,0 +1,64 @@
+# tests/test_import_time.py
+"""Cold-start budget for the bridge and the secret_ai_writer package.
+
+Each entry point is imported in a fresh interpreter with ``python -X importtime``.
+The test fails if a heavy dependency is loaded on a path that does not need it,
+or if the total import time goes over budget. Budgets leave headroom for slow CI
+hosts; scale them with IMPORT_BUDGET_SCALE if needed.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+BUDGET_SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", "1"))
+
+# (import statement, budget in ms, top-level packages that must not be imported)
+ENTRY_POINTS = {
+    "bridge": (
+        "import sys; sys.path.insert(0, 'backend'); import ai_bridge",
+        250, {"langchain_core", "langchain_ollama", "secret_sdk"},
+    ),
+    "ai_integration": (
+        "from secret_ai_writer.ai_core.ai_integration import SecretAIWriter",
+        250, {"langchain_core", "langchain_ollama", "secret_sdk"},
+    ),
+    "secret_ai_client": (
+        "from secret_ai_writer.ai_core.secret_ai_client import ConfidentialWriter",
+        2000, {"langchain_core", "langchain_ollama"},
+    ),
+}
+
+
+def import_profile(statement):
+    """Return (total self time in ms, imported module names) for one cold import"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.add(name.strip())
+    return total_us / 1000, modules
+
+
+@pytest.mark.parametrize("entry_point", sorted(ENTRY_POINTS))
+def test_import_stays_within_cold_start_budget(entry_point):
+    statement, budget_ms, forbidden = ENTRY_POINTS[entry_point]
+    
+    # Best of three runs keeps one noisy run from failing the budget
+    profiles = [import_profile(statement) for _ in range(3)]
+    total_ms = min(total for total, _ in profiles)
+    modules = profiles[0][1]
+    
+    loaded = sorted({name.split(".")[0] for name in modules} & forbidden)
+    assert not loaded, f"{entry_point} imports {loaded} at load time"
+    assert total_ms <= budget_ms * BUDGET_SCALE, f"{entry_point} import took {total_ms:.0f} ms"
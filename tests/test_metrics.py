@@ -0,0 +1,57 @@
+# tests/test_metrics.py
+import json
+
+import pytest
+
+from secret_ai_writer.ai_core.metrics import MetricsRegistry
+
+
+def test_timer_records_stage_latency_by_outcome():
+    registry = MetricsRegistry(enabled=True)
+    
+    with registry.timer("writer.llm"):
+        pass
+    with pytest.raises(ValueError):
+        with registry.timer("writer.llm"):
+            raise ValueError("boom")
+    registry.observe("drafts.query", 0.3)
+    
+    snapshot = registry.snapshot()
+    assert snapshot["writer.llm"]["ok"]["count"] == 1
+    assert snapshot["writer.llm"]["error"]["count"] == 1
+    assert snapshot["drafts.query"]["ok"]["p50"] == 0.5
+    assert snapshot["drafts.query"]["ok"]["buckets"]["le_0.25"] == 0
+    assert snapshot["drafts.query"]["ok"]["buckets"]["le_0.5"] == 1
+
+
+def test_samples_above_the_top_bucket_keep_the_snapshot_valid_json():
+    registry = MetricsRegistry(enabled=True)
+    registry.observe("writer.llm", 500.0)
+    
+    snapshot = json.loads(json.dumps(registry.snapshot(), allow_nan=False))
+    
+    assert snapshot["writer.llm"]["ok"]["p99"] == 120
+    assert snapshot["writer.llm"]["ok"]["buckets"]["le_inf"] == 1
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    
+    with registry.timer("writer.llm"):
+        pass
+    registry.observe("writer.llm", 1.0)
+    
+    assert registry.snapshot() == {}
+
+
+def test_prometheus_text_has_cumulative_buckets():
+    registry = MetricsRegistry(enabled=True)
+    registry.observe("writer.cache_get", 0.002)
+    registry.observe("writer.cache_get", 3.0)
+    
+    text = registry.prometheus_text()
+    
+    assert "# TYPE secret_ai_writer_stage_seconds histogram" in text
+    assert 'secret_ai_writer_stage_seconds_bucket{stage="writer.cache_get",outcome="ok",le="0.005"} 1' in text
+    assert 'secret_ai_writer_stage_seconds_bucket{stage="writer.cache_get",outcome="ok",le="+Inf"} 2' in text
+    assert 'secret_ai_writer_stage_seconds_count{stage="writer.cache_get",outcome="ok"} 2' in text
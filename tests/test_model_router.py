@@ -0,0 +1,92 @@
+# tests/test_model_router.py
+from types import SimpleNamespace
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from secret_ai_writer.ai_core.model_router import ModelRouter
+from secret_ai_writer.ai_core.telemetry import get_model_stats
+
+from test_ai_integration import make_writer
+
+
+def fake_llm(model):
+    return GenericFakeChatModel(messages=iter(AIMessage(content=f"from {model}") for _ in range(100)))
+
+
+def make_router(**settings):
+    models = ("router-primary", "router-small", "router-grammar")
+    return ModelRouter({model: fake_llm(model) for model in models}, "router-primary", small="router-small",
+                       task_models={"grammar": "router-grammar"}, **settings)
+
+
+def test_routes_by_enhancement_type_and_prompt_length():
+    router = make_router(short_prompt_tokens=50)
+    
+    route = router.route("Fix this sentence.", "grammar")
+    assert (route.model, route.reason) == ("router-grammar", "task")
+    assert router.route("Write a haiku.").model == "router-small"
+    assert router.route("word " * 400).model == "router-primary"
+
+
+def test_saturated_model_falls_back_to_the_small_model():
+    router = make_router(max_in_flight=1)
+    long_prompt = "word " * 400
+    
+    with router.slot("router-primary"):
+        route = router.route(long_prompt)
+    assert route.model == "router-small"
+    assert route.preferred == "router-primary"
+    assert route.reason == "slo_fallback"
+    assert router.route(long_prompt).model == "router-primary"
+    
+    # A model whose recent latency, with the current queue, would miss the SLO is skipped too
+    slow = make_router(slo_seconds=1.0, model_parallel=1)
+    get_model_stats("router-primary").record({"processing_time": 0.8, "token_source": "ollama"})
+    assert slow.route(long_prompt).model == "router-primary"
+    with slow.slot("router-primary"):
+        assert slow.route(long_prompt).model == "router-small"
+
+
+def test_writer_records_the_model_that_served_each_request():
+    writer = make_writer()
+    writer.router = make_router(short_prompt_tokens=50)
+    writer.ollama_model = "router-primary"
+    writer.llm = writer.router.llms["router-primary"]
+    
+    enhanced = writer.enhance_writing("Their going to the store.", "grammar", "secret1a")
+    generated = writer.generate_content("word " * 400, "secret1a")
+    
+    assert enhanced["content"] == "from router-grammar"
+    assert enhanced["metadata"]["model"] == "router-grammar"
+    assert enhanced["metadata"]["route"] == "task"
+    assert generated["metadata"]["model"] == "router-primary"
+    assert writer.router.stats()["router-grammar"] == {"in_flight": 0, "routed": {"task": 1}}
+
+
+def test_batch_items_are_routed_and_counted_per_model():
+    in_flight = {}
+    
+    def batch_llm(model):
+        def batch_as_completed(inputs, config, return_exceptions=False):
+            in_flight[model] = router.stats()[model]["in_flight"]
+            for position in range(len(inputs)):
+                yield position, AIMessage(content=f"from {model}")
+        return SimpleNamespace(batch_as_completed=batch_as_completed)
+    
+    models = ("router-primary", "router-small", "router-grammar")
+    router = ModelRouter({model: batch_llm(model) for model in models}, "router-primary", small="router-small",
+                         task_models={"grammar": "router-grammar"}, short_prompt_tokens=50)
+    writer = make_writer()
+    writer.router = router
+    writer.ollama_model = "router-primary"
+    writer.llm = router.llms["router-primary"]
+    
+    batch = writer.generate_many(["word " * 400, "word " * 401, "Write a haiku.", {"draft_text": "Their here."}],
+                                 "secret1a", max_concurrency=4)
+    
+    assert [r["content"] for r in batch["results"]] == ["from router-primary"] * 2 + ["from router-small",
+                                                                                        "from router-grammar"]
+    assert batch["results"][3]["metadata"]["route"] == "task"
+    assert in_flight == {"router-primary": 2, "router-small": 1, "router-grammar": 1}
+    assert all(stats["in_flight"] == 0 for stats in router.stats().values())
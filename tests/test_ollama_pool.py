@@ -0,0 +1,117 @@
+# tests/test_ollama_pool.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_ollama import ChatOllama
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from secret_ai_writer.ai_core.ollama_pool import OllamaBackendPool, PooledChatModel
+from secret_ai_writer.ai_core.prompt_templates import enhancement_template
+
+
+def pooled_model(pool):
+    return PooledChatModel(pool, {url: ChatOllama(base_url=url, model="pool-model") for url in pool.urls})
+
+
+def test_requests_spread_over_the_least_loaded_backends():
+    with FakeOllamaServer(latency=0.05, response_tokens=4) as first, \
+            FakeOllamaServer(latency=0.05, response_tokens=4) as second:
+        pool = OllamaBackendPool([first.url, second.url])
+        llm = pooled_model(pool)
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            replies = list(executor.map(lambda i: llm.invoke(f"prompt {i}").content, range(8)))
+    
+    assert all(replies)
+    assert first.requests == second.requests == 4
+    stats = pool.stats()
+    assert all(backend["outstanding"] == 0 and backend["errors"] == 0 for backend in stats.values())
+
+
+def test_failing_backend_is_ejected_and_readmitted():
+    with FakeOllamaServer(response_tokens=4) as live:
+        flaky = FakeOllamaServer(response_tokens=4).start()
+        flaky_port = flaky._server.server_address[1]
+        pool = OllamaBackendPool([flaky.url, live.url], eject_after=1, probe_timeout=0.5)
+        flaky_backend = pool.backends[0]
+        flaky.stop()
+        
+        assert pool.probe(flaky_backend) is False
+        assert pool.stats()[flaky.url]["healthy"] is False
+        pooled_model(pool).invoke("routed around the ejected backend")
+        assert live.requests == 1
+        
+        with FakeOllamaServer(port=flaky_port):
+            assert pool.probe(flaky_backend) is True
+        assert pool.stats()[flaky.url] == {**pool.stats()[flaky.url], "healthy": True, "ejections": 1}
+
+
+def test_slow_request_is_hedged_on_another_backend():
+    with FakeOllamaServer(latency=1.0, response_tokens=4) as slow, \
+            FakeOllamaServer(response_tokens=4) as fast:
+        pool = OllamaBackendPool([slow.url, fast.url], hedge_after=0.05)
+        
+        start = time.perf_counter()
+        reply = pooled_model(pool).invoke("hedge me")
+        elapsed = time.perf_counter() - start
+        pool.close()
+    
+    assert reply.content
+    assert elapsed < 0.8
+    assert pool.stats()[fast.url]["hedge_wins"] == 1
+
+
+def test_fast_error_is_retried_on_another_backend():
+    with FakeOllamaServer(response_tokens=4) as live:
+        dead = FakeOllamaServer(response_tokens=4).start()
+        dead.stop()
+        pool = OllamaBackendPool([dead.url, live.url], hedge_after=5.0)
+        
+        start = time.perf_counter()
+        reply = pooled_model(pool).invoke("retry me")
+        elapsed = time.perf_counter() - start
+        pool.close()
+    
+    assert reply.content
+    assert elapsed < 2.0
+    stats = pool.stats()
+    assert stats[dead.url]["errors"] == 1
+    assert stats[live.url]["retries"] == 1 and stats[live.url]["hedges"] == 0
+
+
+def test_queued_requests_are_not_hedged():
+    with FakeOllamaServer(latency=0.05, response_tokens=4) as first, \
+            FakeOllamaServer(latency=0.05, response_tokens=4) as second:
+        pool = OllamaBackendPool([first.url, second.url], hedge_after=0.25, max_concurrency=2)
+        llm = pooled_model(pool)
+        
+        # Twelve calls on two workers queue for longer than hedge_after, but none runs slowly
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            replies = list(executor.map(lambda i: llm.invoke(f"prompt {i}").content, range(12)))
+        pool.close()
+    
+    assert all(replies)
+    assert first.requests + second.requests == 12
+    assert all(backend["hedges"] == 0 and backend["outstanding"] == 0 for backend in pool.stats().values())
+
+
+def test_prompt_prefix_sticks_to_its_backend_and_reuses_the_kv_cache():
+    with FakeOllamaServer(response_tokens=4, prefix_cache_slots=1) as first, \
+            FakeOllamaServer(response_tokens=4, prefix_cache_slots=1) as second:
+        pool = OllamaBackendPool([first.url, second.url])
+        llm = pooled_model(pool)
+        draft = "A draft long enough that evaluating it dominates the cost of the prompt. " * 20
+        
+        prompt_tokens = {}
+        for revision in range(3):
+            for enhancement_type in ("grammar", "casual"):
+                prompt, system_instruction = enhancement_template(enhancement_type).render(f"{draft}{revision}")
+                reply = llm.invoke([SystemMessage(content=system_instruction), HumanMessage(content=prompt)])
+                prompt_tokens.setdefault(enhancement_type, []).append(reply.response_metadata["prompt_eval_count"])
+    
+    # Each type keeps to one backend, so only its first request evaluates the whole prompt
+    assert first.requests == second.requests == 3
+    assert sum(backend["affinity_hits"] for backend in pool.stats().values()) == 4
+    for counts in prompt_tokens.values():
+        assert counts[0] > 300 and max(counts[1:]) <= 2
@@ -0,0 +1,44 @@
+# tests/test_prompt_templates.py
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from secret_ai_writer.ai_core.ollama_pool import prefix_key
+from secret_ai_writer.ai_core.prompt_templates import (
+    ENHANCEMENT_SYSTEM_INSTRUCTION, ENHANCEMENT_TEMPLATES, enhancement_template
+)
+
+
+def test_render_puts_the_fixed_prefix_ahead_of_the_draft():
+    prompt, system_instruction = enhancement_template("grammar").render("teh draft")
+    
+    assert prompt == ("Focus: grammar.\n"
+                      "Improve the grammar and correct any errors in this text while preserving meaning:\n\n"
+                      "teh draft")
+    assert system_instruction == ENHANCEMENT_SYSTEM_INSTRUCTION
+
+
+def test_render_with_context_keeps_the_prefix_and_marks_the_text():
+    prompt, _ = enhancement_template("casual").render("Second part.", context="First part.")
+    
+    assert prompt.startswith(enhancement_template("casual").prefix)
+    assert prompt.endswith("First part.\n\nText to improve:\nSecond part.")
+
+
+def test_custom_types_use_the_generic_instruction_and_are_compiled_once():
+    template = enhancement_template("pirate")
+    
+    assert "pirate" not in ENHANCEMENT_TEMPLATES
+    assert template.prefix == "Focus: pirate.\nImprove this text while maintaining its core meaning:\n\n"
+    assert enhancement_template("pirate") is template
+
+
+def test_prefix_is_identical_across_drafts():
+    for enhancement_type in [*ENHANCEMENT_TEMPLATES, "pirate"]:
+        template = enhancement_template(enhancement_type)
+        rendered = [template.render(draft) for draft in ("One draft.", "A different\n\ndraft entirely.")]
+        
+        assert all(prompt.startswith(template.prefix) for prompt, _ in rendered)
+        assert rendered[0][1] == rendered[1][1] == ENHANCEMENT_SYSTEM_INSTRUCTION
+        # The backend pool keys affinity on this prefix, so every draft of a type lands together
+        keys = {prefix_key([SystemMessage(content=system), HumanMessage(content=prompt)])
+                for prompt, system in rendered}
+        assert len(keys) == 1
@@ -0,0 +1,43 @@
+# tests/test_retrieve_drafts.py
+from secret_sdk.key.mnemonic import MnemonicKey
+
+from benchmarks.fake_lcd import FakeLCDServer
+from secret_ai_writer.ai_core.chain_clients import close_chain_clients
+
+
+def test_drafts_stream_back_concurrently_with_per_address_errors(monkeypatch):
+    with FakeLCDServer(latency=0.05) as lcd:
+        monkeypatch.setenv("LCD_URL", lcd.url)
+        monkeypatch.setenv("CHAIN_ID", "batch-test-1")
+        monkeypatch.setenv("CONTRACT_ADDRESS", "secret1batchtestcontract")
+        monkeypatch.setenv("MNEMONIC", MnemonicKey().mnemonic)
+        monkeypatch.setenv("DEV_MODE", "False")
+        monkeypatch.setenv("DRAFT_CACHE_TTL", "0")
+        
+        from secret_ai_writer.ai_core.secret_ai_client import ConfidentialWriter
+        writer = ConfidentialWriter()
+        try:
+            addresses = [f"secret1batch{i:03d}" for i in range(20)]
+            for address in addresses:
+                lcd.put_draft(address, writer._encrypt_data(f"draft for {address}".encode()))
+            # One draft that was never stored, one whose metadata is not valid JSON
+            lcd.put_draft(addresses[1], writer._encrypt_data(b"ok"), writer._encrypt_data(b"{not json"))
+            missing = "secret1batchmissing"
+            
+            lcd.peak_in_flight = 0
+            records = list(writer.retrieve_drafts(addresses + [missing, addresses[0]], max_concurrency=10))
+        finally:
+            close_chain_clients()
+    
+    summary = records[-1]
+    drafts = {record["address"]: record for record in records[:-1]}
+    assert summary["type"] == "summary"
+    assert summary["requested"] == 21
+    assert summary["retrieved"] == 19
+    assert summary["failed"] == 2
+    assert len(drafts) == 21
+    assert drafts[addresses[5]]["content"] == f"draft for {addresses[5]}"
+    assert "error" in drafts[addresses[1]]
+    assert "not found" in drafts[missing]["error"]
+    # Each query holds its LCD request for 50ms, so concurrent queries overlap there
+    assert 1 < lcd.peak_in_flight <= 10
@@ -0,0 +1,26 @@
+# tests/test_secret_ai_client.py
+import base64
+from types import SimpleNamespace
+
+from secret_sdk.util.encrypt_utils import EncryptionUtils
+
+from secret_ai_writer.ai_core.secret_ai_client import ConfidentialWriter
+
+
+def make_writer(dev_mode):
+    writer = ConfidentialWriter.__new__(ConfidentialWriter)
+    writer.dev_mode = dev_mode
+    # Mock ciphertexts are not sealed for this key, so decrypting them fails
+    enclave_key = EncryptionUtils(b"").get_pub_key()
+    writer.chain = SimpleNamespace(chain_id="mock-decrypt", url="https://lcd.test", encrypt_utils=EncryptionUtils(b""),
+                                   registration=SimpleNamespace(consensus_io_pub_key=lambda: enclave_key))
+    return writer
+
+
+def test_mock_encrypted_drafts_round_trip():
+    for dev_mode in (True, False):
+        writer = make_writer(dev_mode)
+        # retrieve_draft strips the outer base64 layer before decrypting
+        stored = base64.b64decode(make_writer(True)._encrypt_data(b"my draft"))
+        
+        assert writer._decrypt_data(stored) == b"my draft"
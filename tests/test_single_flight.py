@@ -0,0 +1,86 @@
+# tests/test_single_flight.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from secret_ai_writer.ai_core.single_flight import SingleFlight
+
+from test_ai_integration import make_writer
+
+
+class SlowLLM:
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def _reply(self):
+        with self._lock:
+            self.calls += 1
+            return AIMessage(content=f"reply {self.calls}")
+    
+    def invoke(self, messages):
+        time.sleep(self.delay)
+        return self._reply()
+    
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.delay)
+        return self._reply()
+
+
+def test_identical_concurrent_generations_share_one_llm_call():
+    writer = make_writer()
+    writer.llm = SlowLLM()
+    
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        futures = [pool.submit(writer.generate_content, "Write about privacy", "secret1a") for _ in range(5)]
+        # Another user's request is in a different cache scope, so it is not coalesced
+        other = pool.submit(writer.generate_content, "Write about privacy", "secret1b")
+        results = [future.result() for future in futures]
+        other_result = other.result()
+    
+    assert writer.llm.calls == 2
+    assert {result["content"] for result in results} == {results[0]["content"]}
+    assert other_result["content"] != results[0]["content"]
+    assert sum(bool(result["metadata"].get("coalesced")) for result in results) == 4
+    assert writer.single_flight.stats() == {"leaders": 2, "coalesced": 4, "in_flight": 0}
+    # Every request still records its own usage
+    assert len(writer.metadata_handler.stored) == 6
+
+
+def test_async_generations_coalesce_on_the_event_loop():
+    writer = make_writer()
+    writer.llm = SlowLLM()
+    
+    async def run():
+        return await asyncio.gather(*(writer.agenerate_content("Write about secrets", "secret1a") for _ in range(3)))
+    
+    results = asyncio.run(run())
+    
+    assert writer.llm.calls == 1
+    assert [bool(result["metadata"].get("coalesced")) for result in results].count(True) == 2
+
+
+def test_waiters_receive_the_leaders_error():
+    flight = SingleFlight()
+    started = threading.Event()
+    
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("ollama unavailable")
+    
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait()
+        waiter = pool.submit(flight.do, "key", lambda: "never runs")
+        for future in (leader, waiter):
+            with pytest.raises(RuntimeError):
+                future.result()
+    
+    assert flight.stats()["coalesced"] == 1
+    assert flight.do("key", lambda: "fresh") == ("fresh", False)
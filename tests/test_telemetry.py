@@ -0,0 +1,108 @@
+# tests/test_telemetry.py
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from secret_ai_writer.ai_core.model_router import ModelRouter
+from secret_ai_writer.ai_core.telemetry import ModelStats, generation_telemetry, model_stats
+
+from test_ai_integration import make_writer
+
+
+OLLAMA_STATS = {
+    "load_duration": 500_000_000,
+    "prompt_eval_count": 40,
+    "prompt_eval_duration": 200_000_000,
+    "eval_count": 100,
+    "eval_duration": 2_000_000_000,
+    "total_duration": 2_750_000_000,
+}
+
+
+def test_generation_telemetry_uses_ollama_statistics():
+    telemetry = generation_telemetry(OLLAMA_STATS, "prompt", "content")
+    
+    assert telemetry["token_source"] == "ollama"
+    assert telemetry["prompt_tokens"] == 40
+    assert telemetry["completion_tokens"] == 100
+    assert telemetry["estimated_tokens"] == 140
+    assert telemetry["load_duration"] == 0.5
+    assert telemetry["tokens_per_second"] == 50.0
+    assert telemetry["prompt_tokens_per_second"] == 200.0
+    assert telemetry["time_to_first_token"] == 0.7
+
+
+def test_generation_telemetry_falls_back_to_estimate():
+    telemetry = generation_telemetry({}, "a" * 40, "b" * 80)
+    
+    assert telemetry == {"prompt_tokens": 10, "completion_tokens": 20,
+                         "estimated_tokens": 30, "token_source": "estimate"}
+
+
+def test_generate_content_records_real_counts_per_model():
+    writer = make_writer()
+    writer.ollama_model = "telemetry-model"
+    writer.llm = GenericFakeChatModel(messages=iter([
+        AIMessage(content="First", response_metadata=OLLAMA_STATS),
+        AIMessage(content="Second", response_metadata={**OLLAMA_STATS, "load_duration": 0}),
+    ]))
+    
+    first = writer.generate_content("Write about privacy", "secret1a")
+    writer.generate_content("Write about secrets", "secret1a")
+    
+    assert first["metadata"]["completion_tokens"] == 100
+    assert first["metadata"]["token_source"] == "ollama"
+    stats = model_stats()["telemetry-model"]
+    assert stats["requests"] == 2
+    assert stats["completion_tokens"] == 200
+    assert stats["load_seconds"] == 0.5
+    assert stats["tokens_per_second"] == 50.0
+    assert first["metadata"]["cold_start"] is True
+    assert stats["cold_requests"] == 1
+    assert stats["avg_cold_processing_time"] is not None
+    assert stats["avg_warm_processing_time"] is not None
+
+
+def test_model_stats_moving_averages_skip_missing_samples():
+    stats = ModelStats("m")
+    stats.record({"processing_time": 1.0, "tokens_per_second": 10.0, "token_source": "ollama"})
+    stats.record({"processing_time": 2.0, "token_source": "estimate"})
+    
+    snapshot = stats.stats()
+    assert snapshot["requests"] == 2
+    assert snapshot["measured_requests"] == 1
+    assert snapshot["avg_tokens_per_second"] == 10.0
+    assert snapshot["avg_processing_time"] == 1.2
+
+
+def test_warm_up_loads_the_model_once_and_keeps_it_resident():
+    with FakeOllamaServer(load_time=0.6) as ollama:
+        writer = make_writer()
+        writer.ollama_base_url = ollama.url
+        
+        cold = writer.warm_up()
+        warm = writer.warm_up()
+    
+    assert cold["cold_start"] is True
+    assert cold["load_duration"] == 0.6
+    assert warm["cold_start"] is False
+    assert warm["elapsed"] < cold["elapsed"]
+    assert ollama.requests == 2
+
+
+def test_warm_up_keeps_every_routed_model_resident():
+    with FakeOllamaServer(load_time=0.6) as ollama:
+        writer = make_writer()
+        writer.ollama_base_url = ollama.url
+        writer.router = ModelRouter({"warm-primary": writer.llm, "warm-small": writer.llm}, "warm-primary",
+                                    small="warm-small")
+        
+        cold = writer.warm_up()
+        warm = writer.warm_up()
+    
+    assert set(cold["models"]) == {"warm-primary", "warm-small"}
+    assert all(result["cold_start"] for result in cold["models"].values())
+    assert cold["cold_start"] is True and cold["load_duration"] == 0.6
+    assert not any(result["cold_start"] for result in warm["models"].values())
+    assert warm["cold_start"] is False
+    assert ollama.requests == 4
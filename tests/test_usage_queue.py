@@ -0,0 +1,136 @@
+# tests/test_usage_queue.py
+import base64
+import json
+import threading
+import time
+
+from secret_ai_writer.ai_core.confidential_chain import MockTxResult, PrivateMetadata, UsageRollup
+from secret_ai_writer.ai_core.usage_queue import UsageStatsQueue
+
+
+class SlowMetadataHandler:
+    def __init__(self):
+        self.release = threading.Event()
+        self.stored = []
+    
+    def store_usage_stats(self, user_address, metadata):
+        self.release.wait(timeout=5)
+        if metadata.get("fail"):
+            raise RuntimeError("broadcast failed")
+        self.stored.append((user_address, metadata))
+        return MockTxResult(f"tx_{len(self.stored)}")
+
+
+def test_submit_returns_before_broadcast_and_status_resolves_after_flush():
+    handler = SlowMetadataHandler()
+    usage_queue = UsageStatsQueue(handler, max_depth=10, put_timeout=0)
+    
+    ok = usage_queue.submit("secret1a", {"model": "m"})
+    bad = usage_queue.submit("secret1a", {"fail": True})
+    assert usage_queue.status(ok)["status"] == "pending"
+    
+    handler.release.set()
+    usage_queue.flush()
+    
+    assert usage_queue.status(ok) == {"handle": ok, "status": "stored", "tx_hash": "tx_1"}
+    assert usage_queue.status(bad)["status"] == "failed"
+    assert usage_queue.status("usage_missing")["status"] == "unknown"
+    usage_queue.close()
+
+
+def test_full_queue_drops_and_close_flushes():
+    handler = SlowMetadataHandler()
+    usage_queue = UsageStatsQueue(handler, max_depth=1, put_timeout=0)
+    
+    handles = [usage_queue.submit("secret1a", {"n": n}) for n in range(4)]
+    statuses = [usage_queue.status(h)["status"] for h in handles]
+    assert "dropped" in statuses
+    
+    handler.release.set()
+    usage_queue.close()
+    
+    assert all(usage_queue.status(h)["status"] in ("stored", "dropped") for h in handles)
+    assert usage_queue.status(usage_queue.submit("secret1a", {}))["status"] == "dropped"
+
+
+def test_close_waits_for_writes_blocked_on_a_full_queue():
+    handler = SlowMetadataHandler()
+    usage_queue = UsageStatsQueue(handler, max_depth=1, put_timeout=5)
+    
+    handles = [usage_queue.submit("secret1a", {"n": n}) for n in range(2)]
+    blocked = []
+    submitter = threading.Thread(target=lambda: blocked.append(usage_queue.submit("secret1a", {"n": 2})))
+    submitter.start()
+    while usage_queue._submitting == 0:
+        time.sleep(0.01)
+    
+    closer = threading.Thread(target=usage_queue.close)
+    closer.start()
+    handler.release.set()
+    submitter.join()
+    closer.join()
+    
+    assert [usage_queue.status(h)["status"] for h in handles + blocked] == ["stored"] * 3
+
+
+def test_private_metadata_batches_usage_into_one_transaction(monkeypatch):
+    monkeypatch.setenv("USAGE_BATCH_SIZE", "3")
+    monkeypatch.setenv("USAGE_BATCH_INTERVAL", "60")
+    monkeypatch.setenv("DEV_MODE", "True")
+    metadata_handler = PrivateMetadata()
+    sent = []
+    stored = {}
+    
+    def execute_batch(msgs):
+        # Like the contract, keep one draft per sender; every message comes from the same wallet
+        sent.append(msgs)
+        for msg in msgs:
+            stored["wallet"] = msg["store_draft"]["encrypted_metadata"]
+        return "tx_batch"
+    
+    monkeypatch.setattr(metadata_handler, "_execute_batch", execute_batch)
+    usage_queue = UsageStatsQueue(metadata_handler, max_depth=10, put_timeout=0)
+    
+    handles = [
+        usage_queue.submit("secret1a", {"model": "m", "processing_time": 0.3, "estimated_tokens": 10}),
+        usage_queue.submit("secret1b", {"model": "m", "processing_time": 7.0, "estimated_tokens": 20}),
+    ]
+    usage_queue.flush()
+    assert usage_queue.status(handles[0])["status"] == "batched"
+    
+    handles.append(usage_queue.submit("secret1a", {"model": "m", "processing_time": 1.5, "estimated_tokens": 5}))
+    usage_queue.close()
+    metadata_handler.close()
+    
+    assert len(sent) == 1
+    persisted = json.loads(base64.b64decode(base64.b64decode(stored["wallet"])))
+    rollups = {rollup["user_address"]: rollup for rollup in persisted}
+    assert set(rollups) == {"secret1a", "secret1b"}
+    assert rollups["secret1a"]["generations"] == 2
+    assert rollups["secret1b"]["sums"]["estimated_tokens"] == 20
+    assert all(usage_queue.status(h) == {"handle": h, "status": "stored", "tx_hash": "tx_batch", "generations": 3}
+               for h in handles)
+
+
+def test_usage_rollup_sums_and_buckets_latency():
+    rollup = UsageRollup("secret1a")
+    rollup.add({"model": "m", "processing_time": 0.3, "estimated_tokens": 10, "timestamp": 5})
+    rollup.add({"model": "m", "processing_time": 200, "estimated_tokens": 5, "timestamp": 2, "batch_size": 4})
+    
+    summary = rollup.to_dict()
+    assert summary["generations"] == 5
+    assert (summary["window_start"], summary["window_end"]) == (2, 5)
+    assert summary["sums"]["estimated_tokens"] == 15
+    assert summary["models"] == {"m": 5}
+    assert summary["latency_histogram"]["le_0.5"] == 1
+    assert summary["latency_histogram"]["le_inf"] == 1
+
+
+def test_usage_rollup_counts_every_variant_of_a_multi_enhancement():
+    rollup = UsageRollup("secret1a")
+    rollup.add({"batch_size": 3, "succeeded": 2, "failed": 1, "models": ["big", "small"],
+                "model_counts": {"big": 1, "small": 1}, "content_type": "enhance_multi"})
+    
+    summary = rollup.to_dict()
+    assert summary["generations"] == 3
+    assert summary["models"] == {"big": 1, "small": 1, "unknown": 1}